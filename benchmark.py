@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmark.py
+
+Banco de pruebas de rendimiento para la compilación de la red y la búsqueda.
+
+Para cada escenario (la red real de datos_red_transporte.py y redes
+sintéticas de tamaño ciudad) mide:
+ - tiempo de compilación (`compilar_red`)
+ - memoria pico durante la compilación (tracemalloc, en una pasada aparte
+   para no inflar el tiempo)
+ - latencia por consulta (p50 / p90 / p99) de `encontrar_ruta_mas_rapida`
+ - contadores de la búsqueda: inserciones y extracciones del heap,
+   extracciones obsoletas, nodos fijados y tamaño máximo del heap
+ - con --alt, lo mismo para A* con landmarks (busqueda_alt.py), uni y
+   bidireccional, como escenarios "<nombre>/alt" y "<nombre>/alt_bidireccional"
+
+Los resultados se guardan en JSON; con --comparar se contrastan contra una
+corrida anterior y se señalan las regresiones.
+
+Uso:
+    python3 benchmark.py --salida bench.json
+    python3 benchmark.py --sinteticas 10000,50000 --lineas 300 --densidad 0.3
+    python3 benchmark.py --alt --sinteticas 50000
+    python3 benchmark.py --sinteticas 10000,50000 --radio 300   # con transbordos caminando
+    python3 benchmark.py --comparar bench.json
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from buscador_rutas import (
+    compilar_red, lineas_integradas, encontrar_ruta_mas_rapida, normalizar, TARIFAS,
+    METROS_POR_GRADO
+)
+from datos_red_transporte import COORDENADAS_ESTACIONES
+
+# Consultas fijas sobre la red real (origen, destino)
+CONSULTAS_REALES = [
+    ("Universidad", "El Rosario"),
+    ("Indios Verdes", "Tasqueña"),
+    ("Observatorio", "Pantitlán"),
+    ("Cuatro Caminos", "Constitución de 1917"),
+    ("Insurgentes", "Hidalgo"),
+    ("Tláhuac", "Politécnico"),
+    ("Buenavista", "Ciudad Azteca"),
+    ("Barranca del Muerto", "Martín Carrera"),
+]
+
+SISTEMAS_SINTETICOS = ('METRO', 'METROBUS', 'TROLEBUS')
+# Centro y tamaño de celda de las redes sintéticas con coordenadas
+CENTRO_SINTETICO = (19.4326, -99.1332)
+LADO_CELDA = 250.0
+# Métricas comparadas entre corridas -> cambio absoluto mínimo para contar
+# como regresión (por debajo de eso es ruido de medición aunque supere el umbral)
+METRICAS_COMPARADAS = {
+    'construccion_s': 0.05,
+    'memoria_pico_mb': 1.0,
+    'indice_mb': 0.5,
+    'p50_ms': 0.1,
+    'p90_ms': 0.1,
+    'p99_ms': 0.2,
+    'fijados_por_consulta': 1.0,
+}
+
+# ---------------------------
+# REDES SINTÉTICAS
+# ---------------------------
+def red_sintetica(paradas, lineas=200, densidad_transbordo=0.3, semilla=0):
+    """
+    Genera líneas sintéticas (mismo formato que `lineas_integradas()`) con
+    unas `paradas` paradas en total repartidas entre `lineas` líneas.
+
+    Cada línea es una caminata aleatoria sobre una cuadrícula de celdas. Una
+    parada toma el nombre compartido de su celda con probabilidad
+    `densidad_transbordo` (y así conecta por transbordo con las demás líneas
+    que pasan por ella); si no, recibe un nombre propio de la línea.
+    """
+    rnd = random.Random(semilla)
+    # Unas 4 visitas por celda en promedio: las líneas se cruzan seguido
+    lado = max(2, int((paradas / 4) ** 0.5))
+    por_linea = max(2, paradas // lineas)
+    resultado = []
+    for n in range(lineas):
+        x, y = rnd.randrange(lado), rnd.randrange(lado)
+        vistas = set()
+        estaciones = []
+        for _ in range(por_linea):
+            vistas.add((x, y))
+            if rnd.random() < densidad_transbordo:
+                estaciones.append(f"C{x}_{y}")
+            else:
+                estaciones.append(f"C{x}_{y}/L{n}")
+            vecinas = [(x + dx, y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                       if 0 <= x + dx < lado and 0 <= y + dy < lado]
+            libres = [c for c in vecinas if c not in vistas]
+            x, y = rnd.choice(libres or vecinas)
+        tiempos = [round(rnd.uniform(1.0, 3.5), 1) for _ in range(len(estaciones) - 1)]
+        resultado.append((SISTEMAS_SINTETICOS[n % len(SISTEMAS_SINTETICOS)], f"S{n}", estaciones, tiempos))
+    return resultado
+
+def coordenadas_sinteticas(lineas, semilla=0):
+    """
+    {estacion: (lat, lon)} para las líneas de `red_sintetica`: cada parada
+    cae en un punto al azar de su celda (de LADO_CELDA metros), así que las
+    paradas propias de líneas distintas en celdas cercanas quedan a
+    distancia de transbordo caminando.
+    """
+    rnd = random.Random(semilla)
+    lat0, lon0 = CENTRO_SINTETICO
+    escala_lon = METROS_POR_GRADO * math.cos(math.radians(lat0))
+    coordenadas = {}
+    for _, _, estaciones, _ in lineas:
+        for est in estaciones:
+            if est not in coordenadas:
+                x, y = map(int, est[1:].split('/')[0].split('_'))
+                coordenadas[est] = (lat0 + (y + rnd.random()) * LADO_CELDA / METROS_POR_GRADO,
+                                    lon0 + (x + rnd.random()) * LADO_CELDA / escala_lon)
+    return coordenadas
+
+def consultas_aleatorias(red, cantidad, semilla=0):
+    """Pares (origen, destino) de nombres de estación elegidos al azar."""
+    rnd = random.Random(semilla)
+    nombres = sorted(red.indice_por_nombre)
+    return [tuple(rnd.sample(nombres, 2)) for _ in range(cantidad)]
+
+# ---------------------------
+# MEDICIÓN
+# ---------------------------
+def _percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return None
+    k = min(len(valores_ordenados) - 1, max(0, round(p / 100.0 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[k]
+
+def medir_compilacion(lineas, medir_memoria=True, **opciones):
+    """
+    Devuelve (red, segundos, memoria_pico_mb) de compilar `lineas`;
+    `opciones` se pasan a `compilar_red`.
+    """
+    gc.collect()
+    inicio = time.perf_counter()
+    red = compilar_red(lineas, tarifas=TARIFAS, **opciones)
+    segundos = time.perf_counter() - inicio
+    pico = None
+    if medir_memoria:
+        gc.collect()
+        tracemalloc.start()
+        compilar_red(lineas, tarifas=TARIFAS, **opciones)
+        pico = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return red, segundos, pico
+
+def medir_consultas(red, consultas, buscar=None):
+    """
+    Latencias (ms) y contadores acumulados de la búsqueda para `consultas`.
+    `buscar(origen, destino, estadisticas)` sustituye a
+    `encontrar_ruta_mas_rapida` si se da.
+    """
+    if buscar is None:
+        def buscar(origen, destino, estadisticas):
+            return encontrar_ruta_mas_rapida(red, red.indice_por_nombre, origen, destino,
+                                             estadisticas=estadisticas)
+    estadisticas = {}
+    latencias = []
+    sin_ruta = 0
+    for origen, destino in consultas:
+        inicio = time.perf_counter()
+        ruta = buscar(origen, destino, estadisticas)
+        latencias.append((time.perf_counter() - inicio) * 1000.0)
+        sin_ruta += ruta is None
+    latencias.sort()
+    n = max(1, len(consultas))
+    return {
+        "consultas": len(consultas),
+        "sin_ruta": sin_ruta,
+        "p50_ms": _percentil(latencias, 50),
+        "p90_ms": _percentil(latencias, 90),
+        "p99_ms": _percentil(latencias, 99),
+        "max_ms": latencias[-1] if latencias else None,
+        "fijados_por_consulta": estadisticas.get('nodos_fijados', 0) / n,
+        "contadores": estadisticas,
+    }
+
+def escenario(nombre, lineas, consultas_fijas=(), aleatorias=200, semilla=0, medir_memoria=True,
+              alt=False, **opciones):
+    """
+    Compila `lineas` (con las `opciones` de `compilar_red`), ejecuta las
+    consultas y devuelve la lista de resultados: el del escenario y, con
+    `alt`, los de A* con landmarks.
+    """
+    red, segundos, pico = medir_compilacion(lineas, medir_memoria, **opciones)
+    consultas = [c for c in consultas_fijas
+                 if all(red.indice_por_nombre.get(normalizar(n)) for n in c)]
+    consultas += consultas_aleatorias(red, aleatorias, semilla)
+    resultado = {
+        "escenario": nombre,
+        "nodos": len(red),
+        "aristas": red.num_aristas(),
+        "estaciones": len(red.indice_por_nombre),
+        "construccion_s": segundos,
+        "memoria_pico_mb": pico,
+    }
+    resultado.update(medir_consultas(red, consultas))
+    resultados = [resultado]
+    if alt:
+        from busqueda_alt import IndiceALT
+        inicio = time.perf_counter()
+        indice = IndiceALT(red)
+        preproceso = time.perf_counter() - inicio
+        for modo, bidireccional in (('alt', False), ('alt_bidireccional', True)):
+            def buscar(origen, destino, estadisticas, bidireccional=bidireccional):
+                return indice.encontrar_ruta(origen, destino, bidireccional=bidireccional,
+                                             estadisticas=estadisticas)
+            # El tamaño del índice no es memoria pico: va en su propia métrica
+            variante = dict(resultado, escenario=f"{nombre}/{modo}", construccion_s=preproceso,
+                            memoria_pico_mb=None, indice_mb=indice.tamano_bytes() / (1024 * 1024))
+            variante.update(medir_consultas(red, consultas, buscar))
+            resultados.append(variante)
+    return resultados
+
+# ---------------------------
+# COMPARACIÓN ENTRE CORRIDAS
+# ---------------------------
+def comparar(anterior, actual, umbral=0.10):
+    """
+    Lista de regresiones (escenario, métrica, antes, ahora, cambio) donde
+    la métrica empeoró más que `umbral` (fracción) respecto a `anterior` y
+    además más que su mínimo absoluto en METRICAS_COMPARADAS.
+    """
+    previos = {e["escenario"]: e for e in anterior.get("escenarios", [])}
+    regresiones = []
+    for e in actual["escenarios"]:
+        previo = previos.get(e["escenario"])
+        if previo is None:
+            continue
+        for metrica, minimo in METRICAS_COMPARADAS.items():
+            antes, ahora = previo.get(metrica), e.get(metrica)
+            if not antes or ahora is None:
+                continue
+            cambio = ahora / antes - 1.0
+            if cambio > umbral and ahora - antes > minimo:
+                regresiones.append((e["escenario"], metrica, antes, ahora, cambio))
+    return regresiones
+
+# ---------------------------
+# PROGRAMA PRINCIPAL
+# ---------------------------
+def _imprimir(resultado):
+    memoria = resultado["memoria_pico_mb"]
+    if resultado.get("indice_mb") is not None:
+        memoria = f"índice {resultado['indice_mb']:.1f} MB"
+    else:
+        memoria = f"memoria {'-' if memoria is None else f'{memoria:.1f} MB'}"
+    print(f"{resultado['escenario']:<34} {resultado['nodos']:>8} nodos  "
+          f"compilación {resultado['construccion_s']:.2f} s  {memoria}")
+    print(f"{'':<34} {resultado['consultas']:>8} consultas  p50 {resultado['p50_ms']:.2f} ms  "
+          f"p90 {resultado['p90_ms']:.2f} ms  p99 {resultado['p99_ms']:.2f} ms  "
+          f"fijados/consulta {resultado['fijados_por_consulta']:.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del buscador de rutas CDMX")
+    parser.add_argument('--sinteticas', default='10000',
+                        help="Tamaños (paradas) de redes sintéticas separados por comas; vacío = ninguna")
+    parser.add_argument('--lineas', type=int, default=200, help="Líneas por red sintética")
+    parser.add_argument('--densidad', type=float, default=0.3, help="Fracción de paradas con transbordo")
+    parser.add_argument('--consultas', type=int, default=200, help="Consultas aleatorias por escenario")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--sin-memoria', action='store_true', help="No medir la memoria pico")
+    parser.add_argument('--alt', action='store_true', help="Medir también A* con landmarks (ALT)")
+    parser.add_argument('--radio', type=float, default=None,
+                        help="Dar coordenadas a las redes sintéticas y crear transbordos caminando a este radio (m)")
+    parser.add_argument('--salida', default=None, help="Archivo JSON donde guardar los resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de una corrida anterior")
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help="Empeoramiento tolerado (fracción; además debe superar el mínimo absoluto de la métrica)")
+    args = parser.parse_args()
+
+    medir_memoria = not args.sin_memoria
+    resultados = escenario("real", list(lineas_integradas()), CONSULTAS_REALES,
+                           args.consultas, args.semilla, medir_memoria, args.alt,
+                           coordenadas=COORDENADAS_ESTACIONES)
+    for tam in filter(None, args.sinteticas.split(',')):
+        paradas = int(tam)
+        lineas = red_sintetica(paradas, args.lineas, args.densidad, args.semilla)
+        opciones = {}
+        nombre = f"sintetica_{paradas}"
+        if args.radio is not None:
+            opciones = {'coordenadas': coordenadas_sinteticas(lineas, args.semilla),
+                        'radio_transbordo': args.radio}
+            nombre += f"_caminando_{args.radio:g}m"
+        resultados += escenario(nombre, lineas, (), args.consultas, args.semilla,
+                                medir_memoria, args.alt, **opciones)
+    for resultado in resultados:
+        _imprimir(resultado)
+
+    informe = {
+        "fecha": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": vars(args),
+        "escenarios": resultados,
+    }
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"Resultados escritos en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        regresiones = comparar(anterior, informe, args.umbral)
+        if not regresiones:
+            print(f"Sin regresiones respecto a {args.comparar}")
+        for nombre, metrica, antes, ahora, cambio in regresiones:
+            print(f"REGRESIÓN {nombre} {metrica}: {antes:.3f} -> {ahora:.3f} (+{cambio:.0%})")
+        if regresiones:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
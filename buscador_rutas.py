@@ -13,28 +13,48 @@ calculando costos y manejando restricciones de cierres.
 # ---------------------------
 # IMPORTACIONES
 # ---------------------------
+import copy
+import hashlib
 import heapq
-from collections import defaultdict
+import math
+import sys
+import unicodedata
+from array import array
 
 # Importamos los datos de la red (líneas, tiempos, tarifas)
 from datos_red_transporte import (
     metro_lines, metrobus_lines, trolebus_lines,
     TIME_METRO, TIME_METROBUS, TIME_TROLEBUS,
     TRANSFER_PENALTY, FARE_METRO, FARE_METROBUS,
-    FARE_TROLEBUS, MAX_DISPLAY
+    FARE_TROLEBUS, MAX_DISPLAY, ALIAS_ESTACIONES,
+    TRANSFER_RADIUS, WALK_SPEED, WALK_DETOUR, COORDENADAS_ESTACIONES
 )
 
+# Código de modo reservado para las aristas de transbordo (los demás modos
+# usan el código del sistema al que pertenece la arista)
+MODO_TRANSFER = -1
+
+INF = float('inf')
+
+# Tarifa por entrada a cada sistema
+TARIFAS = {'METRO': FARE_METRO, 'METROBUS': FARE_METROBUS, 'TROLEBUS': FARE_TROLEBUS}
+
+# Metros por grado de latitud (radio terrestre medio)
+METROS_POR_GRADO = 6371000.0 * math.pi / 180.0
+
 # ---------------------------
 # UTILIDADES
 # ---------------------------
-def normalizar(texto: str) -> str:
+def plegar(texto: str) -> str:
     """
-    Convierte un nombre de estación a un formato estándar (minúsculas, sin
-    acentos, guiones o paréntesis) para facilitar comparaciones.
+    Convierte un texto a un formato estándar (minúsculas, sin acentos,
+    guiones o paréntesis), sin aplicar alias de estaciones.
     """
     if texto is None:
         return ""
     t = texto.strip().lower()
+    # Quita acentos y diacríticos (á -> a, ñ -> n, ü -> u)
+    t = ''.join(c for c in unicodedata.normalize('NFKD', t) if not unicodedata.combining(c))
     # Reemplaza caracteres variables por espacios
     for ch in ['(', ')', '/', '-', '—', '–']:
         t = t.replace(ch, ' ')
@@ -42,205 +62,576 @@ def normalizar(texto: str) -> str:
     t = ' '.join(t.split())
     return t
 
-# ---------------------------
-# CONSTRUCCIÓN DEL GRAFO
-# ---------------------------
-def construir_grafo(estaciones_cerradas=None, tramos_cerrados=None):
+# Alias ya plegados: variante -> nombre canónico
+ALIAS_NORMALIZADOS = {plegar(k): plegar(v) for k, v in ALIAS_ESTACIONES.items()}
+
+def normalizar(texto: str) -> str:
     """
-    Construye la red (grafo) a partir de las listas de líneas.
-    
-    - Cada nodo es: (estacion_original, sistema, id_linea)
-    - Cada arista es: (vecino, tiempo_minutos, etiqueta_modo)
-    
-    Devuelve (grafo, indice_por_nombre)
+    Convierte un nombre de estación a un formato estándar (minúsculas, sin
+    acentos, guiones o paréntesis) para facilitar comparaciones. Las
+    variantes conocidas (ALIAS_ESTACIONES) se reemplazan por su nombre canónico.
     """
+    t = plegar(texto)
+    return ALIAS_NORMALIZADOS.get(t, t)
 
-    # Usar 'sets' para búsquedas rápidas de estaciones/tramos cerrados
-    estaciones_cerradas = set(normalizar(s) for s in (estaciones_cerradas or []) if s and s.strip() != '')
+def _normalizar_tramos(tramos_cerrados):
+    """
+    Convierte los tramos cerrados a un conjunto de tuplas normalizadas
+    (a, b, sistema) en ambos sentidos. Acepta (A, B, SIS), (A, B) o "A-B".
+    """
     closed_segments_norm = set()
-
     for seg in (tramos_cerrados or []):
-        # Acepta formatos como (A, B, SIS), (A, B), o "A-B"
         if isinstance(seg, tuple) and len(seg) == 3:
-            a,b,sys = seg
-            closed_segments_norm.add((normalizar(a), normalizar(b), sys))
-            closed_segments_norm.add((normalizar(b), normalizar(a), sys))
+            a,b,sistema = seg
         elif isinstance(seg, tuple) and len(seg) == 2:
             a,b = seg
-            closed_segments_norm.add((normalizar(a), normalizar(b), 'ANY'))
-            closed_segments_norm.add((normalizar(b), normalizar(a), 'ANY'))
+            sistema = 'ANY'
         elif isinstance(seg, str) and "-" in seg:
             a,b = seg.split("-", 1)
-            closed_segments_norm.add((normalizar(a), normalizar(b), 'ANY'))
-            closed_segments_norm.add((normalizar(b), normalizar(a), 'ANY'))
+            sistema = 'ANY'
+        else:
+            continue
+        closed_segments_norm.add((normalizar(a), normalizar(b), sistema))
+        closed_segments_norm.add((normalizar(b), normalizar(a), sistema))
+    return closed_segments_norm
 
-    grafo = defaultdict(list)
-    nodos = set() # Almacena todos los nodos únicos creados
-
-    # --- Funciones internas para construir el grafo ---
-    
-    def anadir_arista(nodo_a, nodo_b, tiempo, etiqueta):
-        # Añade una conexión (arista) al grafo
-        grafo[nodo_a].append((nodo_b, tiempo, etiqueta))
+# ---------------------------
+# RED COMPILADA
+# ---------------------------
+class RedCompilada:
+    """
+    Representación compacta de la red en formato CSR (Compressed Sparse Row).
+
+    - Cada nodo es un entero; `nodos[i]` guarda la tupla original
+      (estacion_original, sistema, id_linea) solo para mostrar resultados.
+    - Las aristas del nodo `u` ocupan las posiciones
+      `offsets[u] .. offsets[u+1]-1` de los arreglos `destinos`, `pesos`
+      (minutos) y `modos` (código de sistema o MODO_TRANSFER).
+    - `indice_por_nombre` mapea el nombre normalizado a la lista de ids.
+    - `huella` identifica los datos (líneas, tiempos, tarifas, cierres,
+      alias) con que se compiló; cambia si cualquiera de ellos cambia.
+    - `coordenadas` (opcional) guarda (lat, lon) por código de nombre en un
+      array('d') de 2 * len(nombres); NaN si la estación no tiene.
+    """
 
-    def agregar_sistema(lineas_dict, nombre_sistema, tiempo_por_tramo):
-        # Procesa un sistema completo (ej. 'METRO') y lo añade al grafo
+    def __init__(self, nodos, sistemas, lineas, nombres, nodo_sistema, nodo_linea,
+                 nodo_estacion, offsets, destinos, pesos, modos, tarifas, huella='',
+                 coordenadas=None):
+        self.nodos = nodos                  # id -> (estacion, sistema, linea)
+        self.sistemas = sistemas            # código -> nombre del sistema
+        self.lineas = lineas                # código -> (sistema, id_linea)
+        self.nombres = nombres              # código -> nombre normalizado
+        self.nodo_sistema = nodo_sistema    # array('b')
+        self.nodo_linea = nodo_linea        # array('i')
+        self.nodo_estacion = nodo_estacion  # array('i')
+        self.offsets = offsets              # array('i'), longitud N+1
+        self.destinos = destinos            # array('i'), longitud E
+        self.pesos = pesos                  # array('d'), longitud E
+        self.modos = modos                  # array('b'), longitud E
+        self.tarifas = tarifas              # código de sistema -> tarifa
+        self.arista_original = None         # solo en redes invertidas
+        self.huella = huella                # hash de los datos de origen
+        self.coordenadas = coordenadas      # array('d') lat, lon por nombre (o None)
+
+        self.codigo_sistema = {s: i for i, s in enumerate(sistemas)}
+        self.id_por_nodo = {nodo: i for i, nodo in enumerate(nodos)}
+        self.indice_por_nombre = {}
+        for i, cod in enumerate(nodo_estacion):
+            self.indice_por_nombre.setdefault(nombres[cod], []).append(i)
+
+    def __len__(self):
+        return len(self.nodos)
+
+    def num_aristas(self):
+        return len(self.destinos)
+
+    def etiqueta(self, e):
+        """Etiqueta de modo de la arista `e` ('METRO', ..., 'TRANSFER')."""
+        m = self.modos[e]
+        return 'TRANSFER' if m == MODO_TRANSFER else self.sistemas[m]
+
+    def __getitem__(self, nodo):
+        """
+        Vista de compatibilidad con el grafo de listas de adyacencia:
+        devuelve [(vecino, tiempo, etiqueta), ...] para una tupla de nodo o id.
+        """
+        u = nodo if isinstance(nodo, int) else self.id_por_nodo[nodo]
+        return [(self.nodos[self.destinos[e]], self.pesos[e], self.etiqueta(e))
+                for e in range(self.offsets[u], self.offsets[u+1])]
+
+    def invertida(self):
+        """
+        Devuelve la red con todas las aristas invertidas (para búsquedas hacia
+        atrás). Comparte los datos de los nodos; `arista_original[e]` da el
+        índice de la arista correspondiente en esta red.
+        """
+        n = len(self); m = self.num_aristas()
+        offsets = array('i', [0]) * (n + 1)
+        for v in self.destinos:
+            offsets[v+1] += 1
+        for i in range(n):
+            offsets[i+1] += offsets[i]
+        pos = offsets[:-1]
+        destinos = array('i', [0]) * m; pesos = array('d', [0.0]) * m
+        modos = array('b', [0]) * m; arista_original = array('i', [0]) * m
+        for u in range(n):
+            for e in range(self.offsets[u], self.offsets[u+1]):
+                v = self.destinos[e]; p = pos[v]; pos[v] = p + 1
+                destinos[p] = u; pesos[p] = self.pesos[e]; modos[p] = self.modos[e]
+                arista_original[p] = e
+
+        inv = copy.copy(self)
+        inv.offsets = offsets; inv.destinos = destinos; inv.pesos = pesos; inv.modos = modos
+        inv.arista_original = arista_original
+        return inv
+
+def lineas_integradas():
+    """
+    Fuente de líneas incluida en `datos_red_transporte.py`.
+    Genera tuplas (sistema, id_linea, estaciones, tiempo_por_tramo).
+    """
+    for lineas_dict, nombre_sistema, tiempo_por_tramo in (
+            (metro_lines, 'METRO', TIME_METRO),
+            (metrobus_lines, 'METROBUS', TIME_METROBUS),
+            (trolebus_lines, 'TROLEBUS', TIME_TROLEBUS)):
         for id_linea, estaciones in lineas_dict.items():
-            for est in estaciones:
-                if normalizar(est) not in estaciones_cerradas:
-                    nodos.add((est, nombre_sistema, id_linea))
-            
-            # Conectar estaciones contiguas (si no están cerradas)
-            for i in range(len(estaciones)-1):
-                a = estaciones[i]
-                b = estaciones[i+1]
-                na = normalizar(a); nb = normalizar(b)
+            yield nombre_sistema, id_linea, estaciones, tiempo_por_tramo
 
-                if na in estaciones_cerradas or nb in estaciones_cerradas:
-                    continue
-                if (na, nb, nombre_sistema) in closed_segments_norm or (na, nb, 'ANY') in closed_segments_norm:
+def _pares_cercanos(coordenadas, radio):
+    """
+    Pares (a, b, metros), a < b, de puntos a no más de `radio` metros.
+
+    `coordenadas` es un array de (lat, lon) intercalados (NaN = sin
+    coordenada). Los puntos se proyectan a metros (equirectangular, exacta de
+    sobra a escala de una ciudad) y se reparten en una cuadrícula de celdas de
+    lado `radio`: cada punto solo se compara con los de su celda y las 8
+    vecinas, así que el costo crece linealmente con el número de puntos.
+    """
+    puntos = [(i, coordenadas[2*i], coordenadas[2*i+1]) for i in range(len(coordenadas) // 2)
+              if not math.isnan(coordenadas[2*i])]
+    if not puntos or radio <= 0:
+        return []
+    lat0 = math.radians(sum(lat for _, lat, _ in puntos) / len(puntos))
+    escala_x = METROS_POR_GRADO * math.cos(lat0)
+
+    celdas = {}
+    for i, lat, lon in puntos:
+        x = lon * escala_x; y = lat * METROS_POR_GRADO
+        celdas.setdefault((int(x // radio), int(y // radio)), []).append((i, x, y))
+
+    pares = []
+    for (cx, cy), lista in celdas.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                vecinos = celdas.get((cx + dx, cy + dy))
+                if not vecinos:
                     continue
-                
-                nodo_a = (a, nombre_sistema, id_linea)
-                nodo_b = (b, nombre_sistema, id_linea)
-                anadir_arista(nodo_a, nodo_b, tiempo_por_tramo, nombre_sistema)
-                anadir_arista(nodo_b, nodo_a, tiempo_por_tramo, nombre_sistema)
-    
-    # --- Ejecución de la construcción ---
+                for a, xa, ya in lista:
+                    for b, xb, yb in vecinos:
+                        if a < b:
+                            metros = math.hypot(xa - xb, ya - yb)
+                            if metros <= radio:
+                                pares.append((a, b, metros))
+    return pares
+
+def compilar_red(lineas, tarifas=None, estaciones_cerradas=None, tramos_cerrados=None,
+                 penalizacion_transbordo=TRANSFER_PENALTY, coordenadas=None,
+                 radio_transbordo=TRANSFER_RADIUS):
+    """
+    Compila una fuente de líneas en una RedCompilada.
+
+    `lineas` es un iterable de (sistema, id_linea, estaciones, tiempos), donde
+    `tiempos` es un número (igual para todos los tramos) o una secuencia con
+    el tiempo de cada tramo. Los transbordos se generan entre nodos que
+    comparten el mismo nombre normalizado y, si se dan `coordenadas`
+    ({nombre: (lat, lon)}), entre estaciones a menos de `radio_transbordo`
+    metros, con un tiempo que crece con la distancia a pie.
+    """
+    tarifas = TARIFAS if tarifas is None else tarifas
 
-    agregar_sistema(metro_lines, 'METRO', TIME_METRO)
-    agregar_sistema(metrobus_lines, 'METROBUS', TIME_METROBUS)
-    agregar_sistema(trolebus_lines, 'TROLEBUS', TIME_TROLEBUS)
+    # Usar 'sets' para búsquedas rápidas de estaciones/tramos cerrados
+    estaciones_cerradas = set(normalizar(s) for s in (estaciones_cerradas or []) if s and s.strip() != '')
+    closed_segments_norm = _normalizar_tramos(tramos_cerrados)
+
+    nodos = []; id_por_nodo = {}
+    sistemas = []; codigo_sistema = {}
+    lineas_cod = []
+    nombres = []; codigo_nombre = {}
+    nodo_sistema = array('b'); nodo_linea = array('i'); nodo_estacion = array('i')
+    origenes = array('i'); destinos = array('i'); pesos = array('d'); modos = array('b')
+
+    def id_nodo(est, norm, cod_sis, cod_lin, nodo):
+        i = id_por_nodo.get(nodo)
+        if i is None:
+            i = id_por_nodo[nodo] = len(nodos)
+            nodos.append(nodo)
+            if norm not in codigo_nombre:
+                codigo_nombre[norm] = len(nombres)
+                nombres.append(norm)
+            nodo_sistema.append(cod_sis); nodo_linea.append(cod_lin)
+            nodo_estacion.append(codigo_nombre[norm])
+        return i
+
+    def anadir_arista(a, b, tiempo, modo):
+        origenes.append(a); destinos.append(b); pesos.append(tiempo); modos.append(modo)
+
+    # Los alias cambian qué estaciones se fusionan bajo un mismo nombre normalizado
+    huella = hashlib.sha1(repr((sorted(tarifas.items()), penalizacion_transbordo,
+                                sorted(estaciones_cerradas), sorted(closed_segments_norm),
+                                sorted(ALIAS_NORMALIZADOS.items()))).encode('utf-8'))
+    if coordenadas:
+        huella.update(repr((radio_transbordo, WALK_SPEED, WALK_DETOUR,
+                            sorted(coordenadas.items()))).encode('utf-8'))
+
+    for nombre_sistema, id_linea, estaciones, tiempos in lineas:
+        huella.update(repr((nombre_sistema, id_linea, list(estaciones), tiempos)).encode('utf-8'))
+        if nombre_sistema not in codigo_sistema:
+            codigo_sistema[nombre_sistema] = len(sistemas)
+            sistemas.append(nombre_sistema)
+        cod_sis = codigo_sistema[nombre_sistema]
+        cod_lin = len(lineas_cod)
+        lineas_cod.append((nombre_sistema, id_linea))
+        if isinstance(tiempos, (int, float)):
+            tiempos = [tiempos] * max(len(estaciones) - 1, 0)
+
+        norms = [normalizar(est) for est in estaciones]
+        ids = [None if norm in estaciones_cerradas
+               else id_nodo(est, norm, cod_sis, cod_lin, (est, nombre_sistema, id_linea))
+               for est, norm in zip(estaciones, norms)]
+
+        # Conectar estaciones contiguas (si no están cerradas)
+        for i in range(len(estaciones)-1):
+            if ids[i] is None or ids[i+1] is None:
+                continue
+            na = norms[i]; nb = norms[i+1]
+            if (na, nb, nombre_sistema) in closed_segments_norm or (na, nb, 'ANY') in closed_segments_norm:
+                continue
+            anadir_arista(ids[i], ids[i+1], tiempos[i], cod_sis)
+            anadir_arista(ids[i+1], ids[i], tiempos[i], cod_sis)
 
     # CREAR TRANSBORDOS AUTOMÁTICOS
     # Conecta nodos que comparten el mismo nombre normalizado
-    indice_por_nombre = defaultdict(list)
-    for nodo in list(nodos):
-        indice_por_nombre[normalizar(nodo[0])].append(nodo)
-
-    for lista_nodos in indice_por_nombre.values():
+    grupos = [[] for _ in nombres]
+    for i, cod in enumerate(nodo_estacion):
+        grupos[cod].append(i)
+    for lista_nodos in grupos:
         if len(lista_nodos) > 1:
             for i in range(len(lista_nodos)):
                 for j in range(i+1, len(lista_nodos)):
                     a = lista_nodos[i]; b = lista_nodos[j]
-                    anadir_arista(a, b, TRANSFER_PENALTY, 'TRANSFER')
-                    anadir_arista(b, a, TRANSFER_PENALTY, 'TRANSFER')
-    
-    # Devolvemos el grafo y el índice (optimización)
-    return grafo, indice_por_nombre
+                    anadir_arista(a, b, penalizacion_transbordo, MODO_TRANSFER)
+                    anadir_arista(b, a, penalizacion_transbordo, MODO_TRANSFER)
+
+    # TRANSBORDOS CAMINANDO
+    # Conecta estaciones distintas a menos de `radio_transbordo` metros
+    # (también une variantes de escritura del mismo lugar sin alias)
+    coords = None
+    if coordenadas:
+        coords = array('d', [math.nan]) * (2 * len(nombres))
+        for nombre, (lat, lon) in coordenadas.items():
+            cod = codigo_nombre.get(normalizar(nombre))
+            if cod is not None:
+                coords[2*cod] = lat; coords[2*cod+1] = lon
+        for cod_a, cod_b, metros in _pares_cercanos(coords, radio_transbordo):
+            tiempo = penalizacion_transbordo + metros * WALK_DETOUR / WALK_SPEED
+            for a in grupos[cod_a]:
+                for b in grupos[cod_b]:
+                    if nodo_linea[a] == nodo_linea[b]:
+                        continue # Dos paradas de la misma línea: se viaja a bordo, no es transbordo
+                    anadir_arista(a, b, tiempo, MODO_TRANSFER)
+                    anadir_arista(b, a, tiempo, MODO_TRANSFER)
+
+    # Ordenar las aristas por nodo de origen (counting sort estable -> CSR)
+    n = len(nodos); m = len(origenes)
+    offsets = array('i', [0]) * (n + 1)
+    for a in origenes:
+        offsets[a+1] += 1
+    for i in range(n):
+        offsets[i+1] += offsets[i]
+    pos = offsets[:-1]
+    csr_destinos = array('i', [0]) * m; csr_pesos = array('d', [0.0]) * m; csr_modos = array('b', [0]) * m
+    for k in range(m):
+        a = origenes[k]; p = pos[a]; pos[a] = p + 1
+        csr_destinos[p] = destinos[k]; csr_pesos[p] = pesos[k]; csr_modos[p] = modos[k]
+
+    return RedCompilada(nodos, sistemas, lineas_cod, nombres, nodo_sistema, nodo_linea,
+                        nodo_estacion, offsets, csr_destinos, csr_pesos, csr_modos,
+                        [tarifas.get(s, 0) for s in sistemas], huella.hexdigest(), coords)
 
 # ---------------------------
-# ALGORITMO DE BÚSQUEDA
+# CONSTRUCCIÓN DEL GRAFO
 # ---------------------------
-def encontrar_ruta_mas_rapida(grafo, indice_por_nombre, origen_nombre, destino_nombre):
-    """
-    Busca la ruta más rápida usando Dijkstra.
-    El 'estado' del algoritmo incluye (nodo_actual, ultimo_sistema)
-    para poder calcular correctamente las tarifas al cambiar de sistema.
+def construir_grafo(estaciones_cerradas=None, tramos_cerrados=None):
     """
+    Construye la red (grafo) a partir de las listas de líneas.
 
-    origen_norm = normalizar(origen_nombre)
-    destino_norm = normalizar(destino_nombre)
-
-    # Optimización: Usar el índice para encontrar nodos de inicio/fin
-    nodos_origen = indice_por_nombre.get(origen_norm, [])
-    nodos_destino = set(indice_por_nombre.get(destino_norm, []))
+    - Cada nodo es un id entero; `grafo.nodos[id]` es (estacion_original, sistema, id_linea)
+    - Las aristas se guardan en arreglos CSR (ver RedCompilada)
 
-    if not nodos_origen:
-        raise ValueError(f"Origen no encontrado: '{origen_nombre}'")
-    if not nodos_destino:
-        raise ValueError(f"Destino no encontrado: '{destino_nombre}'")
-
-    # Estructuras de Dijkstra
-    heap = [] # (tiempo_acumulado, (nodo_actual, last_system))
-    dist = {} # (nodo, last_system) -> mejor_tiempo
-    prev = {} # (nodo, last_system) -> estado_anterior
+    Devuelve (grafo, indice_por_nombre)
+    """
+    grafo = compilar_red(lineas_integradas(), estaciones_cerradas=estaciones_cerradas,
+                         tramos_cerrados=tramos_cerrados, coordenadas=COORDENADAS_ESTACIONES)
+    # Devolvemos el grafo y el índice (optimización)
+    return grafo, grafo.indice_por_nombre
 
-    # Inicializar la cola con todos los posibles nodos de origen
-    for nodo_inicio in nodos_origen:
-        sistema_inicial = nodo_inicio[1] # METRO, METROBUS, etc.
-        estado_inicial = (nodo_inicio, sistema_inicial)
-        dist[estado_inicial] = 0.0
-        prev[estado_inicial] = None
-        heapq.heappush(heap, (0.0, estado_inicial))
+_RED_BASE = None
 
-    mejor_estado_final = None
-    mejor_tiempo = float('inf')
+def red_base():
+    """
+    Devuelve la red completa (sin cierres), compilándola solo la primera vez.
+    La red base no se modifica: los cierres se aplican con `construir_cierres`.
+    """
+    global _RED_BASE
+    if _RED_BASE is None:
+        _RED_BASE, _ = construir_grafo()
+    return _RED_BASE
 
-    # Bucle principal de Dijkstra
-    while heap:
-        tiempo_actual, (nodo_actual, last_system) = heapq.heappop(heap)
+def usar_red_base(red):
+    """Reemplaza la red base (p. ej. por una cargada de un snapshot o de GTFS)."""
+    global _RED_BASE
+    _RED_BASE = red
 
-        if tiempo_actual > dist.get((nodo_actual, last_system), float('inf')):
-            continue # Ruta ya visitada con un tiempo menor
+# ---------------------------
+# CIERRES (CAPA POR CONSULTA)
+# ---------------------------
+class Cierres:
+    """
+    Capa de cierres sobre una red base inmutable: un bytearray de nodos
+    deshabilitados y otro de aristas deshabilitadas (1 = cerrado).
+    """
 
-        # Si llegamos a un nodo destino, es la ruta más corta
-        if nodo_actual in nodos_destino:
-            mejor_estado_final = (nodo_actual, last_system)
-            mejor_tiempo = tiempo_actual
-            break
+    def __init__(self, nodos, aristas):
+        self.nodos = nodos
+        self.aristas = aristas
 
-        # Explorar vecinos
-        for vecino, tiempo_tramo, etiqueta in grafo[nodo_actual]:
-            
-            # Determinar cuál es el "último sistema" después de movernos
-            nuevo_last = vecino[1] if etiqueta == 'TRANSFER' else etiqueta
-            
-            nuevo_estado = (vecino, nuevo_last)
-            nuevo_tiempo = tiempo_actual + tiempo_tramo
+    def __bool__(self):
+        return any(self.nodos) or any(self.aristas)
 
-            if nuevo_tiempo < dist.get(nuevo_estado, float('inf')):
-                dist[nuevo_estado] = nuevo_tiempo
-                prev[nuevo_estado] = (nodo_actual, last_system)
-                heapq.heappush(heap, (nuevo_tiempo, nuevo_estado))
+    def invertidos(self, inversa):
+        """La misma capa con las aristas indexadas como en `inversa` (ver `RedCompilada.invertida`)."""
+        aristas = bytearray(len(self.aristas))
+        for p, e in enumerate(inversa.arista_original):
+            aristas[p] = self.aristas[e]
+        return Cierres(self.nodos, aristas)
 
-    if mejor_estado_final is None:
-        return None # No se encontró ruta
+def construir_cierres(red, estaciones_cerradas=None, tramos_cerrados=None):
+    """
+    Traduce estaciones y tramos cerrados (en los mismos formatos que acepta
+    `construir_grafo`) a una capa Cierres sobre `red`, sin reconstruirla.
+    """
+    nodos = bytearray(len(red))
+    aristas = bytearray(red.num_aristas())
+
+    for s in (estaciones_cerradas or []):
+        if s and s.strip() != '':
+            for i in red.indice_por_nombre.get(normalizar(s), []):
+                nodos[i] = 1
+
+    offsets = red.offsets; destinos = red.destinos; modos = red.modos
+    for na, nb, sistema in _normalizar_tramos(tramos_cerrados):
+        cod_sis = red.codigo_sistema.get(sistema) if sistema != 'ANY' else None
+        if sistema != 'ANY' and cod_sis is None:
+            continue # Sistema desconocido: no coincide con ningún tramo
+        for u in red.indice_por_nombre.get(na, []):
+            for e in range(offsets[u], offsets[u+1]):
+                modo = modos[e]
+                if modo == MODO_TRANSFER or (cod_sis is not None and modo != cod_sis):
+                    continue
+                if red.nombres[red.nodo_estacion[destinos[e]]] == nb:
+                    aristas[e] = 1
 
-    # --- Reconstruir la ruta y calcular costos ---
+    return Cierres(nodos, aristas)
 
-    # 1. Reconstruir ruta (viene en orden: destino -> origen)
-    path_states = []
-    cur = mejor_estado_final
-    while cur is not None:
-        path_states.append(cur[0]) # Solo nos importa el nodo (est, sis, lin)
-        cur = prev.get(cur)
-    
-    ruta_simple = list(reversed(path_states)) # Invertir a: origen -> destino
+# ---------------------------
+# ALGORITMO DE BÚSQUEDA
+# ---------------------------
+def _acumular_estadisticas(estadisticas, inserciones, extracciones, obsoletas, max_heap):
+    """Suma los contadores de una búsqueda a `estadisticas` (para acumular varias)."""
+    for clave, valor in (('inserciones_heap', inserciones), ('extracciones_heap', extracciones),
+                         ('extracciones_obsoletas', obsoletas), ('nodos_fijados', extracciones - obsoletas)):
+        estadisticas[clave] = estadisticas.get(clave, 0) + valor
+    estadisticas['max_heap'] = max(estadisticas.get('max_heap', 0), max_heap)
+    estadisticas['busquedas'] = estadisticas.get('busquedas', 0) + 1
+
+def _dijkstra(red, origenes, es_destino=None, cierres=None, orden=None, estadisticas=None,
+              margen=None):
+    """
+    Dijkstra sobre los arreglos CSR desde un conjunto de nodos origen.
+
+    Entre caminos del mismo tiempo se queda con el más barato: la etiqueta de
+    cada nodo es (tiempo, costo), donde el costo suma la tarifa del sistema
+    de cada nodo en el que se entra desde otro sistema (y la del origen).
+    Como la regla es simétrica, sobre la red invertida da el mismo costo
+    para el camino recorrido al revés.
+
+    Si se da `es_destino` (bytearray indexado por nodo) se detiene en el
+    primer destino extraído del heap; con `margen` (>= 1) sigue fijando nodos
+    hasta que la distancia supera `margen` veces la de ese primer destino
+    (los nodos más lejanos quedan con distancias no definitivas, mayores que
+    ese límite). Los nodos y aristas marcados en
+    `cierres` se ignoran. Si se da la lista `orden`, se le añaden los nodos
+    en el orden en que quedan fijados. Si se da el diccionario
+    `estadisticas`, se le suman los contadores de la búsqueda (inserciones y
+    extracciones del heap, extracciones obsoletas, nodos fijados, tamaño
+    máximo del heap). Devuelve (dist, prev, nodo_final).
+    """
+    offsets = red.offsets; destinos = red.destinos; pesos = red.pesos
+    nodo_sistema = red.nodo_sistema; tarifas = red.tarifas
+    dist = array('d', [INF]) * len(red)
+    costo = array('i', [0]) * len(red)
+    prev = array('i', [-1]) * len(red)
+
+    heap = [] # (tiempo_acumulado, costo_acumulado, nodo)
+    for o in origenes:
+        dist[o] = 0.0
+        costo[o] = tarifas[nodo_sistema[o]]
+        heap.append((0.0, costo[o], o))
+    heapq.heapify(heap)
+
+    heappop = heapq.heappop; heappush = heapq.heappush
+    if cierres:
+        nodo_cerrado = cierres.nodos; arista_cerrada = cierres.aristas
+    else:
+        nodo_cerrado = arista_cerrada = None
+    # Contadores (baratos: solo enteros locales)
+    inserciones = len(heap); extracciones = 0; obsoletas = 0; max_heap = len(heap)
+    nodo_final = None
+    limite = INF
 
-    # 2. Calcular costo (cobrar solo al cambiar de sistema)
+    while heap:
+        if estadisticas is not None and len(heap) > max_heap:
+            max_heap = len(heap)
+        tiempo_actual, costo_actual, u = heappop(heap)
+        extracciones += 1
+        if tiempo_actual > dist[u] or costo_actual > costo[u]:
+            obsoletas += 1
+            continue # Ruta ya visitada con un tiempo (o costo) menor
+        if tiempo_actual > limite:
+            break
+        if orden is not None:
+            orden.append(u)
+        if es_destino is not None and es_destino[u] and nodo_final is None:
+            nodo_final = u
+            if margen is None:
+                break
+            limite = tiempo_actual * margen
+
+        sistema_u = nodo_sistema[u]
+        for e in range(offsets[u], offsets[u+1]):
+            v = destinos[e]
+            if nodo_cerrado is not None and (arista_cerrada[e] or nodo_cerrado[v]):
+                continue
+            nuevo_tiempo = tiempo_actual + pesos[e]
+            if nuevo_tiempo <= dist[v]:
+                nuevo_costo = costo_actual if nodo_sistema[v] == sistema_u else \
+                    costo_actual + tarifas[nodo_sistema[v]]
+                if nuevo_tiempo < dist[v] or nuevo_costo < costo[v]:
+                    dist[v] = nuevo_tiempo
+                    costo[v] = nuevo_costo
+                    prev[v] = u
+                    heappush(heap, (nuevo_tiempo, nuevo_costo, v))
+                    inserciones += 1
+
+    if estadisticas is not None:
+        _acumular_estadisticas(estadisticas, inserciones, extracciones, obsoletas, max_heap)
+    return dist, prev, nodo_final
+
+def _reconstruir_camino(prev, nodo_final):
+    """Sigue los predecesores desde `nodo_final` y devuelve los ids origen -> destino."""
+    camino = []
+    cur = nodo_final
+    while cur != -1:
+        camino.append(cur)
+        cur = prev[cur]
+    camino.reverse()
+    return camino
+
+def _tiempo_camino(red, camino_ids, cierres=None):
+    """Suma los tiempos del camino en orden (igual que los acumula Dijkstra)."""
+    arista_cerrada = cierres.aristas if cierres else None
+    tiempo = 0.0
+    for u, v in zip(camino_ids, camino_ids[1:]):
+        tiempo += min(red.pesos[e] for e in range(red.offsets[u], red.offsets[u+1])
+                      if red.destinos[e] == v and not (arista_cerrada and arista_cerrada[e]))
+    return tiempo
+
+def _construir_resultado(red, camino_ids, tiempo):
+    """Calcula costo y segmentos de un camino de ids y arma el diccionario de resultado."""
+    ruta_simple = [red.nodos[i] for i in camino_ids]
+
+    # 1. Calcular costo (cobrar solo al cambiar de sistema)
     costo_total = 0
     sistema_previo = None
-    tarifas = {'METRO': FARE_METRO, 'METROBUS': FARE_METROBUS, 'TROLEBUS': FARE_TROLEBUS}
-    
-    for nodo in ruta_simple:
-        sistema_actual = nodo[1]
+    for i in camino_ids:
+        sistema_actual = red.nodo_sistema[i]
         if sistema_actual != sistema_previo:
-            costo_total += tarifas.get(sistema_actual, 0)
+            costo_total += red.tarifas[sistema_actual]
             sistema_previo = sistema_actual
 
-    # 3. Agrupar en segmentos (tramos continuos en la misma línea)
+    return {
+        "tiempo_min": round(tiempo, 2),
+        "segmentos": _agrupar_segmentos(ruta_simple),
+        "camino_completo": ruta_simple,
+        "costo_mxn": costo_total
+    }
+
+def _agrupar_segmentos(ruta_simple):
+    """Agrupa un camino de nodos (est, sis, lin) en segmentos continuos en la misma línea."""
     segmentos = []
     if ruta_simple:
         cur_sys, cur_line = ruta_simple[0][1], ruta_simple[0][2]
         estaciones_segmento = [ruta_simple[0][0]]
-        
-        for estacion, sys, linea in ruta_simple[1:]:
-            if sys == cur_sys and linea == cur_line:
+
+        for estacion, sistema, linea in ruta_simple[1:]:
+            if sistema == cur_sys and linea == cur_line:
                 estaciones_segmento.append(estacion)
             else:
                 segmentos.append({"sistema": cur_sys, "linea": cur_line, "estaciones": estaciones_segmento})
-                cur_sys, cur_line = sys, linea
+                cur_sys, cur_line = sistema, linea
                 estaciones_segmento = [estacion]
-        
+
         segmentos.append({"sistema": cur_sys, "linea": cur_line, "estaciones": estaciones_segmento})
 
-    return {
-        "tiempo_min": round(mejor_tiempo, 2),
-        "segmentos": segmentos,
-        "camino_completo": ruta_simple,
-        "costo_mxn": costo_total
-    }
+    return segmentos
+
+def encontrar_ruta_mas_rapida(grafo, indice_por_nombre, origen_nombre, destino_nombre, cierres=None,
+                              estadisticas=None):
+    """
+    Busca la ruta más rápida usando Dijkstra.
+    `cierres` (opcional) es una capa de `construir_cierres` sobre `grafo`.
+    `estadisticas` (opcional) es un diccionario donde se acumulan los
+    contadores de la búsqueda (ver `_dijkstra`).
+    El 'estado' del algoritmo original era (nodo_actual, ultimo_sistema) para
+    calcular las tarifas; como cada nodo compilado pertenece a un único
+    sistema, el último sistema queda determinado por el nodo y el estado
+    se reduce al id entero del nodo.
+    """
+
+    origen_norm = normalizar(origen_nombre)
+    destino_norm = normalizar(destino_nombre)
+
+    # Optimización: Usar el índice para encontrar nodos de inicio/fin
+    nodos_origen = indice_por_nombre.get(origen_norm, [])
+    nodos_destino = indice_por_nombre.get(destino_norm, [])
+    if cierres:
+        nodos_origen = [i for i in nodos_origen if not cierres.nodos[i]]
+        nodos_destino = [i for i in nodos_destino if not cierres.nodos[i]]
+
+    if not nodos_origen:
+        raise ValueError(f"Origen no encontrado: '{origen_nombre}'")
+    if not nodos_destino:
+        raise ValueError(f"Destino no encontrado: '{destino_nombre}'")
+
+    es_destino = bytearray(len(grafo))
+    for d in nodos_destino:
+        es_destino[d] = 1
+
+    dist, prev, nodo_final = _dijkstra(grafo, nodos_origen, es_destino, cierres, estadisticas=estadisticas)
+    if nodo_final is None:
+        return None # No se encontró ruta
+
+    return _construir_resultado(grafo, _reconstruir_camino(prev, nodo_final), dist[nodo_final])
 
 # ---------------------------
 # FUNCIONES DE INTERFAZ (Input/Output)
@@ -268,9 +659,18 @@ def imprimir_ruta(route_info, origen, destino):
     # Opcional: Mostrar camino completo si no es gigante
     if len(route_info['camino_completo']) <= MAX_DISPLAY:
         print("\nCamino completo (Estación (Sistema-Línea)):")
-        camino_str = "  →  ".join([f"{est} ({sys}-{ln})" for (est, sys, ln) in route_info['camino_completo']])
+        camino_str = "  →  ".join([f"{est} ({sistema}-{ln})" for (est, sistema, ln) in route_info['camino_completo']])
         print("  " + camino_str)
 
+def imprimir_alternativas(alternativas):
+    """Muestra en una línea por ruta las alternativas (ver rutas_alternativas.py)."""
+    if not alternativas:
+        return
+    print("\n--- Alternativas ---")
+    for n, ruta in enumerate(alternativas, 1):
+        lineas = " → ".join(f"{seg['sistema']} {seg['linea']}" for seg in ruta['segmentos'])
+        print(f"  {n}. {ruta['tiempo_min']} min, ${ruta['costo_mxn']} MXN: {lineas}")
+
 def parsear_tramos_cerrados(raw: str):
     """
     Convierte un string de tramos (ej: "A-B, C-D:METRO")
@@ -294,10 +694,24 @@ def parsear_tramos_cerrados(raw: str):
             out.append((a.strip(), b.strip(), system_tag))
     return out
 
+def _nombre_corregido(indice, texto):
+    """Devuelve el nombre de estación más parecido a `texto` (o `texto` si no hay)."""
+    clave = indice.resolver(texto)
+    if clave is None or clave == normalizar(texto):
+        return texto
+    nombre = indice.nombre(clave)
+    print(f"Usando '{nombre}' para '{texto}'")
+    return nombre
+
 # ---------------------------
 # PROGRAMA PRINCIPAL
 # ---------------------------
 def main():
+    # Opcional: arrancar desde un snapshot binario (ver snapshot_red.py)
+    if len(sys.argv) > 1:
+        from snapshot_red import cargar_snapshot
+        usar_red_base(cargar_snapshot(sys.argv[1]))
+
     print("=== Router CDMX: Metro + Metrobús + Trolebús ===")
     origen = input("Estación de origen: ").strip()
     destino = input("Estación de destino: ").strip()
@@ -309,15 +723,27 @@ def main():
     tramos_cerrados = parsear_tramos_cerrados(closed_segs_raw)
 
     try:
-        # Optimización: construir_grafo devuelve también el índice
+        # Optimización: la red base se compila una sola vez y los cierres
+        # se aplican como una capa por consulta
         print("\nCalculando ruta...")
-        grafo, indice_nombres = construir_grafo(estaciones_cerradas, tramos_cerrados)
-        
+        grafo = red_base()
+        cierres = construir_cierres(grafo, estaciones_cerradas, tramos_cerrados)
+
+        # Corregir errores de escritura (ej. "Pantitlna" -> "Pantitlán")
+        from indice_nombres import IndiceNombres
+        indice = IndiceNombres(grafo)
+        origen, destino = (_nombre_corregido(indice, origen), _nombre_corregido(indice, destino))
+
         # Optimización: pasar el índice a la búsqueda
-        info_ruta = encontrar_ruta_mas_rapida(grafo, indice_nombres, origen, destino)
+        info_ruta = encontrar_ruta_mas_rapida(grafo, grafo.indice_por_nombre, origen, destino, cierres)
         
         imprimir_ruta(info_ruta, origen, destino)
 
+        # Hasta dos alternativas que no repitan casi la misma ruta
+        if info_ruta is not None:
+            from rutas_alternativas import rutas_alternativas
+            imprimir_alternativas(rutas_alternativas(origen, destino, 3, grafo, cierres)[1:])
+
     except ValueError as ve:
         print(f"Error: {ve}")
     except Exception as e:
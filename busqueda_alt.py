@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+busqueda_alt.py
+
+Búsqueda dirigida al destino: A* con cotas por landmarks (ALT = A*,
+Landmarks, desigualdad del Triángulo), en versión unidireccional y
+bidireccional.
+
+Preprocesamiento:
+ - Se eligen unas pocas estaciones "landmark" lejanas entre sí (cada nueva
+   es el nodo más alejado de las ya elegidas).
+ - Para cada landmark L se guardan d(L, v) y d(v, L) para todos los nodos en
+   arreglos planos `array('d')`. Si la red es simétrica (cada tramo y
+   transbordo tiene su arista inversa con el mismo tiempo, como en la red
+   integrada) ambas tablas son la misma y se guarda una sola.
+
+Consulta: por la desigualdad del triángulo,
+    d(v, t) >= d(L, t) - d(L, v)   y   d(v, t) >= d(v, L) - d(t, L)
+y el máximo sobre los landmarks es una cota inferior consistente. Con ella
+A* fija los mismos tiempos que Dijkstra (incluido TRANSFER_PENALTY, que es
+una arista más) pero explora mucho menos hacia el lado contrario al
+destino. Igual que `_dijkstra`, las etiquetas son (tiempo, costo) y entre
+caminos del mismo tiempo se queda con el más barato, así que también la
+tarifa coincide. Con tiempos decimales dos caminos "del mismo tiempo"
+pueden diferir en el último bit según el orden de la suma; la versión
+bidireccional suma cada mitad por separado y en esos casos (raros) puede
+elegir la otra tarifa. Con tiempos exactos en binario (minutos enteros o
+medios, como en la red integrada) coincide siempre. Los cierres solo alargan caminos, así que las cotas calculadas
+sobre la red sin cierres siguen siendo válidas con ellos.
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import heapq
+import random
+from array import array
+
+from buscador_rutas import (
+    red_base, normalizar, encontrar_ruta_mas_rapida, _dijkstra, _reconstruir_camino,
+    _construir_resultado, _tiempo_camino, _acumular_estadisticas, INF
+)
+
+# Número de landmarks por defecto
+NUM_LANDMARKS = 8
+# Valor que sustituye a INF en las tablas (nodo inalcanzable desde / hacia el
+# landmark): mantiene las restas finitas y la cota sigue siendo válida
+SIN_RUTA = 1e12
+# Holgura relativa al detenerse: con tiempos decimales la suma tiempo + cota
+# se redondea distinto según el camino, y un empate de tiempo más barato
+# podría quedar apenas detrás del primer destino en el heap
+HOLGURA = 1e-9
+
+# ---------------------------
+# PREPROCESAMIENTO
+# ---------------------------
+def _tabla(dist):
+    return array('d', (SIN_RUTA if d == INF else d for d in dist))
+
+def _costo_camino(red, camino):
+    """Tarifa de un camino de ids: se cobra al entrar a cada sistema."""
+    costo = 0; sistema_previo = None
+    for i in camino:
+        if red.nodo_sistema[i] != sistema_previo:
+            sistema_previo = red.nodo_sistema[i]
+            costo += red.tarifas[sistema_previo]
+    return costo
+
+def _es_simetrica(red):
+    """True si cada arista u -> v tiene su inversa v -> u con el mismo tiempo."""
+    offsets = red.offsets; destinos = red.destinos; pesos = red.pesos
+    aristas = set()
+    for u in range(len(red)):
+        for e in range(offsets[u], offsets[u+1]):
+            aristas.add((u, destinos[e], pesos[e]))
+    return all((v, u, p) in aristas for u, v, p in aristas)
+
+class IndiceALT:
+    """
+    Tablas de distancias a landmarks sobre una RedCompilada y consultas A*.
+
+    - `encontrar_ruta(origen, destino)`: A* unidireccional
+    - `encontrar_ruta(origen, destino, bidireccional=True)`: A* bidireccional
+      con potencial promedio
+    """
+
+    def __init__(self, red=None, num_landmarks=NUM_LANDMARKS, semilla=0):
+        red = red if red is not None else red_base()
+        self.red = red
+        self.inversa = red.invertida()
+        self.simetrica = _es_simetrica(red)
+        self.landmarks = self._elegir_landmarks(num_landmarks, semilla)
+
+        self.desde = []   # desde[k][v] = d(landmark_k, v)
+        self.hacia = []   # hacia[k][v] = d(v, landmark_k)
+        for l in self.landmarks:
+            desde = _tabla(_dijkstra(red, [l])[0])
+            self.desde.append(desde)
+            self.hacia.append(desde if self.simetrica else _tabla(_dijkstra(self.inversa, [l])[0]))
+
+    def _elegir_landmarks(self, cantidad, semilla):
+        """Selección por lejanía: cada landmark es el nodo más alejado de los anteriores."""
+        red = self.red
+        if not len(red):
+            return []
+        inicial = random.Random(semilla).randrange(len(red))
+        elegidos = []
+        fuentes = [inicial]
+        for _ in range(min(cantidad, len(red))):
+            dist = _dijkstra(red, fuentes)[0]
+            lejano = max((v for v in range(len(red)) if dist[v] < INF and v not in elegidos),
+                         key=dist.__getitem__, default=None)
+            if lejano is None:
+                break
+            elegidos.append(lejano)
+            fuentes = elegidos
+        return elegidos
+
+    def tamano_bytes(self):
+        """Memoria ocupada por las tablas de landmarks."""
+        tablas = {id(t): t for t in self.desde + self.hacia}
+        return sum(t.itemsize * len(t) for t in tablas.values())
+
+    # ---------------------------
+    # COTAS
+    # ---------------------------
+    def _cota(self, nodos, hacia_nodos):
+        """
+        Devuelve h(v): cota inferior de la distancia de v al conjunto `nodos`
+        (si `hacia_nodos`) o del conjunto `nodos` a v (si no).
+        """
+        terminos = []
+        for desde, hacia in zip(self.desde, self.hacia):
+            if hacia_nodos:
+                # d(v, T) >= min d(L, t) - d(L, v)   y   d(v, T) >= d(v, L) - max d(t, L)
+                terminos.append((desde, min(desde[t] for t in nodos), hacia, max(hacia[t] for t in nodos)))
+            else:
+                # d(S, v) >= min d(s, L) - d(v, L)   y   d(S, v) >= d(L, v) - max d(L, s)
+                terminos.append((hacia, min(hacia[s] for s in nodos), desde, max(desde[s] for s in nodos)))
+
+        def h(v):
+            mejor = 0.0
+            for tabla_a, a, tabla_b, b in terminos:
+                c = a - tabla_a[v]
+                if c > mejor:
+                    mejor = c
+                c = tabla_b[v] - b
+                if c > mejor:
+                    mejor = c
+            return mejor
+        return h
+
+    # ---------------------------
+    # CONSULTA
+    # ---------------------------
+    def encontrar_ruta(self, origen_nombre, destino_nombre, cierres=None, bidireccional=False,
+                       estadisticas=None):
+        """
+        Ruta más rápida entre dos estaciones con A* sobre las cotas de los
+        landmarks. Devuelve el mismo diccionario que
+        `encontrar_ruta_mas_rapida` (con el mismo tiempo y costo), o None si
+        no hay ruta. `cierres` y `estadisticas` funcionan igual que en
+        `encontrar_ruta_mas_rapida`.
+        """
+        red = self.red
+        nodos_origen = red.indice_por_nombre.get(normalizar(origen_nombre), [])
+        nodos_destino = red.indice_por_nombre.get(normalizar(destino_nombre), [])
+        if cierres:
+            nodos_origen = [i for i in nodos_origen if not cierres.nodos[i]]
+            nodos_destino = [i for i in nodos_destino if not cierres.nodos[i]]
+        if not nodos_origen:
+            raise ValueError(f"Origen no encontrado: '{origen_nombre}'")
+        if not nodos_destino:
+            raise ValueError(f"Destino no encontrado: '{destino_nombre}'")
+
+        if bidireccional:
+            camino = self._a_estrella_bidireccional(nodos_origen, nodos_destino, cierres, estadisticas)
+        else:
+            camino = self._a_estrella(nodos_origen, nodos_destino, cierres, estadisticas)
+        if camino is None:
+            return None
+        return _construir_resultado(red, camino, _tiempo_camino(red, camino, cierres))
+
+    def _a_estrella(self, nodos_origen, nodos_destino, cierres, estadisticas):
+        red = self.red
+        offsets = red.offsets; destinos = red.destinos; pesos = red.pesos
+        nodo_sistema = red.nodo_sistema; tarifas = red.tarifas
+        nodo_cerrado = cierres.nodos if cierres else None
+        arista_cerrada = cierres.aristas if cierres else None
+        h = self._cota(nodos_destino, hacia_nodos=True)
+        es_destino = bytearray(len(red))
+        for d in nodos_destino:
+            es_destino[d] = 1
+
+        dist = array('d', [INF]) * len(red)
+        costo = array('i', [0]) * len(red)
+        prev = array('i', [-1]) * len(red)
+        heap = [] # (tiempo + cota, costo, tiempo, nodo)
+        for o in nodos_origen:
+            dist[o] = 0.0
+            costo[o] = tarifas[nodo_sistema[o]]
+            heap.append((h(o), costo[o], 0.0, o))
+        heapq.heapify(heap)
+        heappop = heapq.heappop; heappush = heapq.heappush
+
+        inserciones = len(heap); extracciones = 0; obsoletas = 0; max_heap = len(heap)
+        nodo_final = None
+        limite = INF
+        while heap:
+            if len(heap) > max_heap:
+                max_heap = len(heap)
+            clave, costo_actual, tiempo_actual, u = heappop(heap)
+            if clave > limite:
+                break
+            extracciones += 1
+            if tiempo_actual > dist[u] or costo_actual > costo[u]:
+                obsoletas += 1
+                continue
+            if es_destino[u]:
+                # Sigue hasta agotar las claves empatadas (con holgura) por
+                # si otro destino llega con el mismo tiempo y menor costo
+                if nodo_final is None or (tiempo_actual, costo_actual) < (dist[nodo_final],
+                                                                          costo[nodo_final]):
+                    nodo_final = u
+                    limite = tiempo_actual * (1.0 + HOLGURA) + HOLGURA
+                continue
+            sistema_u = nodo_sistema[u]
+            for e in range(offsets[u], offsets[u+1]):
+                v = destinos[e]
+                if nodo_cerrado is not None and (arista_cerrada[e] or nodo_cerrado[v]):
+                    continue
+                nuevo_tiempo = tiempo_actual + pesos[e]
+                if nuevo_tiempo <= dist[v]:
+                    nuevo_costo = costo_actual if nodo_sistema[v] == sistema_u else \
+                        costo_actual + tarifas[nodo_sistema[v]]
+                    if nuevo_tiempo < dist[v] or nuevo_costo < costo[v]:
+                        dist[v] = nuevo_tiempo
+                        costo[v] = nuevo_costo
+                        prev[v] = u
+                        heappush(heap, (nuevo_tiempo + h(v), nuevo_costo, nuevo_tiempo, v))
+                        inserciones += 1
+
+        if estadisticas is not None:
+            _acumular_estadisticas(estadisticas, inserciones, extracciones, obsoletas, max_heap)
+        return None if nodo_final is None else _reconstruir_camino(prev, nodo_final)
+
+    def _a_estrella_bidireccional(self, nodos_origen, nodos_destino, cierres, estadisticas):
+        """
+        A* bidireccional con potencial promedio p(v) = (h_t(v) - h_s(v)) / 2:
+        la búsqueda hacia adelante usa p y la de atrás -p, ambas consistentes,
+        así que basta detenerse cuando la suma de los mínimos de los dos heaps
+        supera al mejor camino encontrado (si solo lo iguala aún puede
+        aparecer uno del mismo tiempo y más barato).
+
+        El costo de atrás cuenta las tarifas desde el nodo hasta el destino,
+        incluida la del sistema del nodo; al unir las dos mitades en v esa
+        tarifa se cobra una sola vez. Como la suma de las dos mitades se
+        redondea distinto que la del camino completo, se guardan todos los
+        encuentros empatados (con holgura) y al final gana el de menor
+        (tiempo, costo) sumado de origen a destino, como en `_dijkstra`.
+        """
+        red = self.red; inversa = self.inversa
+        nodo_sistema = red.nodo_sistema; tarifas = red.tarifas
+        n = len(red)
+        nodo_cerrado = cierres.nodos if cierres else None
+        arista_cerrada = cierres.aristas if cierres else None
+        h_t = self._cota(nodos_destino, hacia_nodos=True)
+        h_s = self._cota(nodos_origen, hacia_nodos=False)
+        potencial = {}
+        def p(v):
+            valor = potencial.get(v)
+            if valor is None:
+                valor = potencial[v] = (h_t(v) - h_s(v)) / 2.0
+            return valor
+
+        dist = (array('d', [INF]) * n, array('d', [INF]) * n)
+        costo = (array('i', [0]) * n, array('i', [0]) * n)
+        prev = (array('i', [-1]) * n, array('i', [-1]) * n)   # en la de atrás: siguiente nodo hacia el destino
+        signo = (1.0, -1.0)
+        heaps = ([], [])   # (tiempo + potencial, costo, tiempo, nodo)
+        for lado, iniciales in ((0, nodos_origen), (1, nodos_destino)):
+            for u in iniciales:
+                dist[lado][u] = 0.0
+                costo[lado][u] = tarifas[nodo_sistema[u]]
+                heaps[lado].append((signo[lado] * p(u), costo[lado][u], 0.0, u))
+            heapq.heapify(heaps[lado])
+        csr = ((red.offsets, red.destinos, red.pesos, None),
+               (inversa.offsets, inversa.destinos, inversa.pesos, inversa.arista_original))
+
+        mejor = (INF, 0); encuentros = []   # [(tiempo, nodo)] candidatos a mejor camino
+        for u in nodos_origen:
+            if dist[1][u] == 0.0:
+                encuentros.append((0.0, u))
+                mejor = min(mejor, (0.0, costo[0][u]))
+
+        inserciones = len(heaps[0]) + len(heaps[1]); extracciones = 0; obsoletas = 0
+        max_heap = inserciones
+        while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] <= mejor[0] * (1.0 + HOLGURA) + HOLGURA:
+            if len(heaps[0]) + len(heaps[1]) > max_heap:
+                max_heap = len(heaps[0]) + len(heaps[1])
+            lado = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            _, costo_actual, tiempo_actual, u = heapq.heappop(heaps[lado])
+            extracciones += 1
+            d = dist[lado]; c = costo[lado]; otra = dist[1-lado]; otro_costo = costo[1-lado]
+            if tiempo_actual > d[u] or costo_actual > c[u]:
+                obsoletas += 1
+                continue
+
+            offsets, destinos, pesos, original = csr[lado]
+            sistema_u = nodo_sistema[u]
+            for e in range(offsets[u], offsets[u+1]):
+                v = destinos[e]
+                if nodo_cerrado is not None and (nodo_cerrado[v] or
+                                                 arista_cerrada[e if original is None else original[e]]):
+                    continue
+                nuevo_tiempo = tiempo_actual + pesos[e]
+                if nuevo_tiempo <= d[v]:
+                    nuevo_costo = costo_actual if nodo_sistema[v] == sistema_u else \
+                        costo_actual + tarifas[nodo_sistema[v]]
+                    if nuevo_tiempo < d[v] or nuevo_costo < c[v]:
+                        d[v] = nuevo_tiempo
+                        c[v] = nuevo_costo
+                        prev[lado][v] = u
+                        heapq.heappush(heaps[lado], (nuevo_tiempo + signo[lado] * p(v), nuevo_costo,
+                                                     nuevo_tiempo, v))
+                        inserciones += 1
+                        total = (nuevo_tiempo + otra[v],
+                                 nuevo_costo + otro_costo[v] - tarifas[nodo_sistema[v]])
+                        if total[0] < INF and total[0] <= mejor[0] * (1.0 + HOLGURA) + HOLGURA:
+                            encuentros.append((total[0], v))
+                            if total < mejor:
+                                mejor = total
+
+        if estadisticas is not None:
+            _acumular_estadisticas(estadisticas, inserciones, extracciones, obsoletas, max_heap)
+        limite = mejor[0] * (1.0 + HOLGURA) + HOLGURA
+        elegido = None
+        for tiempo, encuentro in encuentros:
+            if tiempo > limite:
+                continue
+            camino = _reconstruir_camino(prev[0], encuentro)
+            u = prev[1][encuentro]
+            while u != -1:
+                camino.append(u); u = prev[1][u]
+            clave = (_tiempo_camino(red, camino, cierres), _costo_camino(red, camino))
+            if elegido is None or clave < elegido[0]:
+                elegido = (clave, camino)
+        return None if elegido is None else elegido[1]
+
+# ---------------------------
+# VERIFICACIÓN
+# ---------------------------
+def verificar_contra_dijkstra(indice, consultas=1000, semilla=0, cierres=None):
+    """
+    Compara tiempo y costo de ALT (uni y bidireccional) contra
+    `encontrar_ruta_mas_rapida` en pares de estaciones aleatorios. Devuelve
+    la lista de discrepancias [(origen, destino, modo, esperado, obtenido)],
+    donde esperado y obtenido son (tiempo_min, costo_mxn) o None.
+    """
+    red = indice.red
+    nombres = [n for n, ids in red.indice_por_nombre.items()
+               if not cierres or any(not cierres.nodos[i] for i in ids)]
+    aleatorio = random.Random(semilla)
+    discrepancias = []
+    for _ in range(consultas):
+        origen = aleatorio.choice(nombres); destino = aleatorio.choice(nombres)
+        esperada = encontrar_ruta_mas_rapida(red, red.indice_por_nombre, origen, destino, cierres)
+        t_esperado = (esperada["tiempo_min"], esperada["costo_mxn"]) if esperada else None
+        for modo, bidireccional in (('alt', False), ('alt_bidireccional', True)):
+            obtenida = indice.encontrar_ruta(origen, destino, cierres, bidireccional)
+            t_obtenido = (obtenida["tiempo_min"], obtenida["costo_mxn"]) if obtenida else None
+            if t_esperado != t_obtenido:
+                discrepancias.append((origen, destino, modo, t_esperado, t_obtenido))
+    return discrepancias
+
+if __name__ == "__main__":
+    indice = IndiceALT()
+    discrepancias = verificar_contra_dijkstra(indice, 500)
+    print(f"{len(indice.landmarks)} landmarks, {indice.tamano_bytes() / 1024:.0f} KB, "
+          f"{len(discrepancias)} discrepancias en 500 consultas")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+busqueda_pareto.py
+
+Búsqueda multicriterio (tiempo, tarifa, transbordos) en una sola pasada.
+
+Es un algoritmo de fijación de etiquetas (label-setting): cada etiqueta
+guarda (tiempo, costo, transbordos) y cada nodo conserva solo su conjunto de
+Pareto, es decir, las etiquetas que ninguna otra supera o iguala en los tres
+criterios. Las etiquetas se procesan por tiempo creciente, así que una
+etiqueta extraída del heap que no está dominada ya es definitiva.
+
+La tarifa se cobra igual que en `encontrar_ruta_mas_rapida` (al entrar a un
+sistema distinto del anterior, con FARE_METRO / FARE_METROBUS /
+FARE_TROLEBUS) y un transbordo es cualquier cambio de línea.
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import heapq
+
+from buscador_rutas import red_base, normalizar, _construir_resultado
+
+# ---------------------------
+# CONJUNTOS DE PARETO
+# ---------------------------
+def _dominada(conjunto, tiempo, costo, transbordos):
+    """True si alguna etiqueta de `conjunto` es igual o mejor en los tres criterios."""
+    for t, c, x, _ in conjunto:
+        if t <= tiempo and c <= costo and x <= transbordos:
+            return True
+    return False
+
+def _insertar(conjunto, tiempo, costo, transbordos, id_etiqueta):
+    """Añade la etiqueta y descarta las que ahora quedan dominadas por ella."""
+    conjunto[:] = [e for e in conjunto
+                   if not (tiempo <= e[0] and costo <= e[1] and transbordos <= e[2])]
+    conjunto.append((tiempo, costo, transbordos, id_etiqueta))
+
+# ---------------------------
+# BÚSQUEDA
+# ---------------------------
+def frente_pareto(origen_nombre, destino_nombre, red=None, cierres=None,
+                  max_costo=None, max_transbordos=None, max_tiempo=None):
+    """
+    Devuelve todas las rutas no dominadas en (tiempo, costo, transbordos),
+    ordenadas por tiempo. Cada una tiene la forma del resultado de
+    `encontrar_ruta_mas_rapida` más la llave "transbordos".
+
+    Los límites opcionales `max_costo`, `max_transbordos` y `max_tiempo`
+    descartan etiquetas en cuanto los exceden.
+    """
+    red = red if red is not None else red_base()
+    nodos_origen = red.indice_por_nombre.get(normalizar(origen_nombre), [])
+    nodos_destino = red.indice_por_nombre.get(normalizar(destino_nombre), [])
+    if cierres:
+        nodos_origen = [i for i in nodos_origen if not cierres.nodos[i]]
+        nodos_destino = [i for i in nodos_destino if not cierres.nodos[i]]
+    if not nodos_origen:
+        raise ValueError(f"Origen no encontrado: '{origen_nombre}'")
+    if not nodos_destino:
+        raise ValueError(f"Destino no encontrado: '{destino_nombre}'")
+
+    max_costo = float('inf') if max_costo is None else max_costo
+    max_transbordos = float('inf') if max_transbordos is None else max_transbordos
+    max_tiempo = float('inf') if max_tiempo is None else max_tiempo
+
+    offsets = red.offsets; destinos = red.destinos; pesos = red.pesos
+    nodo_sistema = red.nodo_sistema; nodo_linea = red.nodo_linea; tarifas = red.tarifas
+    nodo_cerrado = cierres.nodos if cierres else None
+    arista_cerrada = cierres.aristas if cierres else None
+
+    es_destino = bytearray(len(red))
+    for d in nodos_destino:
+        es_destino[d] = 1
+
+    # Etiquetas en arreglos paralelos: nodo y etiqueta previa (para reconstruir)
+    etiqueta_nodo = []; etiqueta_prev = []
+    fijadas = [[] for _ in range(len(red))]   # conjunto de Pareto definitivo por nodo
+    frente = []                               # conjunto de Pareto del destino (todas sus estaciones)
+    heap = []
+
+    for o in nodos_origen:
+        costo = tarifas[nodo_sistema[o]]
+        if costo <= max_costo:
+            etiqueta_nodo.append(o); etiqueta_prev.append(-1)
+            heapq.heappush(heap, (0.0, costo, 0, len(etiqueta_nodo) - 1))
+
+    while heap:
+        tiempo, costo, transbordos, k = heapq.heappop(heap)
+        u = etiqueta_nodo[k]
+        # Poda: dominada en el nodo o por una ruta ya encontrada al destino
+        if _dominada(fijadas[u], tiempo, costo, transbordos) or _dominada(frente, tiempo, costo, transbordos):
+            continue
+        _insertar(fijadas[u], tiempo, costo, transbordos, k)
+        if es_destino[u]:
+            _insertar(frente, tiempo, costo, transbordos, k)
+            continue
+
+        for e in range(offsets[u], offsets[u+1]):
+            v = destinos[e]
+            if nodo_cerrado is not None and (arista_cerrada[e] or nodo_cerrado[v]):
+                continue
+            nuevo_tiempo = tiempo + pesos[e]
+            nuevo_costo = costo + (tarifas[nodo_sistema[v]] if nodo_sistema[v] != nodo_sistema[u] else 0)
+            nuevos_transbordos = transbordos + (nodo_linea[v] != nodo_linea[u])
+            if (nuevo_tiempo > max_tiempo or nuevo_costo > max_costo
+                    or nuevos_transbordos > max_transbordos):
+                continue
+            if _dominada(fijadas[v], nuevo_tiempo, nuevo_costo, nuevos_transbordos):
+                continue
+            etiqueta_nodo.append(v); etiqueta_prev.append(k)
+            heapq.heappush(heap, (nuevo_tiempo, nuevo_costo, nuevos_transbordos, len(etiqueta_nodo) - 1))
+
+    rutas = []
+    for tiempo, costo, transbordos, k in sorted(frente):
+        camino = []
+        while k != -1:
+            camino.append(etiqueta_nodo[k]); k = etiqueta_prev[k]
+        camino.reverse()
+        resultado = _construir_resultado(red, camino, tiempo)
+        resultado["transbordos"] = transbordos
+        rutas.append(resultado)
+    return rutas
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cache_rutas.py
+
+Caché acotada de resultados de `encontrar_ruta_mas_rapida`.
+
+La llave combina la huella de la red (líneas, tiempos y tarifas con que se
+compiló), el origen y destino normalizados y una huella canónica de las
+estaciones y tramos cerrados. Si la red cambia de huella, todas las
+entradas anteriores se descartan. El desalojo es LRU con caducidad (TTL)
+opcional, y se llevan contadores de aciertos y fallos para dimensionarla.
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import threading
+import time
+from collections import OrderedDict
+
+from buscador_rutas import (
+    red_base, normalizar, _normalizar_tramos, construir_cierres,
+    encontrar_ruta_mas_rapida
+)
+
+# ---------------------------
+# HUELLA DE CIERRES
+# ---------------------------
+def huella_cierres(estaciones_cerradas=None, tramos_cerrados=None):
+    """
+    Representación canónica (hashable) de un conjunto de cierres: no depende
+    del orden, de mayúsculas/acentos de escritura libre ni del sentido de
+    los tramos.
+    """
+    estaciones = tuple(sorted(set(normalizar(s) for s in (estaciones_cerradas or []) if s and s.strip() != '')))
+    tramos = tuple(sorted(set((min(a, b), max(a, b), sys) for a, b, sys in _normalizar_tramos(tramos_cerrados))))
+    return estaciones, tramos
+
+# ---------------------------
+# CACHÉ
+# ---------------------------
+class CacheRutas:
+    """
+    Caché LRU de rutas con caducidad opcional.
+
+    - `capacidad`: número máximo de rutas guardadas.
+    - `ttl`: segundos de vida de cada entrada (None = sin caducidad).
+
+    Los resultados se comparten entre quienes consultan la misma ruta, así
+    que no deben modificarse.
+    """
+
+    def __init__(self, capacidad=1024, ttl=None, reloj=time.monotonic):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._reloj = reloj
+        self._entradas = OrderedDict() # llave -> (instante, resultado)
+        self._huella_red = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expirados = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def _obtener(self, llave, huella_red):
+        with self._lock:
+            if huella_red != self._huella_red:
+                # La red cambió (datos, tiempos o tarifas): todo lo guardado es obsoleto
+                if self._entradas:
+                    self.invalidaciones += 1
+                self._entradas.clear()
+                self._huella_red = huella_red
+
+            entrada = self._entradas.get(llave)
+            if entrada is not None:
+                if self.ttl is not None and self._reloj() - entrada[0] > self.ttl:
+                    del self._entradas[llave]
+                    self.expirados += 1
+                else:
+                    self._entradas.move_to_end(llave)
+                    self.aciertos += 1
+                    return True, entrada[1]
+            self.fallos += 1
+            return False, None
+
+    def _guardar(self, llave, huella_red, resultado):
+        with self._lock:
+            if huella_red != self._huella_red:
+                return
+            self._entradas[llave] = (self._reloj(), resultado)
+            self._entradas.move_to_end(llave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def buscar(self, origen_nombre, destino_nombre, estaciones_cerradas=None,
+               tramos_cerrados=None, red=None):
+        """
+        Igual que `encontrar_ruta_mas_rapida` sobre `red` (por defecto la red
+        base) con los cierres dados, pero reutilizando resultados previos.
+        Los errores (ValueError) no se guardan.
+        """
+        red = red if red is not None else red_base()
+        llave = (normalizar(origen_nombre), normalizar(destino_nombre),
+                 huella_cierres(estaciones_cerradas, tramos_cerrados))
+
+        encontrado, resultado = self._obtener(llave, red.huella)
+        if encontrado:
+            return resultado
+
+        cierres = construir_cierres(red, estaciones_cerradas, tramos_cerrados)
+        resultado = encontrar_ruta_mas_rapida(red, red.indice_por_nombre,
+                                              origen_nombre, destino_nombre, cierres)
+        self._guardar(llave, red.huella, resultado)
+        return resultado
+
+    def estadisticas(self):
+        """Contadores para dimensionar la caché."""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "expirados": self.expirados,
+                "desalojos": self.desalojos,
+                "invalidaciones": self.invalidaciones,
+                "tamano": len(self._entradas),
+                "capacidad": self.capacidad,
+            }
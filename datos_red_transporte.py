@@ -20,14 +20,56 @@ TIME_TROLEBUS = 3.0     # tiempo entre estaciones en Trolebús
 # Tiempo extra estimado para hacer transbordo (caminar entre andenes, cambiar entradas)
 TRANSFER_PENALTY = 4.0
 
+# Transbordos caminando entre estaciones cercanas (solo si tienen coordenadas):
+# tiempo = TRANSFER_PENALTY + distancia * WALK_DETOUR / WALK_SPEED
+TRANSFER_RADIUS = 300.0   # distancia máxima en línea recta (metros)
+WALK_SPEED = 75.0         # metros por minuto (~4.5 km/h)
+WALK_DETOUR = 1.3         # rodeo de las calles respecto a la línea recta
+
 # Tarifas (pesos mexicanos)
 FARE_METRO = 5          # tarifa por entrada al Metro
 FARE_METROBUS = 6       # tarifa por entrada al Metrobús
 FARE_TROLEBUS = 4       # tarifa por entrada al Trolebús
 
+# Intervalo de paso promedio por sistema (minutos) y horario de servicio
+# (minutos desde medianoche); se usan para generar horarios cuando no hay GTFS
+HEADWAY_METRO = 4.0
+HEADWAY_METROBUS = 5.0
+HEADWAY_TROLEBUS = 8.0
+SERVICE_START = 5 * 60    # 05:00
+SERVICE_END = 24 * 60     # 24:00
+
 # Límite para imprimir caminos largos (seguridad)
 MAX_DISPLAY = 600
 
+# ---------------------------
+# ALIAS DE ESTACIONES
+# ---------------------------
+# Variantes de escritura -> nombre canónico. Se aplican al normalizar, así que
+# también unen las estaciones para los transbordos automáticos.
+ALIAS_ESTACIONES = {
+    "Ferreria": "Ferrería/Arena Ciudad de México",
+    "Zócalo": "Zócalo/Tenochtitlan",
+    "Etiopía": "Etiopía/Plaza de la Transparencia",
+    "Garibaldi": "Garibaldi/Lagunilla",
+    "Terminal del Sur / Tasqueña": "Tasqueña",
+    "Taxqueña": "Tasqueña",
+    "CETRAM Pantitlán": "Pantitlán",
+    "CETRAM Chapultepec": "Chapultepec",
+    "Central del Norte": "Autobuses del Norte",
+    "La Villa": "La Villa-Basílica",
+}
+
+# ---------------------------
+# COORDENADAS DE ESTACIONES
+# ---------------------------
+# Nombre de estación -> (latitud, longitud). Opcional y parcial: las
+# estaciones sin coordenadas solo se conectan por nombre. Por ahora la red
+# incluida no trae coordenadas (se deben tomar de una fuente verificada, no
+# aproximar), así que los transbordos caminando solo se crean para redes
+# importadas de GTFS (importador_gtfs.py), que traen las de todas sus paradas.
+COORDENADAS_ESTACIONES = {}
+
 # ---------------------------
 # DATOS: LISTAS DE LÍNEAS Y ESTACIONES
 # ---------------------------
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+importador_gtfs.py
+
+Importador de un feed GTFS local (stops.txt, routes.txt, trips.txt,
+stop_times.txt) como fuente de líneas para `compilar_red`.
+
+ - stop_times.txt se lee en streaming, un viaje a la vez, sin cargar el
+   archivo completo en memoria. Para eso las filas de cada viaje deben
+   venir juntas; GTFS no lo exige, así que si un trip_id reaparece después
+   de otro viaje la importación se detiene con un error (el archivo se
+   puede ordenar antes por trip_id).
+ - Para cada ruta se toma como "línea" la secuencia de estaciones más
+   frecuente entre sus viajes.
+ - El tiempo de cada tramo es la mediana de los tiempos observados en todos
+   los viajes; se acumula como histograma por minuto redondeado a 0.1, así
+   la memoria depende del número de tramos y no del de viajes.
+ - Las paradas con `parent_station` se agrupan bajo la estación padre.
+   Paradas (o estaciones padre) distintas con el mismo nombre solo se
+   tratan como una estación si están a menos de DISTANCIA_MISMA_ESTACION;
+   las que quedan más lejos reciben el nombre con su stop_id entre
+   paréntesis.
+ - Las coordenadas de stops.txt se pasan a `compilar_red`, que crea
+   transbordos caminando entre estaciones cercanas.
+
+Uso (importar y guardar un snapshot binario para el buscador):
+    python3 importador_gtfs.py <directorio_gtfs> red_gtfs.bin
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import csv
+import math
+import os
+import sys
+from collections import Counter, defaultdict
+
+from buscador_rutas import compilar_red, lineas_integradas, TARIFAS, METROS_POR_GRADO
+from datos_red_transporte import COORDENADAS_ESTACIONES, TRANSFER_RADIUS
+
+# Sistema asignado según agency_id (se usa route_type si la agencia no aparece)
+SISTEMA_POR_AGENCIA = {
+    'METRO': 'METRO',
+    'MB': 'METROBUS',
+    'METROBUS': 'METROBUS',
+    'TROLE': 'TROLEBUS',
+    'STE': 'TROLEBUS',
+}
+SISTEMA_POR_TIPO = {
+    0: 'TREN_LIGERO',
+    1: 'METRO',
+    2: 'TREN_SUBURBANO',
+    3: 'AUTOBUS',
+    6: 'CABLEBUS',
+    11: 'TROLEBUS',
+}
+
+# Tiempo para tramos sin horarios utilizables (minutos)
+TIEMPO_TRAMO_DEFECTO = 2.0
+# Piso para tramos cuya mediana resulta 0 (horarios al minuto)
+TIEMPO_MINIMO_TRAMO = 0.5
+# Paradas con el mismo nombre más separadas que esto (metros) son estaciones distintas
+DISTANCIA_MISMA_ESTACION = 500.0
+
+# ---------------------------
+# LECTURA DE ARCHIVOS
+# ---------------------------
+def _leer_csv(directorio, nombre):
+    # utf-8-sig: algunos feeds traen BOM al inicio del archivo
+    with open(os.path.join(directorio, nombre), newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+def _a_minutos(hora):
+    """Convierte 'HH:MM:SS' (HH puede ser >= 24) a minutos; None si está vacío."""
+    hora = (hora or '').strip()
+    if not hora:
+        return None
+    h, m, s = hora.split(':')
+    return int(h) * 60 + int(m) + int(s) / 60.0
+
+def _mediana(histograma):
+    total = sum(histograma.values())
+    acumulado = 0
+    for valor in sorted(histograma):
+        acumulado += histograma[valor]
+        if 2 * acumulado >= total:
+            return valor
+    return None
+
+def _viajes(directorio):
+    """
+    Recorre stop_times.txt en streaming y genera (trip_id, [(secuencia,
+    stop_id, llegada, salida), ...]) por cada viaje. Lanza ValueError si
+    las filas de un viaje no están juntas en el archivo.
+    """
+    actual = None; filas = []
+    terminados = set()
+    for fila in _leer_csv(directorio, 'stop_times.txt'):
+        trip_id = fila['trip_id']
+        if trip_id != actual:
+            if filas:
+                yield actual, filas
+                terminados.add(actual)
+            if trip_id in terminados:
+                raise ValueError(f"stop_times.txt no está agrupado por trip_id: el viaje '{trip_id}' "
+                                 "aparece en bloques separados (ordene el archivo por trip_id)")
+            actual = trip_id; filas = []
+        filas.append((int(fila['stop_sequence']), fila['stop_id'],
+                      _a_minutos(fila.get('arrival_time')), _a_minutos(fila.get('departure_time'))))
+    if filas:
+        yield actual, filas
+
+def _distancia(a, b):
+    """Distancia aproximada en metros entre dos posiciones (lat, lon)."""
+    dy = (a[0] - b[0]) * METROS_POR_GRADO
+    dx = (a[1] - b[1]) * METROS_POR_GRADO * math.cos(math.radians((a[0] + b[0]) / 2))
+    return math.hypot(dx, dy)
+
+def _estaciones(directorio):
+    """
+    Lee stops.txt y devuelve (estacion por stop_id, {estacion: (lat, lon)}).
+
+    Cada parada pertenece a su estación padre (o es su propia raíz). Las
+    raíces con el mismo nombre se agrupan si están a menos de
+    DISTANCIA_MISMA_ESTACION del primer miembro del grupo; el grupo con más
+    raíces conserva el nombre y los demás lo llevan con el stop_id de su
+    primera raíz. La posición de una estación es el promedio de sus raíces
+    (o, si una raíz no tiene, de sus paradas).
+    """
+    paradas = {}
+    for fila in _leer_csv(directorio, 'stops.txt'):
+        try:
+            posicion = (float(fila['stop_lat']), float(fila['stop_lon']))
+        except (KeyError, TypeError, ValueError):
+            posicion = None
+        paradas[fila['stop_id']] = (fila['stop_name'].strip(), (fila.get('parent_station') or '').strip(),
+                                    posicion)
+
+    raiz = {stop_id: padre if padre in paradas else stop_id for stop_id, (_, padre, _) in paradas.items()}
+    posicion_raiz = {}
+    for stop_id, r in raiz.items():
+        posicion = paradas[r][2] or paradas[stop_id][2]
+        if posicion is not None:
+            posicion_raiz.setdefault(r, posicion)
+
+    # Raíces por nombre -> grupos de raíces cercanas
+    por_nombre = defaultdict(list)
+    for r in dict.fromkeys(raiz.values()):
+        por_nombre[paradas[r][0]].append(r)
+    estacion_raiz = {}; coordenadas = {}
+    for nombre, raices in por_nombre.items():
+        grupos = []
+        for r in raices:
+            posicion = posicion_raiz.get(r)
+            for grupo in grupos:
+                inicio = posicion_raiz.get(grupo[0])
+                if posicion is None or inicio is None or _distancia(posicion, inicio) < DISTANCIA_MISMA_ESTACION:
+                    grupo.append(r)
+                    break
+            else:
+                grupos.append([r])
+        grupos.sort(key=len, reverse=True)
+        for k, grupo in enumerate(grupos):
+            est = nombre if k == 0 else f"{nombre} ({grupo[0]})"
+            for r in grupo:
+                estacion_raiz[r] = est
+            posiciones = [posicion_raiz[r] for r in grupo if r in posicion_raiz]
+            if posiciones:
+                coordenadas[est] = (sum(p[0] for p in posiciones) / len(posiciones),
+                                    sum(p[1] for p in posiciones) / len(posiciones))
+
+    return {stop_id: estacion_raiz[r] for stop_id, r in raiz.items()}, coordenadas
+
+# ---------------------------
+# IMPORTACIÓN
+# ---------------------------
+def viajes_gtfs(directorio, sistema_por_agencia=None):
+    """
+    Recorre el feed en streaming y genera, por cada viaje,
+    (route_id, sistema, id_linea, [(estacion, llegada, salida), ...]) con
+    las horas en minutos desde la medianoche (None si la parada no tiene hora).
+    """
+    sistema_por_agencia = dict(SISTEMA_POR_AGENCIA, **(sistema_por_agencia or {}))
+
+    # Paradas -> nombre de la estación (la estación padre si existe)
+    estacion, _ = _estaciones(directorio)
+
+    # Rutas -> (sistema, id_linea)
+    rutas = {}
+    usados = set()
+    for fila in _leer_csv(directorio, 'routes.txt'):
+        agencia = (fila.get('agency_id') or '').strip().upper()
+        tipo = int(fila.get('route_type') or 3)
+        sistema = sistema_por_agencia.get(agencia) or SISTEMA_POR_TIPO.get(tipo) or agencia or 'OTRO'
+        id_linea = (fila.get('route_short_name') or fila.get('route_long_name') or fila['route_id']).strip()
+        if (sistema, id_linea) in usados:
+            id_linea = f"{id_linea} ({fila['route_id']})"
+        usados.add((sistema, id_linea))
+        rutas[fila['route_id']] = (sistema, id_linea)
+
+    ruta_de_viaje = {fila['trip_id']: fila['route_id'] for fila in _leer_csv(directorio, 'trips.txt')}
+
+    for trip_id, filas in _viajes(directorio):
+        route_id = ruta_de_viaje.get(trip_id)
+        if route_id not in rutas:
+            continue
+        filas.sort()
+        secuencia = []
+        for _, stop_id, llegada, salida in filas:
+            est = estacion.get(stop_id)
+            if est is None:
+                continue
+            if secuencia and secuencia[-1][0] == est:
+                continue # Dos andenes de la misma estación seguidos
+            secuencia.append((est, llegada, salida))
+        if len(secuencia) >= 2:
+            yield (route_id,) + rutas[route_id] + (secuencia,)
+
+def coordenadas_gtfs(directorio):
+    """
+    {estacion: (lat, lon)} a partir de stops.txt, con las mismas estaciones
+    que `viajes_gtfs`: la posición de la estación padre (o el promedio de
+    las que se agrupan bajo un nombre), nunca de paradas lejanas que solo
+    comparten el nombre.
+    """
+    return _estaciones(directorio)[1]
+
+def importar_gtfs(directorio, sistema_por_agencia=None):
+    """
+    Lee el feed GTFS de `directorio` y devuelve una lista de líneas
+    (sistema, id_linea, estaciones, tiempos_por_tramo), el mismo formato que
+    `lineas_integradas()`.
+    """
+    # Patrones de estaciones por ruta e histogramas de tiempo por tramo
+    rutas = {}
+    patrones = defaultdict(Counter)     # route_id -> Counter(tupla de estaciones)
+    histogramas = defaultdict(Counter)  # (route_id, est_a, est_b) sin sentido -> Counter(minutos)
+    for route_id, sistema, id_linea, secuencia in viajes_gtfs(directorio, sistema_por_agencia):
+        rutas[route_id] = (sistema, id_linea)
+        patrones[route_id][tuple(s[0] for s in secuencia)] += 1
+        for (a, _, sale_a), (b, llega_b, _) in zip(secuencia, secuencia[1:]):
+            if sale_a is not None and llega_b is not None and llega_b >= sale_a:
+                histogramas[(route_id,) + tuple(sorted((a, b)))][round(llega_b - sale_a, 1)] += 1
+
+    lineas = []
+    for route_id, conteo in patrones.items():
+        sistema, id_linea = rutas[route_id]
+        # El patrón más frecuente (en cualquier sentido) representa la línea
+        estaciones = list(conteo.most_common(1)[0][0])
+        tiempos = []
+        for a, b in zip(estaciones, estaciones[1:]):
+            mediana = _mediana(histogramas.get((route_id,) + tuple(sorted((a, b))), {}))
+            tiempos.append(TIEMPO_TRAMO_DEFECTO if mediana is None else max(mediana, TIEMPO_MINIMO_TRAMO))
+        lineas.append((sistema, id_linea, estaciones, tiempos))
+    return lineas
+
+def compilar_red_gtfs(directorio, sistema_por_agencia=None, tarifas=None, incluir_integradas=False,
+                      radio_transbordo=TRANSFER_RADIUS):
+    """
+    Compila una RedCompilada a partir del feed GTFS. Con
+    `incluir_integradas=True` también se añaden las líneas de
+    `datos_red_transporte.py`. Las estaciones a menos de `radio_transbordo`
+    metros quedan conectadas por transbordos caminando.
+    """
+    lineas = importar_gtfs(directorio, sistema_por_agencia)
+    coordenadas = coordenadas_gtfs(directorio)
+    if incluir_integradas:
+        lineas = list(lineas_integradas()) + lineas
+        coordenadas = dict(COORDENADAS_ESTACIONES, **coordenadas)
+    return compilar_red(lineas, tarifas=tarifas if tarifas is not None else TARIFAS,
+                        coordenadas=coordenadas, radio_transbordo=radio_transbordo)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python3 importador_gtfs.py <directorio_gtfs> <archivo_snapshot>")
+        sys.exit(1)
+    from snapshot_red import guardar_snapshot
+    red = compilar_red_gtfs(sys.argv[1])
+    guardar_snapshot(red, sys.argv[2])
+    print(f"Red GTFS ({len(red)} nodos, {red.num_aristas()} aristas) escrita en {sys.argv[2]}")
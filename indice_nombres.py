@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+indice_nombres.py
+
+Índice de nombres de estación para autocompletar y corregir errores de
+escritura sin recorrer `indice_por_nombre` completo.
+
+ - Los nombres se pliegan (sin acentos ni signos) y los alias de
+   ALIAS_ESTACIONES apuntan a su estación canónica.
+ - Autocompletar: arreglo ordenado de prefijos de palabra con búsqueda
+   binaria (equivale a un trie compacto): "tenoch" encuentra
+   "Zócalo/Tenochtitlan" porque se indexa cada palabra del nombre.
+ - Corrección: índice invertido de trigramas para obtener pocos candidatos
+   y distancia de edición (Levenshtein acotada) solo sobre ellos.
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+from bisect import bisect_left
+from collections import Counter
+
+from buscador_rutas import red_base, normalizar, plegar, ALIAS_NORMALIZADOS
+
+# Candidatos por trigramas que se comparan con distancia de edición
+CANDIDATOS_TRIGRAMAS = 20
+# Entradas del arreglo de prefijos que se revisan por consulta de autocompletado
+MAX_REVISADOS = 200
+
+# ---------------------------
+# UTILIDADES
+# ---------------------------
+def _trigramas(texto):
+    t = f"  {texto} "
+    return {t[i:i+3] for i in range(len(t) - 2)}
+
+def distancia_edicion(a, b, limite=None):
+    """
+    Distancia de Levenshtein entre `a` y `b`. Si se da `limite` y la
+    distancia lo supera, devuelve limite + 1 sin terminar el cálculo.
+    """
+    if abs(len(a) - len(b)) > (limite if limite is not None else len(a) + len(b)):
+        return limite + 1
+    previa = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            actual.append(min(previa[j] + 1, actual[j-1] + 1, previa[j-1] + (ca != cb)))
+        if limite is not None and min(actual) > limite:
+            return limite + 1
+        previa = actual
+    return previa[-1]
+
+# ---------------------------
+# ÍNDICE
+# ---------------------------
+class IndiceNombres:
+    """
+    Índice de nombres construido una vez sobre una RedCompilada.
+
+    - `autocompletar(texto)`: nombres que empiezan (por alguna palabra) con `texto`
+    - `resolver(texto)`: clave normalizada exacta, por alias o la más parecida
+    """
+
+    def __init__(self, red=None):
+        red = red if red is not None else red_base()
+        self.red = red
+        self.claves = list(red.indice_por_nombre)
+        self.id_clave = {clave: i for i, clave in enumerate(self.claves)}
+
+        # Nombre para mostrar: la escritura más frecuente entre los nodos
+        self.mostrar = []
+        self.popularidad = []
+        for clave in self.claves:
+            ids = red.indice_por_nombre[clave]
+            self.mostrar.append(Counter(red.nodos[i][0] for i in ids).most_common(1)[0][0])
+            self.popularidad.append(len(ids))
+
+        # Textos indexados: cada clave y cada alias que apunta a una clave existente
+        textos = [(clave, i) for i, clave in enumerate(self.claves)]
+        textos += [(alias, self.id_clave[canonica]) for alias, canonica in ALIAS_NORMALIZADOS.items()
+                   if canonica in self.id_clave]
+
+        # Prefijos: (sufijo que empieza en cada palabra, es_inicio, id)
+        entradas = set()
+        for texto, i in textos:
+            palabras = texto.split(' ')
+            for k in range(len(palabras)):
+                entradas.add((' '.join(palabras[k:]), k == 0, i))
+        entradas = sorted(entradas)
+        self._prefijos = [e[0] for e in entradas]
+        self._prefijo_inicio = [e[1] for e in entradas]
+        self._prefijo_id = [e[2] for e in entradas]
+
+        # Trigramas -> ids
+        self._trigramas = {}
+        for texto, i in textos:
+            for tri in _trigramas(texto):
+                self._trigramas.setdefault(tri, set()).add(i)
+
+    def _con_prefijo(self, prefijo):
+        """{id: coincide_desde_el_inicio} de las claves con alguna palabra que empieza con `prefijo`."""
+        pos = bisect_left(self._prefijos, prefijo)
+        vistos = {}
+        fin = min(len(self._prefijos), pos + MAX_REVISADOS)
+        while pos < fin and self._prefijos[pos].startswith(prefijo):
+            i = self._prefijo_id[pos]
+            vistos[i] = vistos.get(i, False) or self._prefijo_inicio[pos]
+            pos += 1
+        return vistos
+
+    def autocompletar(self, texto, limite=10):
+        """
+        Nombres de estación cuyo nombre (o alguna de sus palabras) empieza
+        con `texto`. Primero los que coinciden desde el inicio, luego por
+        número de líneas que pasan por la estación.
+        """
+        prefijo = plegar(texto)
+        if not prefijo:
+            return []
+        vistos = self._con_prefijo(prefijo)
+        orden = sorted(vistos, key=lambda i: (not vistos[i], -self.popularidad[i], self.claves[i]))
+        return [self.mostrar[i] for i in orden[:limite]]
+
+    def candidatos(self, texto, limite=5):
+        """Claves más parecidas a `texto` por trigramas y distancia de edición."""
+        consulta = plegar(texto)
+        conteo = Counter()
+        for tri in _trigramas(consulta):
+            for i in self._trigramas.get(tri, ()):
+                conteo[i] += 1
+        puntuados = []
+        for i, _ in conteo.most_common(CANDIDATOS_TRIGRAMAS):
+            d = distancia_edicion(consulta, self.claves[i], limite=max(len(consulta), 3))
+            puntuados.append((d, -self.popularidad[i], self.claves[i]))
+        puntuados.sort()
+        return [clave for _, _, clave in puntuados[:limite]]
+
+    def resolver(self, texto):
+        """
+        Devuelve la clave normalizada de la estación: la exacta (o su
+        alias) si existe; si no, la más parecida cuando la distancia de
+        edición es pequeña respecto al largo del texto. None si no hay una
+        coincidencia razonable.
+        """
+        clave = normalizar(texto)
+        if clave in self.id_clave:
+            return clave
+        if not clave:
+            return None
+        # Un prefijo que corresponde a una sola estación se completa directamente
+        con_prefijo = self._con_prefijo(clave)
+        if len(con_prefijo) == 1:
+            return self.claves[next(iter(con_prefijo))]
+        tolerancia = max(1, len(clave) // 4)
+        for candidata in self.candidatos(clave, limite=1):
+            if distancia_edicion(clave, candidata, tolerancia) <= tolerancia:
+                return candidata
+        return None
+
+    def nombre(self, clave):
+        """Nombre para mostrar de una clave normalizada."""
+        return self.mostrar[self.id_clave[clave]]
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+jerarquia_contraccion.py
+
+Motor opcional de consultas punto a punto basado en jerarquías de
+contracción (Contraction Hierarchies) sobre la red compilada.
+
+Preprocesamiento:
+ - Se contraen los nodos (estación, sistema, línea) uno por uno, en orden de
+   importancia creciente (diferencia de aristas + vecinos ya contraídos).
+ - Al contraer `v`, para cada par de vecinos u -> v -> w se añade un atajo
+   u -> w salvo que una búsqueda local de testigos encuentre un camino igual
+   o mejor que no pase por `v`.
+ - Las aristas de transbordo (TRANSFER_PENALTY) se tratan como cualquier
+   otra arista; como cada nodo pertenece a un solo sistema, el último sistema
+   usado para las tarifas queda determinado por el nodo y no hace falta
+   guardarlo en el estado.
+ - El peso de cada arista es el par (tiempo, tarifa), comparado en orden
+   lexicográfico como en `_dijkstra`: la tarifa de u -> w es la del sistema
+   de w si cambia de sistema y 0 si no, así que se suma a lo largo de los
+   atajos igual que el tiempo y entre caminos del mismo tiempo gana el más
+   barato. La tarifa del origen se suma al iniciar la búsqueda.
+
+Consulta: búsqueda bidireccional solo por aristas "hacia arriba" (a nodos de
+mayor rango); los atajos se desempaquetan recursivamente y el resultado tiene
+la misma forma que el de `encontrar_ruta_mas_rapida` (mismo tiempo y
+tarifa). Con tiempos decimales, dos caminos "del mismo tiempo" pueden
+diferir en el último bit según el orden de la suma (los atajos suman por
+tramos) y en esos casos raros la tarifa puede ser la del otro camino; con
+tiempos exactos en binario, como en la red integrada, coincide siempre.
+
+La jerarquía se construye sobre la red base, sin cierres.
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import heapq
+import random
+from array import array
+
+from buscador_rutas import (
+    red_base, normalizar, encontrar_ruta_mas_rapida, _construir_resultado, INF
+)
+
+# Límite de nodos fijados en cada búsqueda de testigos (si se alcanza, se
+# añade el atajo: nunca se pierde un camino mínimo, solo se gana un atajo)
+LIMITE_TESTIGOS = 60
+# Peso de "sin camino" en las comparaciones de pares (tiempo, tarifa)
+SIN_CAMINO = (INF, 0)
+
+# ---------------------------
+# PREPROCESAMIENTO
+# ---------------------------
+def _sumar(a, b):
+    return (a[0] + b[0], a[1] + b[1])
+
+def _busqueda_testigos(salientes, origen, excluido, objetivos, limite_dist):
+    """Dijkstra local (pesos (tiempo, tarifa)) desde `origen` que no pasa por `excluido`."""
+    dist = {origen: (0.0, 0)}
+    heap = [((0.0, 0), origen)]
+    pendientes = set(objetivos)
+    fijados = 0
+    while heap and pendientes and fijados < LIMITE_TESTIGOS:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        if d > limite_dist:
+            break
+        fijados += 1
+        pendientes.discard(u)
+        for w, peso in salientes[u].items():
+            if w == excluido:
+                continue
+            nd = (d[0] + peso[0], d[1] + peso[1])
+            if nd < dist.get(w, SIN_CAMINO):
+                dist[w] = nd
+                heapq.heappush(heap, (nd, w))
+    return dist
+
+class JerarquiaContraccion:
+    """
+    Jerarquía de contracción construida sobre una RedCompilada.
+
+    Tras el preprocesamiento, `offsets_sub`/`destinos_sub`/`pesos_sub`/
+    `tarifas_sub` guardan las aristas hacia arriba (u -> w con
+    rango[w] > rango[u]) y `offsets_baj`/`destinos_baj`/`pesos_baj`/
+    `tarifas_baj` las aristas hacia abajo invertidas (w <- u con
+    rango[u] > rango[w], indexadas por w), ambas en formato CSR. `medio[(u, w)]` es el nodo intermedio de cada atajo.
+    """
+
+    def __init__(self, red=None):
+        self.red = red if red is not None else red_base()
+        self.medio = {}
+        self._preprocesar()
+
+    def _preprocesar(self):
+        red = self.red
+        n = len(red)
+        nodo_sistema = red.nodo_sistema; tarifas = red.tarifas
+        # Grafo de trabajo: se queda con la mejor arista (tiempo, tarifa) entre cada par
+        salientes = [dict() for _ in range(n)]
+        entrantes = [dict() for _ in range(n)]
+        for u in range(n):
+            for e in range(red.offsets[u], red.offsets[u+1]):
+                w = red.destinos[e]
+                tarifa = 0 if nodo_sistema[w] == nodo_sistema[u] else tarifas[nodo_sistema[w]]
+                peso = (red.pesos[e], tarifa)
+                if w != u and peso < salientes[u].get(w, SIN_CAMINO):
+                    salientes[u][w] = peso
+                    entrantes[w][u] = peso
+
+        contraido = bytearray(n)
+        vecinos_contraidos = [0] * n
+        rango = array('i', [0]) * n
+        # Aristas definitivas de la jerarquía (incluye atajos)
+        arriba = [dict() for _ in range(n)]   # u -> {w: peso} con rango[w] > rango[u]
+        abajo = [dict() for _ in range(n)]    # w -> {u: peso} para u -> w con rango[u] > rango[w]
+
+        def atajos_necesarios(v):
+            atajos = []
+            for u, peso_uv in entrantes[v].items():
+                objetivos = {w: _sumar(peso_uv, peso_vw) for w, peso_vw in salientes[v].items()
+                             if w != u}
+                if not objetivos:
+                    continue
+                dist = _busqueda_testigos(salientes, u, v, objetivos, max(objetivos.values()))
+                for w, via_v in objetivos.items():
+                    if dist.get(w, SIN_CAMINO) > via_v:
+                        atajos.append((u, w, via_v))
+            return atajos
+
+        def prioridad(v):
+            eliminadas = len(entrantes[v]) + len(salientes[v])
+            return len(atajos_necesarios(v)) - eliminadas + vecinos_contraidos[v]
+
+        heap = [(prioridad(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        siguiente_rango = 0
+        while heap:
+            p, v = heapq.heappop(heap)
+            if contraido[v]:
+                continue
+            # Actualización perezosa: si la prioridad empeoró, se reinserta
+            nueva = prioridad(v)
+            if heap and nueva > heap[0][0]:
+                heapq.heappush(heap, (nueva, v))
+                continue
+
+            for u, w, peso in atajos_necesarios(v):
+                if peso < salientes[u].get(w, SIN_CAMINO):
+                    salientes[u][w] = peso
+                    entrantes[w][u] = peso
+                    self.medio[(u, w)] = v
+
+            # Las aristas que quedan de v van a nodos aún no contraídos (mayor rango)
+            for w, peso in salientes[v].items():
+                arriba[v][w] = peso
+                del entrantes[w][v]
+                vecinos_contraidos[w] += 1
+            for u, peso in entrantes[v].items():
+                abajo[v][u] = peso
+                del salientes[u][v]
+                vecinos_contraidos[u] += 1
+            salientes[v] = {}; entrantes[v] = {}
+
+            contraido[v] = 1
+            rango[v] = siguiente_rango
+            siguiente_rango += 1
+
+        self.rango = rango
+        self.offsets_sub, self.destinos_sub, self.pesos_sub, self.tarifas_sub = self._a_csr(arriba)
+        self.offsets_baj, self.destinos_baj, self.pesos_baj, self.tarifas_baj = self._a_csr(abajo)
+
+    @staticmethod
+    def _a_csr(listas):
+        offsets = array('i', [0]); destinos = array('i'); pesos = array('d'); tarifas = array('i')
+        for vecinos in listas:
+            for w, (peso, tarifa) in vecinos.items():
+                destinos.append(w); pesos.append(peso); tarifas.append(tarifa)
+            offsets.append(len(destinos))
+        return offsets, destinos, pesos, tarifas
+
+    def num_atajos(self):
+        return len(self.medio)
+
+    # ---------------------------
+    # CONSULTA
+    # ---------------------------
+    def _desempaquetar(self, u, w, salida):
+        """Añade a `salida` los nodos de la arista u -> w sin atajos (sin incluir u)."""
+        v = self.medio.get((u, w))
+        if v is None:
+            salida.append(w)
+        else:
+            self._desempaquetar(u, v, salida)
+            self._desempaquetar(v, w, salida)
+
+    def encontrar_ruta(self, origen_nombre, destino_nombre):
+        """
+        Ruta más rápida entre dos estaciones con búsqueda bidireccional en
+        la jerarquía. Devuelve el mismo diccionario que
+        `encontrar_ruta_mas_rapida`, o None si no hay ruta.
+        """
+        red = self.red
+        nodos_origen = red.indice_por_nombre.get(normalizar(origen_nombre), [])
+        nodos_destino = red.indice_por_nombre.get(normalizar(destino_nombre), [])
+        if not nodos_origen:
+            raise ValueError(f"Origen no encontrado: '{origen_nombre}'")
+        if not nodos_destino:
+            raise ValueError(f"Destino no encontrado: '{destino_nombre}'")
+
+        # Estado de cada dirección: etiquetas (tiempo, tarifa) y predecesores
+        # (diccionarios, porque solo se visita una pequeña parte de la red).
+        # La tarifa del origen se cobra al salir; la de atrás empieza en 0
+        tarifas = red.tarifas; nodo_sistema = red.nodo_sistema
+        dist = ({u: (0.0, tarifas[nodo_sistema[u]]) for u in nodos_origen},
+                {u: (0.0, 0) for u in nodos_destino})
+        prev = ({u: -1 for u in nodos_origen}, {u: -1 for u in nodos_destino})
+        heaps = ([(d, u) for u, d in dist[0].items()], [(d, u) for u, d in dist[1].items()])
+        csr = ((self.offsets_sub, self.destinos_sub, self.pesos_sub, self.tarifas_sub),
+               (self.offsets_baj, self.destinos_baj, self.pesos_baj, self.tarifas_baj))
+        for h in heaps:
+            heapq.heapify(h)
+
+        mejor = SIN_CAMINO; encuentro = None
+        lado = 0
+        while heaps[0] or heaps[1]:
+            # Se alterna entre direcciones; cada una termina cuando su mínimo supera a `mejor`
+            if not heaps[lado] or (heaps[1-lado] and heaps[1-lado][0][0] < heaps[lado][0][0]):
+                lado = 1 - lado
+            d, u = heapq.heappop(heaps[lado])
+            if d >= mejor:
+                heaps[lado].clear()
+                continue
+            if d > dist[lado][u]:
+                continue
+            otra = dist[1-lado].get(u)
+            if otra is not None and _sumar(d, otra) < mejor:
+                mejor = _sumar(d, otra); encuentro = u
+
+            offsets, destinos, pesos, tarifas_arista = csr[lado]
+            for k in range(offsets[u], offsets[u+1]):
+                w = destinos[k]; nd = (d[0] + pesos[k], d[1] + tarifas_arista[k])
+                if nd < dist[lado].get(w, SIN_CAMINO):
+                    dist[lado][w] = nd
+                    prev[lado][w] = u
+                    heapq.heappush(heaps[lado], (nd, w))
+
+        if encuentro is None:
+            return None
+
+        # Mitad hacia adelante: origen -> encuentro
+        hacia_arriba = []
+        u = encuentro
+        while u != -1:
+            hacia_arriba.append(u); u = prev[0][u]
+        hacia_arriba.reverse()
+        camino = [hacia_arriba[0]]
+        for a, b in zip(hacia_arriba, hacia_arriba[1:]):
+            self._desempaquetar(a, b, camino)
+
+        # Mitad hacia atrás: encuentro -> destino
+        u = encuentro
+        while prev[1][u] != -1:
+            siguiente = prev[1][u]
+            self._desempaquetar(u, siguiente, camino)
+            u = siguiente
+
+        return _construir_resultado(red, camino, mejor[0])
+
+# ---------------------------
+# VERIFICACIÓN
+# ---------------------------
+def verificar_contra_dijkstra(jerarquia, consultas=1000, semilla=0):
+    """
+    Compara tiempo y costo de la jerarquía contra
+    `encontrar_ruta_mas_rapida` en pares de estaciones aleatorios. Devuelve
+    la lista de discrepancias [(origen, destino, esperado, obtenido)], donde
+    esperado y obtenido son (tiempo_min, costo_mxn) o None.
+    """
+    red = jerarquia.red
+    nombres = list(red.indice_por_nombre)
+    aleatorio = random.Random(semilla)
+    discrepancias = []
+    for _ in range(consultas):
+        origen = aleatorio.choice(nombres); destino = aleatorio.choice(nombres)
+        esperada = encontrar_ruta_mas_rapida(red, red.indice_por_nombre, origen, destino)
+        obtenida = jerarquia.encontrar_ruta(origen, destino)
+        t_esperado = (esperada["tiempo_min"], esperada["costo_mxn"]) if esperada else None
+        t_obtenido = (obtenida["tiempo_min"], obtenida["costo_mxn"]) if obtenida else None
+        if t_esperado != t_obtenido:
+            discrepancias.append((origen, destino, t_esperado, t_obtenido))
+    return discrepancias
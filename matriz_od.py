@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+matriz_od.py
+
+Cálculo por lotes de matrices origen-destino (OD) sobre la red compilada.
+
+En lugar de llamar a `encontrar_ruta_mas_rapida` por cada par, se ejecuta un
+solo Dijkstra completo por origen distinto y de su árbol de caminos mínimos
+se leen el tiempo, el costo y el número de transbordos hacia todos los
+destinos pedidos. Los orígenes se reparten entre procesos que reciben la red
+(de solo lectura) una vez, al iniciar.
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import os
+from array import array
+from multiprocessing import Pool
+
+from buscador_rutas import red_base, normalizar, _dijkstra, INF
+
+# ---------------------------
+# BÚSQUEDA DE UN ORIGEN
+# ---------------------------
+def _grupos(red, nombres, etiqueta, cierres=None):
+    """Convierte nombres de estación en listas de ids de nodo (sin nodos cerrados)."""
+    grupos = []
+    for nombre in nombres:
+        ids = red.indice_por_nombre.get(normalizar(nombre), [])
+        if cierres:
+            ids = [i for i in ids if not cierres.nodos[i]]
+        if not ids:
+            raise ValueError(f"{etiqueta} no encontrado: '{nombre}'")
+        grupos.append(ids)
+    return grupos
+
+def fila_od(red, nodos_origen, grupos_destino, cierres=None):
+    """
+    Ejecuta un Dijkstra completo desde `nodos_origen` y devuelve tres
+    arreglos alineados con `grupos_destino`: tiempo (minutos, inf si no hay
+    ruta), costo (MXN, -1) y transbordos (-1).
+    """
+    orden = []
+    dist, prev, _ = _dijkstra(red, nodos_origen, cierres=cierres, orden=orden)
+
+    # Costo y transbordos por nodo, propagados en orden de fijación
+    nodo_sistema = red.nodo_sistema; nodo_linea = red.nodo_linea; tarifas = red.tarifas
+    costo = [0] * len(red); transbordos = [0] * len(red)
+    for u in orden:
+        p = prev[u]
+        if p == -1:
+            costo[u] = tarifas[nodo_sistema[u]]
+        else:
+            costo[u] = costo[p] + (tarifas[nodo_sistema[u]] if nodo_sistema[u] != nodo_sistema[p] else 0)
+            transbordos[u] = transbordos[p] + (nodo_linea[u] != nodo_linea[p])
+
+    tiempos = array('d'); costos = array('i'); cambios = array('i')
+    for grupo in grupos_destino:
+        mejor = min(grupo, key=lambda u: (dist[u], costo[u]))
+        if dist[mejor] < INF:
+            tiempos.append(dist[mejor]); costos.append(costo[mejor]); cambios.append(transbordos[mejor])
+        else:
+            tiempos.append(INF); costos.append(-1); cambios.append(-1)
+    return tiempos, costos, cambios
+
+# ---------------------------
+# PROCESOS TRABAJADORES
+# ---------------------------
+_red_trabajador = None
+_cierres_trabajador = None
+_destinos_trabajador = None
+
+def _iniciar_trabajador(red, cierres, grupos_destino):
+    # Se ejecuta una vez por proceso: la red queda en memoria para todas sus tareas
+    global _red_trabajador, _cierres_trabajador, _destinos_trabajador
+    _red_trabajador = red
+    _cierres_trabajador = cierres
+    _destinos_trabajador = grupos_destino
+
+def _tarea_origen(args):
+    posicion, nodos_origen = args
+    return (posicion,) + fila_od(_red_trabajador, nodos_origen, _destinos_trabajador, _cierres_trabajador)
+
+# ---------------------------
+# API POR LOTES
+# ---------------------------
+def iterar_filas_od(origenes, destinos, red=None, cierres=None, procesos=None):
+    """
+    Genera una fila por origen distinto, en el orden en que se terminan:
+    (nombre_origen, tiempos, costos, transbordos), con los arreglos
+    alineados con `destinos`.
+
+    `procesos` indica cuántos procesos usar (None = todos los núcleos,
+    1 = en el proceso actual, sin pool).
+    """
+    red = red if red is not None else red_base()
+    grupos_destino = _grupos(red, destinos, "Destino", cierres)
+
+    # Un solo cálculo por origen distinto (según su nombre normalizado)
+    distintos = {}
+    for nombre in origenes:
+        distintos.setdefault(normalizar(nombre), nombre)
+    nombres_origen = list(distintos.values())
+    tareas = list(enumerate(_grupos(red, nombres_origen, "Origen", cierres)))
+
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(tareas) <= 1:
+        for posicion, nodos_origen in tareas:
+            yield (nombres_origen[posicion],) + fila_od(red, nodos_origen, grupos_destino, cierres)
+        return
+
+    with Pool(min(procesos, len(tareas)), initializer=_iniciar_trabajador,
+              initargs=(red, cierres, grupos_destino)) as pool:
+        tam_lote = max(1, len(tareas) // (procesos * 4))
+        for posicion, tiempos, costos, cambios in pool.imap_unordered(_tarea_origen, tareas, tam_lote):
+            yield nombres_origen[posicion], tiempos, costos, cambios
+
+def matriz_od(origenes, destinos, red=None, cierres=None, procesos=None, como_numpy=False):
+    """
+    Calcula la matriz OD completa. Devuelve un diccionario con las listas
+    `origenes` y `destinos` y las matrices `tiempo_min`, `costo_mxn` y
+    `transbordos` (una fila por origen, en el orden de `origenes`).
+
+    Con `como_numpy=True` las matrices se devuelven como arreglos de NumPy
+    (requiere tener NumPy instalado).
+    """
+    filas = {}
+    for nombre, tiempos, costos, cambios in iterar_filas_od(origenes, destinos, red, cierres, procesos):
+        filas[normalizar(nombre)] = (tiempos, costos, cambios)
+
+    orden = [filas[normalizar(nombre)] for nombre in origenes]
+    resultado = {
+        "origenes": list(origenes),
+        "destinos": list(destinos),
+        "tiempo_min": [f[0] for f in orden],
+        "costo_mxn": [f[1] for f in orden],
+        "transbordos": [f[2] for f in orden],
+    }
+
+    if como_numpy:
+        import numpy as np
+        for clave, tipo in (("tiempo_min", np.float64), ("costo_mxn", np.int32), ("transbordos", np.int32)):
+            resultado[clave] = np.array(resultado[clave], dtype=tipo).reshape(len(origenes), len(destinos))
+    return resultado
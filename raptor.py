@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+raptor.py
+
+Modo de búsqueda por horarios (RAPTOR, Round-bAsed Public Transit Optimized
+Router) como alternativa a `encontrar_ruta_mas_rapida`, que supone tramos
+de tiempo constante sin esperas.
+
+ - Las paradas son los nodos de la RedCompilada (estación, sistema, línea),
+   así que los transbordos son las mismas aristas TRANSFER (con
+   TRANSFER_PENALTY) de la red.
+ - Cada "ruta" es un patrón de paradas con sus viajes ordenados por hora de
+   salida; los horarios se guardan en arreglos planos (un renglón por viaje).
+ - La ronda k encuentra las mejores llegadas usando como máximo k viajes.
+ - `consultar_rango` implementa rRAPTOR: una pasada por cada hora de salida
+   del intervalo, de la más tardía a la más temprana, reutilizando las
+   etiquetas de la pasada anterior.
+
+Los horarios vienen de un feed GTFS (`horario_gtfs`) o se generan con los
+intervalos de paso de `datos_red_transporte.py` (`horario_sintetico`).
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from buscador_rutas import (
+    red_base, lineas_integradas, normalizar, _construir_resultado,
+    MODO_TRANSFER, INF
+)
+from datos_red_transporte import (
+    HEADWAY_METRO, HEADWAY_METROBUS, HEADWAY_TROLEBUS,
+    SERVICE_START, SERVICE_END
+)
+
+INTERVALOS = {'METRO': HEADWAY_METRO, 'METROBUS': HEADWAY_METROBUS, 'TROLEBUS': HEADWAY_TROLEBUS}
+
+# Número máximo de viajes (rondas) por consulta
+MAX_VIAJES = 8
+
+# Tipos de etiqueta por ronda
+_SIN_ETIQUETA, _ORIGEN, _VIAJE, _TRANSBORDO = 0, 1, 2, 3
+
+# ---------------------------
+# UTILIDADES DE HORA
+# ---------------------------
+def hora_a_minutos(hora):
+    """Acepta minutos desde medianoche o 'HH:MM' / 'HH:MM:SS'."""
+    if isinstance(hora, (int, float)):
+        return float(hora)
+    partes = [int(p) for p in hora.strip().split(':')]
+    if len(partes) == 2:
+        partes.append(0)
+    h, m, s = partes
+    return h * 60 + m + s / 60.0
+
+def formatear_hora(minutos):
+    minutos = int(round(minutos))
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+# ---------------------------
+# HORARIO (ARREGLOS)
+# ---------------------------
+class Horario:
+    """
+    Horario compacto sobre una RedCompilada.
+
+    - Ruta r: paradas `ruta_paradas[ruta_inicio_paradas[r]:ruta_inicio_paradas[r+1]]`
+    - Viaje t de la ruta r en su parada i: posición
+      `ruta_inicio_tiempos[r] + t * num_paradas + i` de `llegadas`/`salidas`
+    - `parada_rutas`: CSR por nodo con pares (ruta, índice de la parada en la ruta)
+    """
+
+    def __init__(self, red, patrones):
+        self.red = red
+        self.ruta_paradas = array('i'); self.ruta_inicio_paradas = array('i', [0])
+        self.ruta_num_viajes = array('i'); self.ruta_inicio_tiempos = array('i', [0])
+        self.llegadas = array('d'); self.salidas = array('d')
+
+        for paradas, viajes in patrones:
+            viajes.sort(key=lambda v: v[0][1])
+            # Separar en sub-rutas sin rebases (FIFO) para poder buscar viajes por bisección
+            subrutas = []
+            for viaje in viajes:
+                for sub in subrutas:
+                    ultimo = sub[-1]
+                    if all(s >= u for (_, s), (_, u) in zip(viaje, ultimo)):
+                        sub.append(viaje)
+                        break
+                else:
+                    subrutas.append([viaje])
+            for sub in subrutas:
+                self.ruta_paradas.extend(paradas)
+                self.ruta_inicio_paradas.append(len(self.ruta_paradas))
+                self.ruta_num_viajes.append(len(sub))
+                for viaje in sub:
+                    for llegada, salida in viaje:
+                        self.llegadas.append(llegada); self.salidas.append(salida)
+                self.ruta_inicio_tiempos.append(len(self.llegadas))
+
+        # Índice inverso parada -> (ruta, índice)
+        por_parada = [[] for _ in range(len(red))]
+        for r in range(len(self.ruta_num_viajes)):
+            for i, p in enumerate(self.ruta_paradas[self.ruta_inicio_paradas[r]:self.ruta_inicio_paradas[r+1]]):
+                por_parada[p].append((r, i))
+        self.parada_rutas_offsets = array('i', [0])
+        self.parada_rutas_ruta = array('i'); self.parada_rutas_indice = array('i')
+        for pares in por_parada:
+            for r, i in pares:
+                self.parada_rutas_ruta.append(r); self.parada_rutas_indice.append(i)
+            self.parada_rutas_offsets.append(len(self.parada_rutas_ruta))
+
+    def num_rutas(self):
+        return len(self.ruta_num_viajes)
+
+    def num_viajes(self):
+        return sum(self.ruta_num_viajes)
+
+def _nodo_de(red, estacion, sistema, id_linea):
+    i = red.id_por_nodo.get((estacion, sistema, id_linea))
+    if i is not None:
+        return i
+    # Variante de escritura: buscar por nombre normalizado en la misma línea
+    for j in red.indice_por_nombre.get(normalizar(estacion), []):
+        if red.lineas[red.nodo_linea[j]] == (sistema, id_linea):
+            return j
+    return None
+
+def _interpolar(tiempos):
+    """Rellena horas faltantes (None) interpolando entre paradas con hora."""
+    conocidos = [i for i, t in enumerate(tiempos) if t is not None]
+    if not conocidos or conocidos[0] != 0 or conocidos[-1] != len(tiempos) - 1:
+        return None
+    for a, b in zip(conocidos, conocidos[1:]):
+        for i in range(a + 1, b):
+            tiempos[i] = tiempos[a] + (tiempos[b] - tiempos[a]) * (i - a) / (b - a)
+    return tiempos
+
+def construir_horario(red, viajes):
+    """
+    Construye un Horario a partir de viajes
+    (sistema, id_linea, [(estacion, llegada, salida), ...]). Los viajes que
+    pasan por estaciones que no están en `red` se descartan.
+    """
+    patrones = defaultdict(list) # tupla de nodos -> [[(llegada, salida), ...], ...]
+    for sistema, id_linea, secuencia in viajes:
+        nodos = [_nodo_de(red, est, sistema, id_linea) for est, _, _ in secuencia]
+        if None in nodos:
+            continue
+        llegadas = _interpolar([ll if ll is not None else sa for _, ll, sa in secuencia])
+        salidas = _interpolar([sa if sa is not None else ll for _, ll, sa in secuencia])
+        if llegadas is None or salidas is None:
+            continue
+        patrones[tuple(nodos)].append(list(zip(llegadas, salidas)))
+    return Horario(red, list(patrones.items()))
+
+def horario_sintetico(red=None, lineas=None, inicio=SERVICE_START, fin=SERVICE_END, intervalos=None):
+    """
+    Genera un horario con salidas cada `intervalos[sistema]` minutos en ambos
+    sentidos de cada línea (por defecto las de `datos_red_transporte.py`),
+    usando los tiempos por tramo de cada línea.
+    """
+    red = red if red is not None else red_base()
+    intervalos = dict(INTERVALOS, **(intervalos or {}))
+    lineas = lineas if lineas is not None else lineas_integradas()
+
+    def viajes():
+        for sistema, id_linea, estaciones, tiempos in lineas:
+            if isinstance(tiempos, (int, float)):
+                tiempos = [tiempos] * (len(estaciones) - 1)
+            intervalo = intervalos.get(sistema, HEADWAY_METRO)
+            for sentido_est, sentido_t in ((estaciones, tiempos), (estaciones[::-1], tiempos[::-1])):
+                salida = inicio
+                while salida <= fin:
+                    t = salida; secuencia = [(sentido_est[0], t, t)]
+                    for est, dt in zip(sentido_est[1:], sentido_t):
+                        t += dt
+                        secuencia.append((est, t, t))
+                    yield sistema, id_linea, secuencia
+                    salida += intervalo
+
+    return construir_horario(red, viajes())
+
+def horario_gtfs(red, directorio, sistema_por_agencia=None):
+    """Horario a partir de los stop_times de un feed GTFS (leídos en streaming)."""
+    from importador_gtfs import viajes_gtfs
+    return construir_horario(red, ((sis, lin, sec) for _, sis, lin, sec in
+                                   viajes_gtfs(directorio, sistema_por_agencia)))
+
+# ---------------------------
+# ALGORITMO RAPTOR
+# ---------------------------
+class _Etiquetas:
+    """Llegadas y etiquetas por ronda; se conservan entre pasadas de rRAPTOR."""
+
+    def __init__(self, n, rondas):
+        self.tau = [array('d', [INF]) * n for _ in range(rondas + 1)]
+        self.mejor = array('d', [INF]) * n
+        self.tipo = [array('b', [_SIN_ETIQUETA]) * n for _ in range(rondas + 1)]
+        self.ruta = [array('i', [-1]) * n for _ in range(rondas + 1)]
+        self.viaje = [array('i', [-1]) * n for _ in range(rondas + 1)]
+        self.sube = [array('i', [-1]) * n for _ in range(rondas + 1)]  # índice de abordaje (o nodo previo si es transbordo)
+        self.baja = [array('i', [-1]) * n for _ in range(rondas + 1)]
+
+def _pasada(h, et, nodos_origen, salida, es_destino, nodos_destino, rondas):
+    """Una pasada de RAPTOR que sale de `nodos_origen` a la hora `salida`."""
+    red = h.red
+    marcadas = set()
+    for o in nodos_origen:
+        if salida < et.tau[0][o]:
+            et.tau[0][o] = salida; et.tipo[0][o] = _ORIGEN
+            et.mejor[o] = min(et.mejor[o], salida)
+            marcadas.add(o)
+
+    ruta_paradas = h.ruta_paradas; inicio_paradas = h.ruta_inicio_paradas
+    inicio_tiempos = h.ruta_inicio_tiempos; num_viajes = h.ruta_num_viajes
+    llegadas = h.llegadas; salidas = h.salidas
+    mejor = et.mejor
+
+    for k in range(1, rondas + 1):
+        if not marcadas:
+            break
+        # Rutas a recorrer, desde la primera parada marcada de cada una
+        cola = {}
+        for p in marcadas:
+            for j in range(h.parada_rutas_offsets[p], h.parada_rutas_offsets[p+1]):
+                r = h.parada_rutas_ruta[j]; i = h.parada_rutas_indice[j]
+                if i < cola.get(r, INF):
+                    cola[r] = i
+        marcadas = set()
+        tau_prev = et.tau[k-1]; tau = et.tau[k]
+        mejor_destino = min(mejor[d] for d in nodos_destino)
+
+        # 1) Recorrer rutas
+        for r, i0 in cola.items():
+            base_p = inicio_paradas[r]; n = inicio_paradas[r+1] - base_p
+            base_t = inicio_tiempos[r]; nv = num_viajes[r]
+            t = -1; sube = -1
+            for i in range(i0, n):
+                p = ruta_paradas[base_p + i]
+                if t != -1:
+                    llegada = llegadas[base_t + t * n + i]
+                    if llegada < mejor[p] and llegada < mejor_destino:
+                        tau[p] = llegada; mejor[p] = llegada
+                        et.tipo[k][p] = _VIAJE; et.ruta[k][p] = r; et.viaje[k][p] = t
+                        et.sube[k][p] = sube; et.baja[k][p] = i
+                        marcadas.add(p)
+                        if es_destino[p]:
+                            mejor_destino = llegada
+                # ¿Se alcanza un viaje anterior en esta parada?
+                listo = tau_prev[p]
+                if listo < INF and (t == -1 or listo <= salidas[base_t + t * n + i]):
+                    nuevo = bisect_left(range(nv), listo, key=lambda v: salidas[base_t + v * n + i])
+                    if nuevo < nv and (t == -1 or nuevo < t):
+                        t = nuevo; sube = i
+
+        # 2) Transbordos (solo desde paradas a las que se llegó en viaje en esta ronda)
+        for p in list(marcadas):
+            for e in range(red.offsets[p], red.offsets[p+1]):
+                if red.modos[e] != MODO_TRANSFER:
+                    continue
+                q = red.destinos[e]; llegada = tau[p] + red.pesos[e]
+                if llegada < mejor[q] and llegada < mejor_destino:
+                    tau[q] = llegada; mejor[q] = llegada
+                    et.tipo[k][q] = _TRANSBORDO; et.sube[k][q] = p
+                    marcadas.add(q)
+
+def _reconstruir(h, et, nodos_destino, salida, rondas):
+    """Arma el resultado para el mejor destino (con el menor número de viajes)."""
+    llegada = min(et.mejor[d] for d in nodos_destino)
+    if llegada == INF:
+        return None
+    k, p = min(((k, d) for k in range(rondas + 1) for d in nodos_destino
+                if et.tau[k][d] == llegada), key=lambda x: x[0])
+
+    camino = [p]
+    while et.tipo[k][p] != _ORIGEN:
+        if et.tipo[k][p] == _TRANSBORDO:
+            p = et.sube[k][p]
+            camino.append(p)
+        else:
+            r = et.ruta[k][p]; base = h.ruta_inicio_paradas[r]
+            for i in range(et.baja[k][p] - 1, et.sube[k][p] - 1, -1):
+                camino.append(h.ruta_paradas[base + i])
+            p = camino[-1]
+            k -= 1
+    camino.reverse()
+
+    resultado = _construir_resultado(h.red, camino, llegada - salida)
+    resultado["hora_salida"] = formatear_hora(salida)
+    resultado["hora_llegada"] = formatear_hora(llegada)
+    return resultado
+
+def _nodos(h, origen_nombre, destino_nombre):
+    red = h.red
+    nodos_origen = red.indice_por_nombre.get(normalizar(origen_nombre), [])
+    nodos_destino = red.indice_por_nombre.get(normalizar(destino_nombre), [])
+    if not nodos_origen:
+        raise ValueError(f"Origen no encontrado: '{origen_nombre}'")
+    if not nodos_destino:
+        raise ValueError(f"Destino no encontrado: '{destino_nombre}'")
+    es_destino = bytearray(len(red))
+    for d in nodos_destino:
+        es_destino[d] = 1
+    return nodos_origen, nodos_destino, es_destino
+
+def consultar_salida(horario, origen_nombre, destino_nombre, hora_salida, max_viajes=MAX_VIAJES):
+    """
+    "Salgo a las 07:40, ¿a qué hora llego?". Devuelve el diccionario de
+    `encontrar_ruta_mas_rapida` más `hora_salida` y `hora_llegada`, o None.
+    `tiempo_min` incluye la espera en el andén.
+    """
+    nodos_origen, nodos_destino, es_destino = _nodos(horario, origen_nombre, destino_nombre)
+    salida = hora_a_minutos(hora_salida)
+    et = _Etiquetas(len(horario.red), max_viajes)
+    _pasada(horario, et, nodos_origen, salida, es_destino, nodos_destino, max_viajes)
+    return _reconstruir(horario, et, nodos_destino, salida, max_viajes)
+
+def consultar_rango(horario, origen_nombre, destino_nombre, desde, hasta, max_viajes=MAX_VIAJES):
+    """
+    rRAPTOR: todas las opciones no dominadas (salir más tarde / llegar más
+    temprano) con salida entre `desde` y `hasta`, ordenadas por hora de salida.
+    """
+    nodos_origen, nodos_destino, es_destino = _nodos(horario, origen_nombre, destino_nombre)
+    desde = hora_a_minutos(desde); hasta = hora_a_minutos(hasta)
+
+    # Horas de salida de todos los viajes que pasan por el origen dentro del intervalo
+    h = horario
+    salidas = set()
+    for o in nodos_origen:
+        for j in range(h.parada_rutas_offsets[o], h.parada_rutas_offsets[o+1]):
+            r = h.parada_rutas_ruta[j]; i = h.parada_rutas_indice[j]
+            n = h.ruta_inicio_paradas[r+1] - h.ruta_inicio_paradas[r]
+            if i == n - 1:
+                continue # Última parada: no se puede abordar
+            base = h.ruta_inicio_tiempos[r]
+            for t in range(h.ruta_num_viajes[r]):
+                s = h.salidas[base + t * n + i]
+                if desde <= s <= hasta:
+                    salidas.add(s)
+
+    et = _Etiquetas(len(h.red), max_viajes)
+    opciones = []; llegada_previa = INF
+    for salida in sorted(salidas, reverse=True):
+        _pasada(h, et, nodos_origen, salida, es_destino, nodos_destino, max_viajes)
+        llegada = min(et.mejor[d] for d in nodos_destino)
+        if llegada < llegada_previa:
+            opciones.append(_reconstruir(h, et, nodos_destino, salida, max_viajes))
+            llegada_previa = llegada
+    opciones.reverse()
+    return opciones
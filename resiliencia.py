@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+resiliencia.py
+
+Análisis de resiliencia de la red: cuánto empeoran los tiempos entre todos
+los pares origen-destino al cerrar cada estación o cada tramo (los mismos
+cierres que aceptan `construir_cierres` y `parsear_tramos_cerrados`).
+
+En lugar de reconstruir la red y repetir todas las búsquedas por escenario:
+ - Se calcula una vez el árbol de caminos mínimos de cada estación origen
+   (distancias, predecesores y un recorrido en preorden con el tamaño de
+   cada subárbol).
+ - Un cierre solo afecta a los orígenes cuyo árbol usa el nodo o la arista
+   cerrada; el resto de las filas queda igual.
+ - En un origen afectado solo cambian los nodos del subárbol que cuelga del
+   elemento cerrado (un rango contiguo del preorden). Sus distancias se
+   recalculan con un Dijkstra limitado a ese subárbol, sembrado desde los
+   nodos vecinos que conservan su distancia (actualización dinámica
+   decreciente del árbol).
+
+Los escenarios se reparten entre procesos que reciben los árboles una vez,
+al iniciar, y los resultados se entregan conforme terminan.
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import argparse
+import heapq
+import json
+import os
+import sys
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from multiprocessing import Pool
+
+from buscador_rutas import (
+    red_base, usar_red_base, normalizar, construir_cierres, parsear_tramos_cerrados,
+    _dijkstra, INF, MODO_TRANSFER
+)
+
+# Clasificaciones del informe: criterio -> (título, claves de orden). La demora
+# y la desconexión se ordenan por separado: sumar pares sin ruta como minutos
+# dejaría arriba a las estaciones terminales de ramales sin alternativa
+CRITERIOS = {
+    'demora': ("Más críticos por demora (minutos extra en pares que siguen conectados)",
+               ('minutos_extra', 'pares_afectados')),
+    'desconexion': ("Más críticos por desconexión (pares que se quedan sin ruta)",
+                    ('pares_sin_ruta', 'minutos_extra')),
+}
+
+# ---------------------------
+# ESCENARIOS
+# ---------------------------
+def escenarios_red(red, estaciones=True, tramos=True):
+    """
+    Lista de escenarios de un solo cierre: cada estación y cada tramo a
+    bordo (par de estaciones consecutivas en un sistema, en ambos sentidos).
+    Cada escenario es (tipo, etiqueta, estaciones_cerradas, tramos_cerrados).
+    """
+    mostrar = _nombres_para_mostrar(red)
+    escenarios = []
+    if estaciones:
+        for clave in red.indice_por_nombre:
+            escenarios.append(("estacion", mostrar[clave], [mostrar[clave]], []))
+    if tramos:
+        vistos = set()
+        for u in range(len(red)):
+            a = red.nombres[red.nodo_estacion[u]]
+            sistema = red.sistemas[red.nodo_sistema[u]]
+            for e in range(red.offsets[u], red.offsets[u+1]):
+                if red.modos[e] == MODO_TRANSFER:
+                    continue
+                b = red.nombres[red.nodo_estacion[red.destinos[e]]]
+                clave = (min(a, b), max(a, b), sistema)
+                if a == b or clave in vistos:
+                    continue
+                vistos.add(clave)
+                na, nb = mostrar[clave[0]], mostrar[clave[1]]
+                escenarios.append(("tramo", f"{na} - {nb} ({sistema})", [], [(na, nb, sistema)]))
+    return escenarios
+
+def _nombres_para_mostrar(red):
+    """{clave normalizada: escritura más frecuente entre sus nodos}."""
+    return {clave: Counter(red.nodos[i][0] for i in ids).most_common(1)[0][0]
+            for clave, ids in red.indice_por_nombre.items()}
+
+def _marcados(banderas):
+    """Índices con valor 1 en un bytearray de cierres."""
+    i = banderas.find(1)
+    while i != -1:
+        yield i
+        i = banderas.find(1, i + 1)
+
+# ---------------------------
+# ÁRBOLES POR ORIGEN
+# ---------------------------
+class AnalisisResiliencia:
+    """
+    Árboles de caminos mínimos de cada estación (o de las `estaciones`
+    dadas) sobre la red base, y evaluación incremental de escenarios de
+    cierre sobre ellos. Los pares se miden entre estaciones: el tiempo a un
+    destino es el mínimo sobre sus nodos (una por línea).
+    """
+
+    def __init__(self, red=None, estaciones=None):
+        red = red if red is not None else red_base()
+        self.red = red
+        self.inversa = red.invertida()
+        claves = list(red.indice_por_nombre) if estaciones is None else \
+            list(dict.fromkeys(normalizar(e) for e in estaciones))
+        for clave in claves:
+            if clave not in red.indice_por_nombre:
+                raise ValueError(f"Estación no encontrada: '{clave}'")
+        mostrar = _nombres_para_mostrar(red)
+        self.claves = claves
+        self.mostrar = [mostrar[c] for c in claves]
+        self.grupos = [red.indice_por_nombre[c] for c in claves]
+        self.nodo_grupo = array('i', [-1]) * len(red)
+        for g, ids in enumerate(self.grupos):
+            for i in ids:
+                self.nodo_grupo[i] = g
+
+        # Por origen: dist, prev, preorden, posición en el preorden y tamaño del subárbol
+        self.dist = []; self.prev = []; self.preorden = []; self.posicion = []; self.tamano = []
+        self.filas = [] # tiempo base a cada grupo destino
+        for ids in self.grupos:
+            dist, prev, _ = _dijkstra(red, ids)
+            preorden, posicion, tamano = _preorden(prev, ids)
+            self.dist.append(dist); self.prev.append(prev)
+            self.preorden.append(preorden); self.posicion.append(posicion); self.tamano.append(tamano)
+            self.filas.append(array('d', (min(dist[i] for i in grupo) for grupo in self.grupos)))
+
+    def tamano_bytes(self):
+        """Memoria aproximada de los árboles y las filas base."""
+        return sum(a.itemsize * len(a) for arreglos in (self.dist, self.prev, self.preorden,
+                                                         self.posicion, self.tamano, self.filas)
+                   for a in arreglos)
+
+    def _raices_cortadas(self, s, nodos_cerrados, aristas_cerradas, arista_cerrada):
+        """
+        Nodos cuyo subárbol (en el árbol del origen `s`) pierde su camino
+        mínimo: nodos cerrados con hijos y destinos de aristas cerradas del
+        árbol. `aristas_cerradas` son tuplas (u, v, e) y `arista_cerrada` el
+        bytearray de la capa de cierres.
+        """
+        dist = self.dist[s]; prev = self.prev[s]; tamano = self.tamano[s]; posicion = self.posicion[s]
+        red = self.red; offsets = red.offsets; destinos = red.destinos; pesos = red.pesos
+        raices = [c for c in nodos_cerrados if posicion[c] != -1 and tamano[c] > 1]
+        for u, v, e in aristas_cerradas:
+            if prev[v] != u or dist[u] + pesos[e] != dist[v] or v in nodos_cerrados:
+                continue
+            # Otra arista u -> v abierta con el mismo tiempo mantiene el camino
+            if not any(destinos[f] == v and not arista_cerrada[f] and dist[u] + pesos[f] == dist[v]
+                       for f in range(offsets[u], offsets[u+1])):
+                raices.append(v)
+        return raices
+
+    def _reparar(self, s, raices, cierres, cierres_inversa):
+        """
+        Recalcula las distancias del origen `s` en los subárboles de
+        `raices`. Devuelve (dist nueva, nodos recalculados).
+        """
+        red = self.red; inversa = self.inversa
+        preorden = self.preorden[s]; posicion = self.posicion[s]; tamano = self.tamano[s]
+        nodo_cerrado = cierres.nodos; arista_cerrada = cierres.aristas
+        dist = array('d', self.dist[s])
+        invalido = bytearray(len(red))
+        recalculados = []
+        for r in raices:
+            inicio = posicion[r]
+            for v in preorden[inicio:inicio + tamano[r]]:
+                if not invalido[v]:
+                    invalido[v] = 1
+                    dist[v] = INF
+                    if not nodo_cerrado[v]:
+                        recalculados.append(v)
+
+        # Semillas: mejor llegada a cada nodo inválido desde un nodo que conserva su distancia
+        offsets_inv = inversa.offsets; destinos_inv = inversa.destinos; pesos_inv = inversa.pesos
+        arista_cerrada_inv = cierres_inversa.aristas
+        heap = []
+        for v in recalculados:
+            mejor = INF
+            for p in range(offsets_inv[v], offsets_inv[v+1]):
+                u = destinos_inv[p]
+                if invalido[u] or nodo_cerrado[u] or arista_cerrada_inv[p]:
+                    continue
+                t = dist[u] + pesos_inv[p]
+                if t < mejor:
+                    mejor = t
+            if mejor < INF:
+                dist[v] = mejor
+                heap.append((mejor, v))
+        heapq.heapify(heap)
+
+        # Dijkstra limitado a los nodos inválidos
+        offsets = red.offsets; destinos = red.destinos; pesos = red.pesos
+        heappop = heapq.heappop; heappush = heapq.heappush
+        while heap:
+            t, u = heappop(heap)
+            if t > dist[u]:
+                continue
+            for e in range(offsets[u], offsets[u+1]):
+                v = destinos[e]
+                if not invalido[v] or arista_cerrada[e] or nodo_cerrado[v]:
+                    continue
+                nuevo = t + pesos[e]
+                if nuevo < dist[v]:
+                    dist[v] = nuevo
+                    heappush(heap, (nuevo, v))
+        return dist, recalculados
+
+    def evaluar(self, estaciones_cerradas=None, tramos_cerrados=None, cierres=None):
+        """
+        Evalúa un escenario de cierre y devuelve un diccionario con el
+        impacto sobre los pares entre estaciones que siguen abiertas. La
+        demora y la desconexión se cuentan por separado: `minutos_extra` y
+        `pares_afectados` solo incluyen pares que siguen teniendo ruta (más
+        lenta), y `pares_sin_ruta` los que la pierden. También el mayor
+        aumento (y su par) y cuántos orígenes hubo que recalcular.
+        """
+        red = self.red
+        if cierres is None:
+            cierres = construir_cierres(red, estaciones_cerradas, tramos_cerrados)
+        cierres_inversa = cierres.invertidos(self.inversa)
+        nodos_cerrados = set(_marcados(cierres.nodos))
+        aristas_cerradas = [(bisect_right(red.offsets, e) - 1, red.destinos[e], e)
+                            for e in _marcados(cierres.aristas)]
+        grupo_cerrado = [all(cierres.nodos[i] for i in grupo) for grupo in self.grupos]
+
+        minutos_extra = 0.0; afectados = 0; sin_ruta = 0; recalculados = 0
+        max_extra = 0.0; peor_par = None
+        for s in range(len(self.grupos)):
+            if grupo_cerrado[s]:
+                continue
+            raices = self._raices_cortadas(s, nodos_cerrados, aristas_cerradas, cierres.aristas)
+            if not raices:
+                continue
+            recalculados += 1
+            dist, nodos = self._reparar(s, raices, cierres, cierres_inversa)
+            fila = self.filas[s]
+            for g in {self.nodo_grupo[v] for v in nodos}:
+                if g == -1 or g == s or grupo_cerrado[g]:
+                    continue
+                nuevo = min(dist[i] for i in self.grupos[g])
+                if nuevo <= fila[g]:
+                    continue
+                if nuevo == INF:
+                    sin_ruta += 1
+                    continue
+                afectados += 1
+                extra = nuevo - fila[g]
+                minutos_extra += extra
+                if extra > max_extra:
+                    max_extra = extra; peor_par = (self.mostrar[s], self.mostrar[g])
+
+        return {
+            "minutos_extra": minutos_extra,
+            "pares_afectados": afectados,
+            "pares_sin_ruta": sin_ruta,
+            "max_extra_min": max_extra,
+            "peor_par": peor_par,
+            "origenes_recalculados": recalculados,
+        }
+
+def _preorden(prev, raices):
+    """
+    Recorre el árbol de `prev` en profundidad desde `raices` y devuelve
+    (preorden, posición de cada nodo o -1, tamaño de cada subárbol): el
+    subárbol de v es preorden[posicion[v] : posicion[v] + tamano[v]].
+    """
+    n = len(prev)
+    hijos = [[] for _ in range(n)]
+    for v in range(n):
+        if prev[v] != -1:
+            hijos[prev[v]].append(v)
+    preorden = array('i'); posicion = array('i', [-1]) * n; tamano = array('i', [0]) * n
+    for r in raices:
+        pila = [r]
+        while pila:
+            v = pila.pop()
+            posicion[v] = len(preorden)
+            preorden.append(v)
+            pila.extend(hijos[v])
+    for v in reversed(preorden):
+        tamano[v] += 1
+        if prev[v] != -1:
+            tamano[prev[v]] += tamano[v]
+    return preorden, posicion, tamano
+
+# ---------------------------
+# PROCESOS TRABAJADORES
+# ---------------------------
+_analisis_trabajador = None
+
+def _iniciar_trabajador(analisis):
+    # Se ejecuta una vez por proceso: los árboles quedan en memoria para todos sus escenarios
+    global _analisis_trabajador
+    _analisis_trabajador = analisis
+
+def _evaluar_escenario(analisis, escenario):
+    tipo, etiqueta, estaciones_cerradas, tramos_cerrados = escenario
+    resultado = {"escenario": etiqueta, "tipo": tipo}
+    resultado.update(analisis.evaluar(estaciones_cerradas, tramos_cerrados))
+    return resultado
+
+def _tarea_escenario(escenario):
+    return _evaluar_escenario(_analisis_trabajador, escenario)
+
+# ---------------------------
+# API
+# ---------------------------
+def iterar_escenarios(escenarios=None, analisis=None, procesos=None):
+    """
+    Genera el resultado de cada escenario (ver `escenarios_red`) en el orden
+    en que se terminan. `procesos` indica cuántos procesos usar (None =
+    todos los núcleos, 1 = en el proceso actual, sin pool).
+    """
+    analisis = analisis if analisis is not None else AnalisisResiliencia()
+    escenarios = list(escenarios) if escenarios is not None else escenarios_red(analisis.red)
+
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(escenarios) <= 1:
+        for escenario in escenarios:
+            yield _evaluar_escenario(analisis, escenario)
+        return
+
+    with Pool(min(procesos, len(escenarios)), initializer=_iniciar_trabajador,
+              initargs=(analisis,)) as pool:
+        tam_lote = max(1, len(escenarios) // (procesos * 8))
+        yield from pool.imap_unordered(_tarea_escenario, escenarios, tam_lote)
+
+def clasificar(resultados, criterio="demora"):
+    """
+    Resultados del más al menos crítico según `criterio` (ver CRITERIOS).
+    Para 'desconexion' solo quedan los escenarios que dejan pares sin ruta.
+    """
+    claves = CRITERIOS[criterio][1]
+    if criterio == 'desconexion':
+        resultados = [r for r in resultados if r["pares_sin_ruta"]]
+    return sorted(resultados, key=lambda r: tuple(-r[c] for c in claves) + (r["escenario"],))
+
+def analizar_resiliencia(escenarios=None, analisis=None, procesos=None, criterio="demora"):
+    """Evalúa todos los escenarios y los devuelve clasificados según `criterio`."""
+    return clasificar(list(iterar_escenarios(escenarios, analisis, procesos)), criterio)
+
+def imprimir_informe(resultados, limite=20, criterio="demora"):
+    """Imprime la tabla de los escenarios más críticos según `criterio`."""
+    clasificados = clasificar(resultados, criterio)
+    print(CRITERIOS[criterio][0])
+    if not clasificados:
+        print("  (ninguno)")
+        return
+    print(f"{'#':>3}  {'Escenario':<48} {'Min. extra':>11} {'Afectados':>10} {'Sin ruta':>9} {'Máx.':>6}")
+    for i, r in enumerate(clasificados[:limite], 1):
+        print(f"{i:>3}  {r['escenario'][:48]:<48} {r['minutos_extra']:>11.0f} {r['pares_afectados']:>10} "
+              f"{r['pares_sin_ruta']:>9} {r['max_extra_min']:>6.1f}")
+        if r["peor_par"]:
+            print(f"{'':5}peor par: {r['peor_par'][0]} -> {r['peor_par'][1]}")
+
+# ---------------------------
+# PROGRAMA PRINCIPAL
+# ---------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Análisis de resiliencia de la red CDMX")
+    parser.add_argument('--snapshot', default=None, help="Archivo de snapshot_red.py a cargar")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos (1 = sin pool)")
+    parser.add_argument('--solo', choices=('estaciones', 'tramos'), default=None,
+                        help="Evaluar solo cierres de estaciones o solo de tramos")
+    parser.add_argument('--estaciones', default=None,
+                        help="Estaciones a evaluar, separadas por comas (un escenario cada una)")
+    parser.add_argument('--tramos', default=None,
+                        help='Tramos a evaluar, ej: "Pino Suárez-Zócalo, Chabacano-Viaducto:METRO"')
+    parser.add_argument('--criterio', choices=tuple(CRITERIOS), default=None,
+                        help="Imprimir solo esta clasificación (por defecto, ambas)")
+    parser.add_argument('--limite', type=int, default=20, help="Escenarios en el informe")
+    parser.add_argument('--salida', default=None, help="Archivo JSONL con cada escenario al terminar")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        from snapshot_red import cargar_snapshot
+        usar_red_base(cargar_snapshot(args.snapshot))
+    analisis = AnalisisResiliencia()
+
+    if args.estaciones or args.tramos:
+        escenarios = [("estacion", e.strip(), [e.strip()], [])
+                      for e in (args.estaciones or "").split(",") if e.strip()]
+        escenarios += [("tramo", f"{a} - {b}" + (f" ({s})" if s != 'ANY' else ""), [], [(a, b, s)])
+                       for a, b, s in parsear_tramos_cerrados(args.tramos)]
+    else:
+        escenarios = escenarios_red(analisis.red, args.solo != 'tramos', args.solo != 'estaciones')
+
+    salida = open(args.salida, 'w', encoding='utf-8') if args.salida else None
+    resultados = []
+    try:
+        for r in iterar_escenarios(escenarios, analisis, args.procesos):
+            resultados.append(r)
+            if salida:
+                salida.write(json.dumps(r, ensure_ascii=False) + "\n")
+                salida.flush()
+            print(f"\r{len(resultados)}/{len(escenarios)} escenarios", end='', file=sys.stderr)
+    finally:
+        if salida:
+            salida.close()
+    print(file=sys.stderr)
+
+    for i, criterio in enumerate([args.criterio] if args.criterio else list(CRITERIOS)):
+        if i:
+            print()
+        imprimir_informe(resultados, args.limite, criterio)
+
+if __name__ == "__main__":
+    main()
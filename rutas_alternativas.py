@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+rutas_alternativas.py
+
+Rutas alternativas: las k rutas más rápidas sin ciclos (algoritmo de Yen)
+descartando las que casi repiten a una ruta ya elegida.
+
+Estado compartido entre las búsquedas:
+ - Un solo Dijkstra hacia atrás desde el destino (sobre la red invertida y
+   con los mismos cierres) da el árbol de caminos mínimos hacia el destino:
+   de él sale directamente la primera ruta, y su distancia d(v, destino) es
+   la cota exacta que usa cada búsqueda de desvío (A*), así que cada desvío
+   sigue el árbol en cuanto se separa de la raíz y solo explora de más
+   cuando el árbol pasa por lo que ese desvío tiene prohibido.
+ - Los desvíos no modifican la red: los nodos de la raíz y las aristas ya
+   usadas se excluyen con conjuntos pequeños por búsqueda, y los cierres
+   son la misma capa de `construir_cierres`.
+
+Una candidata se descarta si más de `max_compartido` de su tiempo a bordo
+va por tramos (estación a estación, en la misma línea) que ya recorre
+alguna de las rutas elegidas, o si tarda más de `max_factor` veces la ruta
+más rápida. Ese límite también acota el árbol: la búsqueda hacia atrás se
+detiene en ese radio y los nodos más lejanos no pueden estar en ninguna
+alternativa aceptable.
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import heapq
+import weakref
+
+from buscador_rutas import (
+    red_base, normalizar, _dijkstra, _construir_resultado, _tiempo_camino,
+    _acumular_estadisticas, INF
+)
+
+# Fracción máxima del tiempo a bordo compartida con una ruta ya elegida
+MAX_COMPARTIDO = 0.6
+# Tiempo máximo de una alternativa, en múltiplos de la ruta más rápida
+FACTOR_TIEMPO_MAX = 1.5
+# Rutas (de Yen) que se examinan por cada alternativa pedida
+ITERACIONES_POR_RUTA = 10
+
+# Red invertida por red (se calcula una vez y se comparte entre consultas)
+_INVERSAS = weakref.WeakKeyDictionary()
+
+def _inversa(red):
+    inversa = _INVERSAS.get(red)
+    if inversa is None:
+        inversa = _INVERSAS[red] = red.invertida()
+    return inversa
+
+# ---------------------------
+# TRAMOS COMPARTIDOS
+# ---------------------------
+def _tramos(red, camino):
+    """{(estacion_a, estacion_b, linea): tiempo} de los tramos a bordo del camino."""
+    tramos = {}
+    for u, v in zip(camino, camino[1:]):
+        if red.nodo_linea[u] == red.nodo_linea[v] and red.nodo_estacion[u] != red.nodo_estacion[v]:
+            clave = (red.nodo_estacion[u], red.nodo_estacion[v], red.nodo_linea[u])
+            tramos[clave] = min(red.pesos[e] for e in range(red.offsets[u], red.offsets[u+1])
+                                if red.destinos[e] == v)
+    return tramos
+
+def _fraccion_compartida(tramos, otros):
+    """Fracción del tiempo a bordo de `tramos` que también está en `otros`."""
+    total = sum(tramos.values())
+    if not total:
+        return 1.0 if tramos == otros else 0.0
+    return sum(t for clave, t in tramos.items() if clave in otros) / total
+
+# ---------------------------
+# DESVÍOS
+# ---------------------------
+def _primeros_pasos(red, fuentes, bloqueados, excluidos, cota, limite, cierres):
+    """
+    Primeros pasos posibles de un desvío: [(cota_inferior, camino_inicial)].
+    En el origen (sin nodos bloqueados) son las propias fuentes; desde un
+    nodo de desvío son sus aristas permitidas.
+    """
+    if not bloqueados:
+        return [(t + cota[o], [o]) for t, o in fuentes if t + cota[o] <= limite]
+    t, u = fuentes[0]
+    nodo_cerrado = cierres.nodos if cierres else None
+    pasos = []
+    for e in range(red.offsets[u], red.offsets[u+1]):
+        v = red.destinos[e]
+        if t + red.pesos[e] + cota[v] > limite or v in excluidos or v in bloqueados:
+            continue
+        if nodo_cerrado is not None and (cierres.aristas[e] or nodo_cerrado[v]):
+            continue
+        pasos.append((t + red.pesos[e] + cota[v], [u, v]))
+    return pasos
+
+def _desvio(red, fuentes, bloqueados, excluidos, es_destino, cota, siguiente, limite, cierres,
+            estadisticas):
+    """
+    Camino más corto desde `fuentes` [(tiempo_inicial, nodo)] hasta el
+    primer destino, sin pasar por `excluidos`, sin usar aristas de una
+    fuente a un nodo de `bloqueados` y sin superar `limite`. `cota[v]` y
+    `siguiente[v]` son la distancia y el siguiente nodo hacia el destino en
+    el árbol sin exclusiones (válidos donde cota[v] <= limite). Devuelve el
+    camino o None.
+    """
+    # Atajo: si el mejor primer paso continúa por el árbol sin tocar nodos
+    # excluidos, ese camino alcanza la cota inferior y es el óptimo
+    pasos = _primeros_pasos(red, fuentes, bloqueados, excluidos, cota, limite, cierres)
+    if not pasos:
+        return None
+    _, camino = min(pasos, key=lambda p: p[0])
+    u = siguiente[camino[-1]]
+    arbol = list(camino)
+    while u != -1 and u not in excluidos:
+        arbol.append(u); u = siguiente[u]
+    if u == -1:
+        return arbol
+
+    # Si no, A* con la distancia del árbol como cota (consistente)
+    offsets = red.offsets; destinos = red.destinos; pesos = red.pesos
+    nodo_cerrado = cierres.nodos if cierres else None
+    arista_cerrada = cierres.aristas if cierres else None
+
+    dist = {}; prev = {}
+    heap = []
+    for t, o in fuentes:
+        if t + cota[o] <= limite and t < dist.get(o, INF):
+            dist[o] = t; prev[o] = -1
+            heap.append((t + cota[o], t, o))
+    heapq.heapify(heap)
+    es_fuente = set(dist)
+
+    inserciones = len(heap); extracciones = 0; obsoletas = 0; max_heap = len(heap)
+    final = None
+    while heap:
+        if len(heap) > max_heap:
+            max_heap = len(heap)
+        _, tiempo_actual, u = heapq.heappop(heap)
+        extracciones += 1
+        if tiempo_actual > dist[u]:
+            obsoletas += 1
+            continue
+        if es_destino[u]:
+            final = u
+            break
+        for e in range(offsets[u], offsets[u+1]):
+            v = destinos[e]
+            if v in excluidos or (u in es_fuente and v in bloqueados):
+                continue
+            if nodo_cerrado is not None and (arista_cerrada[e] or nodo_cerrado[v]):
+                continue
+            nuevo_tiempo = tiempo_actual + pesos[e]
+            if nuevo_tiempo + cota[v] <= limite and nuevo_tiempo < dist.get(v, INF):
+                dist[v] = nuevo_tiempo
+                prev[v] = u
+                heapq.heappush(heap, (nuevo_tiempo + cota[v], nuevo_tiempo, v))
+                inserciones += 1
+
+    if estadisticas is not None:
+        _acumular_estadisticas(estadisticas, inserciones, extracciones, obsoletas, max_heap)
+    if final is None:
+        return None
+    camino = []
+    u = final
+    while u != -1:
+        camino.append(u); u = prev[u]
+    camino.reverse()
+    return camino
+
+# ---------------------------
+# BÚSQUEDA
+# ---------------------------
+def rutas_alternativas(origen_nombre, destino_nombre, k=3, red=None, cierres=None,
+                       max_compartido=MAX_COMPARTIDO, max_factor=FACTOR_TIEMPO_MAX,
+                       estadisticas=None):
+    """
+    Devuelve hasta `k` rutas ordenadas por tiempo: la más rápida y
+    alternativas que no comparten más de `max_compartido` de su tiempo a
+    bordo con ninguna ruta anterior ni tardan más de `max_factor` veces la
+    más rápida. Cada ruta tiene la forma del resultado
+    de `encontrar_ruta_mas_rapida` más la llave "compartido" (fracción
+    máxima compartida con las rutas anteriores). Lista vacía si no hay ruta.
+
+    Los desvíos de Yen se evalúan de forma perezosa: cada uno entra al heap
+    de candidatas con su cota inferior y solo se busca cuando llega al
+    frente, así que los que nunca podrían ser elegidos no se calculan.
+    """
+    red = red if red is not None else red_base()
+    nodos_origen = red.indice_por_nombre.get(normalizar(origen_nombre), [])
+    nodos_destino = red.indice_por_nombre.get(normalizar(destino_nombre), [])
+    if cierres:
+        nodos_origen = [i for i in nodos_origen if not cierres.nodos[i]]
+        nodos_destino = [i for i in nodos_destino if not cierres.nodos[i]]
+    if not nodos_origen:
+        raise ValueError(f"Origen no encontrado: '{origen_nombre}'")
+    if not nodos_destino:
+        raise ValueError(f"Destino no encontrado: '{destino_nombre}'")
+
+    # Árbol de caminos mínimos hacia el destino (compartido por todos los
+    # desvíos), hasta max_factor veces el tiempo de la ruta más rápida
+    inversa = _inversa(red)
+    es_origen = bytearray(len(red))
+    for o in nodos_origen:
+        es_origen[o] = 1
+    cota, siguiente, inicio = _dijkstra(inversa, nodos_destino, es_origen,
+                                        cierres.invertidos(inversa) if cierres else None,
+                                        estadisticas=estadisticas, margen=max_factor)
+    if inicio is None:
+        return []
+    limite = cota[inicio] * max_factor
+    primera = [inicio]
+    while siguiente[primera[-1]] != -1:
+        primera.append(siguiente[primera[-1]])
+
+    es_destino = bytearray(len(red))
+    for d in nodos_destino:
+        es_destino[d] = 1
+
+    # Rutas de Yen ya extraídas (incluye las descartadas) como árbol de
+    # prefijos: los hijos del nodo de la raíz ruta[:i] son los siguientes
+    # nodos que un desvío desde esa raíz ya no puede usar
+    prefijos = {}
+    elegidas = [(primera, _tramos(red, primera), 0.0)]
+    vistas = {tuple(primera)}
+    # Heap de candidatas: (tiempo o cota inferior, contador, camino, raíz,
+    # hijos de la raíz, tiempo de la raíz); camino es None mientras el
+    # desvío desde esa raíz no se ha buscado
+    candidatas = []
+    contador = 0
+
+    def fuentes_y_bloqueos(raiz, hijos, tiempo_raiz):
+        if not raiz:
+            return [(0.0, o) for o in nodos_origen if o not in hijos], set()
+        return [(tiempo_raiz, raiz[-1])], set(hijos)
+
+    def agregar_desvios(ruta, desde):
+        # Un desvío pendiente por cada raíz ruta[:i] con i >= desde (índice
+        # donde la ruta se separó de su madre: las raíces anteriores no
+        # cambian de nodos bloqueados y darían los mismos desvíos)
+        nonlocal contador
+        nodo = prefijos
+        tiempo_raiz = 0.0   # tiempo hasta ruta[i-1], el nodo de desvío
+        for i in range(len(ruta)):
+            if i >= 2:
+                tiempo_raiz += _tiempo_camino(red, ruta[i-2:i], cierres)
+            hijos = nodo
+            nodo = nodo.setdefault(ruta[i], {})
+            if i < desde:
+                continue
+            raiz = ruta[:i]
+            fuentes, bloqueados = fuentes_y_bloqueos(raiz, hijos, tiempo_raiz)
+            pasos = _primeros_pasos(red, fuentes, bloqueados, set(raiz), cota, limite, cierres)
+            if pasos:
+                contador += 1
+                heapq.heappush(candidatas, (min(p[0] for p in pasos), contador, None,
+                                            raiz, hijos, tiempo_raiz))
+
+    agregar_desvios(primera, 0)
+    iteraciones = 0
+    while candidatas and len(elegidas) < k and iteraciones < k * ITERACIONES_POR_RUTA:
+        tiempo, _, camino, raiz, hijos, tiempo_raiz = heapq.heappop(candidatas)
+        if camino is None:
+            # Desvío pendiente: buscarlo y volver a encolarlo con su tiempo real
+            fuentes, bloqueados = fuentes_y_bloqueos(raiz, hijos, tiempo_raiz)
+            desvio = _desvio(red, fuentes, bloqueados, set(raiz), es_destino, cota, siguiente,
+                             limite, cierres, estadisticas)
+            if desvio is not None:
+                camino = raiz[:-1] + desvio if raiz else desvio
+                if tuple(camino) not in vistas:
+                    vistas.add(tuple(camino))
+                    contador += 1
+                    heapq.heappush(candidatas, (_tiempo_camino(red, camino, cierres), contador,
+                                                camino, raiz, hijos, tiempo_raiz))
+            continue
+
+        iteraciones += 1
+        agregar_desvios(camino, len(raiz))
+        tramos = _tramos(red, camino)
+        compartido = max(_fraccion_compartida(tramos, otros) for _, otros, _ in elegidas)
+        if compartido <= max_compartido:
+            elegidas.append((camino, tramos, compartido))
+
+    rutas = []
+    for camino, _, compartido in elegidas:
+        resultado = _construir_resultado(red, camino, _tiempo_camino(red, camino, cierres))
+        resultado["compartido"] = round(compartido, 2)
+        rutas.append(resultado)
+    return rutas
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+servicio_http.py
+
+Modo servicio: servidor HTTP/JSON con asyncio (solo biblioteca estándar)
+que carga la red una vez y atiende consultas de forma concurrente.
+
+Endpoints:
+ - GET  /salud                      -> {"estado": "ok", ...}
+ - GET  /estaciones?q=texto&limite=N -> estaciones cuyo nombre coincide
+ - POST /ruta   {"origen", "destino", "estaciones_cerradas", "tramos_cerrados",
+                 "alternativas" (opcional, número de rutas alternativas)}
+ - POST /rutas  {"consultas": [ {...como /ruta...}, ... ]}
+
+Cada respuesta de ruta incluye "origen" y "destino" tal como se resolvieron
+(alias y errores de escritura se corrigen al nombre de la estación).
+
+Las búsquedas (CPU) se ejecutan en un pool de procesos; cada proceso carga
+la red (o el snapshot) una vez al iniciar y mantiene su propia caché de
+rutas. El servidor limita las búsquedas simultáneas, rechaza con 503 cuando
+la cola de espera está llena (contrapresión) y responde 504 si una búsqueda
+excede el tiempo límite.
+
+Uso:
+    python3 servicio_http.py --puerto 8080 [--snapshot red_cdmx.bin] [--procesos 4]
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+from buscador_rutas import red_base, usar_red_base, parsear_tramos_cerrados, construir_cierres
+from cache_rutas import CacheRutas
+from indice_nombres import IndiceNombres
+from rutas_alternativas import rutas_alternativas
+
+# Límites del protocolo
+MAX_CABECERAS = 16 * 1024
+MAX_CUERPO = 1024 * 1024
+MAX_CONSULTAS_LOTE = 500
+MAX_ALTERNATIVAS = 5
+TIEMPO_INACTIVO = 30.0   # segundos sin peticiones antes de cerrar una conexión
+
+_MOTIVOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error',
+            503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+# ---------------------------
+# TRABAJO EN LOS PROCESOS
+# ---------------------------
+_cache_trabajador = None
+_indice_trabajador = None
+
+def _iniciar_trabajador(ruta_snapshot, capacidad_cache):
+    # Se ejecuta una vez por proceso: carga la red y crea su caché e índice de nombres
+    global _cache_trabajador, _indice_trabajador
+    if ruta_snapshot:
+        from snapshot_red import cargar_snapshot
+        usar_red_base(cargar_snapshot(ruta_snapshot))
+    else:
+        red_base()
+    _cache_trabajador = CacheRutas(capacidad=capacidad_cache)
+    _indice_trabajador = IndiceNombres(red_base())
+
+def _corregir(texto):
+    # Nombre exacto, alias o el más parecido (errores de escritura)
+    clave = _indice_trabajador.resolver(texto)
+    return texto if clave is None else _indice_trabajador.nombre(clave)
+
+def _tramos(valor):
+    # Acepta el texto de la consola ("A-B, C-D:METRO") o una lista de tramos
+    if isinstance(valor, str):
+        return parsear_tramos_cerrados(valor)
+    return [tuple(t) if isinstance(t, list) else t for t in (valor or [])]
+
+def _resolver(consulta):
+    """Resuelve una consulta de ruta; devuelve {"ruta": ...} o {"error": ...}."""
+    try:
+        origen, destino = _corregir(consulta["origen"]), _corregir(consulta["destino"])
+        estaciones_cerradas = consulta.get("estaciones_cerradas") or []
+        tramos_cerrados = _tramos(consulta.get("tramos_cerrados"))
+        ruta = _cache_trabajador.buscar(origen, destino, estaciones_cerradas, tramos_cerrados)
+        respuesta = {"origen": origen, "destino": destino, "ruta": ruta}
+        k = min(int(consulta.get("alternativas") or 0), MAX_ALTERNATIVAS)
+        if ruta is not None and k > 0:
+            red = red_base()
+            cierres = construir_cierres(red, estaciones_cerradas, tramos_cerrados)
+            respuesta["alternativas"] = rutas_alternativas(origen, destino, k + 1, red, cierres)[1:]
+        return respuesta
+    except ValueError as ve:
+        return {"error": str(ve)}
+
+def _validar_consulta(consulta):
+    """Mensaje de error si los campos de una consulta de ruta no tienen el tipo esperado (o None)."""
+    if not isinstance(consulta, dict) or "origen" not in consulta or "destino" not in consulta:
+        return "Faltan 'origen' y 'destino'"
+    if not isinstance(consulta["origen"], str) or not isinstance(consulta["destino"], str):
+        return "'origen' y 'destino' deben ser textos"
+    cerradas = consulta.get("estaciones_cerradas")
+    if cerradas is not None and not (isinstance(cerradas, list) and all(isinstance(e, str) for e in cerradas)):
+        return "'estaciones_cerradas' debe ser una lista de textos"
+    tramos = consulta.get("tramos_cerrados")
+    if tramos is not None and not isinstance(tramos, str) and not (
+            isinstance(tramos, list) and all(isinstance(t, list) and len(t) in (2, 3)
+                                             and all(isinstance(x, str) for x in t) for t in tramos)):
+        return "'tramos_cerrados' debe ser un texto \"A-B, C-D:SISTEMA\" o una lista de [A, B(, SISTEMA)]"
+    k = consulta.get("alternativas")
+    if k is not None and (isinstance(k, bool) or not isinstance(k, int) or k < 0):
+        return "'alternativas' debe ser un entero no negativo"
+    return None
+
+def _tarea_ruta(consulta):
+    return _resolver(consulta)
+
+def _tarea_lote(consultas):
+    return [_resolver(c) for c in consultas]
+
+# ---------------------------
+# SERVIDOR
+# ---------------------------
+class ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+class ServicioRutas:
+    """
+    Servidor HTTP de rutas.
+
+    - `procesos`: tamaño del pool de búsqueda (0 = hilos en este proceso,
+      útil para pruebas locales).
+    - `max_concurrentes`: búsquedas ejecutándose a la vez.
+    - `max_cola`: peticiones esperando turno antes de responder 503.
+    - `tiempo_limite`: segundos por búsqueda antes de responder 504.
+    """
+
+    def __init__(self, host='127.0.0.1', puerto=8080, ruta_snapshot=None, procesos=None,
+                 max_concurrentes=None, max_cola=256, tiempo_limite=5.0, capacidad_cache=4096):
+        self.host = host
+        self.puerto = puerto
+        self.ruta_snapshot = ruta_snapshot
+        self.procesos = (os.cpu_count() or 1) if procesos is None else procesos
+        self.max_concurrentes = max_concurrentes or max(self.procesos, 1) * 2
+        self.max_cola = max_cola
+        self.tiempo_limite = tiempo_limite
+        self.capacidad_cache = capacidad_cache
+        self._servidor = None
+        self._pool = None
+        self._semaforo = None
+        self._en_espera = 0
+        self._conexiones = {}   # writer -> tarea que atiende la conexión
+        self.atendidas = 0
+        self.rechazadas = 0
+        self.expiradas = 0
+
+    async def iniciar(self):
+        # La red del proceso principal se usa para /estaciones
+        _iniciar_trabajador(self.ruta_snapshot, self.capacidad_cache)
+        self.red = red_base()
+        self.indice = _indice_trabajador
+        if self.procesos == 0:
+            self._pool = ThreadPoolExecutor(self.max_concurrentes)
+        else:
+            self._pool = ProcessPoolExecutor(self.procesos, initializer=_iniciar_trabajador,
+                                             initargs=(self.ruta_snapshot, self.capacidad_cache))
+        self._semaforo = asyncio.Semaphore(self.max_concurrentes)
+        self._servidor = await asyncio.start_server(self._atender_conexion, self.host, self.puerto,
+                                                    limit=MAX_CABECERAS)
+        # Si se pidió el puerto 0, el sistema asigna uno libre
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+
+    async def cerrar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            # Cerrar también las conexiones keep-alive inactivas
+            tareas = list(self._conexiones.values())
+            for writer in list(self._conexiones):
+                writer.close()
+            await asyncio.gather(*tareas, return_exceptions=True)
+            await self._servidor.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def servir(self):
+        await self.iniciar()
+        print(f"Servicio de rutas escuchando en http://{self.host}:{self.puerto}")
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    # --- Ejecución en el pool con límites ---
+
+    async def _ejecutar(self, funcion, argumento):
+        if self._en_espera >= self.max_cola:
+            self.rechazadas += 1
+            raise ErrorHTTP(503, "Servicio saturado, intente más tarde")
+        self._en_espera += 1
+        try:
+            await self._semaforo.acquire()
+        finally:
+            self._en_espera -= 1
+        try:
+            futuro = asyncio.get_running_loop().run_in_executor(self._pool, funcion, argumento)
+        except BaseException:
+            self._semaforo.release()
+            raise
+        # El lugar se libera cuando la búsqueda termina de verdad, aunque ya se
+        # haya respondido 504: así las búsquedas expiradas siguen contando
+        futuro.add_done_callback(self._liberar)
+        try:
+            return await asyncio.wait_for(asyncio.shield(futuro), self.tiempo_limite)
+        except asyncio.TimeoutError:
+            # La respuesta se descarta; el proceso termina la búsqueda en segundo plano
+            self.expiradas += 1
+            raise ErrorHTTP(504, "La búsqueda excedió el tiempo límite")
+
+    def _liberar(self, futuro):
+        self._semaforo.release()
+        if not futuro.cancelled():
+            futuro.exception() # Evita el aviso de excepción no recuperada tras un 504
+
+    # --- Endpoints ---
+
+    async def _despachar(self, metodo, ruta, consulta, cuerpo):
+        if ruta == '/salud':
+            return {"estado": "ok", "nodos": len(self.red), "atendidas": self.atendidas,
+                    "rechazadas": self.rechazadas, "expiradas": self.expiradas}
+
+        if ruta == '/estaciones':
+            texto = consulta.get('q', [''])[0]
+            try:
+                limite = int(consulta.get('limite', ['10'])[0])
+            except ValueError:
+                raise ErrorHTTP(400, "'limite' debe ser un entero")
+            if limite < 1:
+                raise ErrorHTTP(400, "'limite' debe ser al menos 1")
+            encontradas = self.indice.autocompletar(texto, limite)
+            if not encontradas and texto:
+                # Sin coincidencias por prefijo: sugerir por parecido (errores de escritura)
+                encontradas = [self.indice.nombre(c) for c in self.indice.candidatos(texto, limite)]
+            return {"estaciones": encontradas}
+
+        if ruta in ('/ruta', '/rutas'):
+            if metodo != 'POST':
+                raise ErrorHTTP(405, "Use POST")
+            try:
+                datos = json.loads(cuerpo or b'{}')
+            except ValueError:
+                raise ErrorHTTP(400, "JSON inválido")
+            if ruta == '/ruta':
+                error = _validar_consulta(datos)
+                if error:
+                    raise ErrorHTTP(400, error)
+                resultado = await self._ejecutar(_tarea_ruta, datos)
+                if "error" in resultado:
+                    raise ErrorHTTP(404, resultado["error"])
+                return resultado
+            consultas = datos.get("consultas") if isinstance(datos, dict) else None
+            if not isinstance(consultas, list):
+                raise ErrorHTTP(400, "Se espera {'consultas': [{'origen', 'destino'}, ...]}")
+            if len(consultas) > MAX_CONSULTAS_LOTE:
+                raise ErrorHTTP(413, f"Máximo {MAX_CONSULTAS_LOTE} consultas por lote")
+            for i, c in enumerate(consultas):
+                error = _validar_consulta(c)
+                if error:
+                    raise ErrorHTTP(400, f"Consulta {i}: {error}")
+            return {"resultados": await self._ejecutar(_tarea_lote, consultas)}
+
+        raise ErrorHTTP(404, f"Ruta desconocida: {ruta}")
+
+    # --- Protocolo HTTP/1.1 mínimo ---
+
+    async def _atender_conexion(self, reader, writer):
+        self._conexiones[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    cabecera = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), TIEMPO_INACTIVO)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._responder(writer, 413, {"error": "Cabeceras demasiado grandes"}, False)
+                    break
+
+                lineas = cabecera.decode('latin-1').split('\r\n')
+                try:
+                    metodo, objetivo, version = lineas[0].split(' ', 2)
+                except ValueError:
+                    await self._responder(writer, 400, {"error": "Petición inválida"}, False)
+                    break
+                cabeceras = {}
+                for linea in lineas[1:]:
+                    if ':' in linea:
+                        k, v = linea.split(':', 1)
+                        cabeceras[k.strip().lower()] = v.strip()
+
+                mantener = (cabeceras.get('connection', '').lower() != 'close'
+                            and version.upper() == 'HTTP/1.1')
+                valor = cabeceras.get('content-length', '0') or '0'
+                if not (valor.isascii() and valor.isdigit()):
+                    # Sin un largo válido no se sabe dónde termina el cuerpo: se cierra la conexión
+                    await self._responder(writer, 400, {"error": "Content-Length inválido"}, False)
+                    break
+                largo = int(valor)
+                if largo > MAX_CUERPO:
+                    await self._responder(writer, 413, {"error": "Cuerpo demasiado grande"}, False)
+                    break
+                cuerpo = await reader.readexactly(largo) if largo else b''
+
+                partes = urlsplit(objetivo)
+                try:
+                    respuesta = await self._despachar(metodo.upper(), partes.path,
+                                                      parse_qs(partes.query), cuerpo)
+                    estado = 200
+                    self.atendidas += 1
+                except ErrorHTTP as e:
+                    estado, respuesta = e.estado, {"error": e.mensaje}
+                except Exception as e:
+                    estado, respuesta = 500, {"error": f"Error inesperado: {e}"}
+
+                await self._responder(writer, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        finally:
+            self._conexiones.pop(writer, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _responder(self, writer, estado, datos, mantener):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        writer.write((f"HTTP/1.1 {estado} {_MOTIVOS.get(estado, '')}\r\n"
+                      f"Content-Type: application/json; charset=utf-8\r\n"
+                      f"Content-Length: {len(cuerpo)}\r\n"
+                      f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n").encode('latin-1') + cuerpo)
+        await writer.drain()
+
+# ---------------------------
+# PROGRAMA PRINCIPAL
+# ---------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de rutas CDMX")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--snapshot', default=None, help="Archivo de snapshot_red.py a cargar")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos de búsqueda (0 = hilos)")
+    parser.add_argument('--max-concurrentes', type=int, default=None)
+    parser.add_argument('--max-cola', type=int, default=256)
+    parser.add_argument('--tiempo-limite', type=float, default=5.0)
+    args = parser.parse_args()
+
+    servicio = ServicioRutas(args.host, args.puerto, args.snapshot, args.procesos,
+                             args.max_concurrentes, args.max_cola, args.tiempo_limite)
+    try:
+        asyncio.run(servicio.servir())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
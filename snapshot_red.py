@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+snapshot_red.py
+
+Guarda y carga una RedCompilada en un archivo binario versionado, para que el
+buscador arranque leyendo arreglos ya compilados en lugar de reconstruir la
+red a partir de las listas de líneas.
+
+Formato:
+ - Cabecera: magia, versión, bytes de metadatos
+ - Metadatos (JSON): nodos, sistemas, líneas, nombres, tarifas, huella
+ - Arreglos CSR y atributos de nodos (little-endian)
+ - Coordenadas por nombre de estación, si la red las tiene (desde la versión 2)
+
+Uso (snapshot de la red incluida en datos_red_transporte.py):
+    python3 snapshot_red.py red_cdmx.bin
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import json
+import struct
+import sys
+from array import array
+
+from buscador_rutas import RedCompilada, construir_grafo, normalizar
+
+# ---------------------------
+# FORMATO DEL ARCHIVO
+# ---------------------------
+MAGIA = b'CDMXRED\0'
+VERSION = 2
+# Versiones que se pueden leer. La 1 se rechaza: no guarda coordenadas y sus
+# nombres pueden estar normalizados sin plegar acentos ni aplicar alias.
+VERSIONES_LEGIBLES = (2,)
+# magia, versión, bytes de metadatos (JSON)
+CABECERA = struct.Struct('<8sII')
+
+# (atributo, tipo, longitud: 'N' nodos, 'N+1' o 'E' aristas)
+_ARREGLOS = (
+    ('nodo_sistema', 'b', 'N'),
+    ('nodo_linea', 'i', 'N'),
+    ('nodo_estacion', 'i', 'N'),
+    ('offsets', 'i', 'N+1'),
+    ('destinos', 'i', 'E'),
+    ('pesos', 'd', 'E'),
+    ('modos', 'b', 'E'),
+)
+# Arreglo opcional (desde la versión 2): lat, lon por nombre de estación
+_COORDENADAS = ('coordenadas', 'd', '2S')
+
+def guardar_snapshot(red, ruta_archivo):
+    """Escribe `red` en `ruta_archivo`."""
+    meta = json.dumps({
+        "nodos": red.nodos,
+        "sistemas": red.sistemas,
+        "lineas": red.lineas,
+        "nombres": red.nombres,
+        "tarifas": red.tarifas,
+        "huella": red.huella,
+        "num_aristas": red.num_aristas(),
+        "coordenadas": red.coordenadas is not None,
+    }, ensure_ascii=False).encode('utf-8')
+
+    with open(ruta_archivo, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, len(meta)))
+        f.write(meta)
+        for atributo, tipo, _ in _ARREGLOS + ((_COORDENADAS,) if red.coordenadas is not None else ()):
+            arr = getattr(red, atributo)
+            if sys.byteorder != 'little':
+                arr = array(tipo, arr); arr.byteswap()
+            f.write(arr.tobytes())
+
+def cargar_snapshot(ruta_archivo):
+    """Lee un archivo escrito por `guardar_snapshot` y devuelve la RedCompilada."""
+    with open(ruta_archivo, 'rb') as f:
+        datos = f.read()
+
+    magia, version, largo_meta = CABECERA.unpack_from(datos, 0)
+    if magia != MAGIA:
+        raise ValueError(f"Archivo de red inválido: '{ruta_archivo}'")
+    if version not in VERSIONES_LEGIBLES:
+        raise ValueError(f"Versión de snapshot no soportada: {version} (regenere el archivo)")
+
+    pos = CABECERA.size
+    meta = json.loads(datos[pos:pos + largo_meta].decode('utf-8'))
+    pos += largo_meta
+    if any(normalizar(n) != n for n in meta["nombres"]):
+        # Las búsquedas normalizan el texto con las reglas actuales: las claves deben coincidir
+        raise ValueError(f"Snapshot con nombres normalizados de otra forma: '{ruta_archivo}' (regenere el archivo)")
+
+    N = len(meta["nodos"]); E = meta["num_aristas"]
+    longitudes = {'N': N, 'N+1': N + 1, 'E': E, '2S': 2 * len(meta["nombres"])}
+    arreglos = {'coordenadas': None}
+    for atributo, tipo, largo in _ARREGLOS + ((_COORDENADAS,) if meta.get("coordenadas") else ()):
+        arr = array(tipo)
+        tam = arr.itemsize * longitudes[largo]
+        arr.frombytes(datos[pos:pos + tam])
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        arreglos[atributo] = arr
+        pos += tam
+
+    return RedCompilada(
+        [tuple(n) for n in meta["nodos"]], meta["sistemas"],
+        [tuple(l) for l in meta["lineas"]], meta["nombres"],
+        arreglos["nodo_sistema"], arreglos["nodo_linea"], arreglos["nodo_estacion"],
+        arreglos["offsets"], arreglos["destinos"], arreglos["pesos"], arreglos["modos"],
+        meta["tarifas"], meta["huella"], arreglos["coordenadas"])
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python3 snapshot_red.py <archivo_salida>")
+        sys.exit(1)
+    red, _ = construir_grafo()
+    guardar_snapshot(red, sys.argv[1])
+    print(f"Red ({len(red)} nodos, {red.num_aristas()} aristas) escrita en {sys.argv[1]}")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+tabla_tiempos.py
+
+Tabla precalculada de tiempos y costos entre todas las estaciones de la red.
+
+El paso offline ejecuta, para cada estación destino, un Dijkstra hacia atrás
+con la misma semántica que `encontrar_ruta_mas_rapida` (incluye
+TRANSFER_PENALTY y el cobro por cambio de sistema, y entre rutas del mismo
+tiempo la más barata) y guarda en un archivo binario:
+ - tiempo[origen][destino]      (float32, minutos; inf si no hay ruta)
+ - costo[origen][destino]       (int32, MXN; -1 si no hay ruta)
+ - inicio[origen][destino]      (int32, nodo por el que conviene salir)
+ - siguiente[destino][nodo]     (int32, siguiente nodo hacia el destino)
+
+Al cargarse, el archivo se mapea en memoria (mmap) en modo lectura: las
+consultas son O(1) y varios procesos comparten las mismas páginas en lugar
+de compilar cada uno su propia red.
+
+Uso:
+    python3 tabla_tiempos.py tabla_cdmx.bin
+"""
+
+# ---------------------------
+# IMPORTACIONES
+# ---------------------------
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from buscador_rutas import (
+    red_base, normalizar, _dijkstra, _agrupar_segmentos, INF
+)
+
+# ---------------------------
+# FORMATO DEL ARCHIVO
+# ---------------------------
+MAGIA = b'CDMXTAB\0'
+# Versión 2: nombres plegados (sin acentos) y con alias; empates de tiempo por costo
+VERSION = 2
+# magia, versión, num_estaciones, num_nodos, bytes de metadatos (JSON)
+CABECERA = struct.Struct('<8sIIII')
+
+def _alinear(n, a=8):
+    return (n + a - 1) // a * a
+
+# ---------------------------
+# CONSTRUCCIÓN (PASO OFFLINE)
+# ---------------------------
+def construir_tabla(ruta_archivo, red=None):
+    """
+    Calcula la tabla de todos los pares de estaciones de `red` (por defecto
+    la red base) y la escribe en `ruta_archivo`.
+    """
+    red = red if red is not None else red_base()
+    inversa = red.invertida()
+    S = len(red.nombres); N = len(red)
+    grupos = [red.indice_por_nombre[nombre] for nombre in red.nombres]
+
+    tiempo = array('f', [INF]) * (S * S)
+    costo = array('i', [-1]) * (S * S)
+    inicio = array('i', [-1]) * (S * S)
+    siguiente = array('i', [-1]) * (S * N)
+    nodo_sistema = red.nodo_sistema; tarifas = red.tarifas
+
+    for t in range(S):
+        # Búsqueda hacia atrás: dist[u] = tiempo de u al destino t,
+        # prev[u] = siguiente nodo del camino desde u hacia t
+        orden = []
+        dist, prev, _ = _dijkstra(inversa, grupos[t], orden=orden)
+        siguiente[t*N:(t+1)*N] = prev
+
+        # Costo desde cada nodo hasta t, en orden de fijación (t primero):
+        # se cobra al entrar al sistema de u y no se repite si el siguiente
+        # nodo es del mismo sistema
+        costo_nodo = [0] * N
+        for u in orden:
+            sig = prev[u]
+            c = tarifas[nodo_sistema[u]]
+            if sig != -1:
+                c += costo_nodo[sig]
+                if nodo_sistema[sig] == nodo_sistema[u]:
+                    c -= tarifas[nodo_sistema[sig]]
+            costo_nodo[u] = c
+
+        for s in range(S):
+            mejor = min(grupos[s], key=lambda u: (dist[u], costo_nodo[u]))
+            if dist[mejor] < INF:
+                k = s * S + t
+                tiempo[k] = dist[mejor]
+                costo[k] = costo_nodo[mejor]
+                inicio[k] = mejor
+
+    meta = json.dumps({
+        "nombres": red.nombres,
+        "nodos": red.nodos,
+    }, ensure_ascii=False).encode('utf-8')
+
+    with open(ruta_archivo, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, S, N, len(meta)))
+        f.write(meta)
+        f.write(b'\0' * (_alinear(CABECERA.size + len(meta)) - CABECERA.size - len(meta)))
+        for arr in (tiempo, costo, inicio, siguiente):
+            f.write(arr.tobytes())
+
+# ---------------------------
+# CONSULTA (ARCHIVO MAPEADO)
+# ---------------------------
+class TablaTiempos:
+    """Tabla de tiempos/costos mapeada en memoria (solo lectura)."""
+
+    def __init__(self, ruta_archivo):
+        with open(ruta_archivo, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magia, version, S, N, largo_meta = CABECERA.unpack_from(self._mm, 0)
+        if magia != MAGIA:
+            raise ValueError(f"Archivo de tabla inválido: '{ruta_archivo}'")
+        if version != VERSION:
+            raise ValueError(f"Versión de tabla no soportada: {version} (regenere el archivo)")
+
+        meta = json.loads(self._mm[CABECERA.size:CABECERA.size + largo_meta].decode('utf-8'))
+        self.nombres = meta["nombres"]
+        if any(normalizar(n) != n for n in self.nombres):
+            raise ValueError(f"Tabla con nombres normalizados de otra forma: '{ruta_archivo}' (regenere el archivo)")
+        self.nodos = [tuple(n) for n in meta["nodos"]]
+        self.indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.S = S; self.N = N
+
+        vista = memoryview(self._mm)
+        pos = _alinear(CABECERA.size + largo_meta)
+        def tomar(formato, cantidad):
+            nonlocal pos
+            v = vista[pos:pos + 4 * cantidad].cast(formato)
+            pos += 4 * cantidad
+            return v
+        self._tiempo = tomar('f', S * S)
+        self._costo = tomar('i', S * S)
+        self._inicio = tomar('i', S * S)
+        self._siguiente = tomar('i', S * N)
+
+    def close(self):
+        for v in (self._tiempo, self._costo, self._inicio, self._siguiente):
+            v.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _par(self, origen_nombre, destino_nombre):
+        s = self.indice.get(normalizar(origen_nombre))
+        t = self.indice.get(normalizar(destino_nombre))
+        if s is None:
+            raise ValueError(f"Origen no encontrado: '{origen_nombre}'")
+        if t is None:
+            raise ValueError(f"Destino no encontrado: '{destino_nombre}'")
+        return s, t
+
+    def tiempo(self, origen_nombre, destino_nombre):
+        """Tiempo mínimo en minutos (inf si no hay ruta)."""
+        s, t = self._par(origen_nombre, destino_nombre)
+        return self._tiempo[s * self.S + t]
+
+    def costo(self, origen_nombre, destino_nombre):
+        """Costo en MXN de la ruta más rápida (None si no hay ruta)."""
+        s, t = self._par(origen_nombre, destino_nombre)
+        c = self._costo[s * self.S + t]
+        return None if c < 0 else c
+
+    def ruta(self, origen_nombre, destino_nombre):
+        """
+        Reconstruye la ruta siguiendo los saltos guardados. Devuelve el mismo
+        diccionario que `encontrar_ruta_mas_rapida` (o None si no hay ruta).
+        """
+        s, t = self._par(origen_nombre, destino_nombre)
+        k = s * self.S + t
+        u = self._inicio[k]
+        if u == -1:
+            return None
+
+        base = t * self.N
+        camino = []
+        while u != -1:
+            camino.append(self.nodos[u])
+            u = self._siguiente[base + u]
+
+        return {
+            "tiempo_min": round(self._tiempo[k], 2),
+            "segmentos": _agrupar_segmentos(camino),
+            "camino_completo": camino,
+            "costo_mxn": self._costo[k]
+        }
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python3 tabla_tiempos.py <archivo_salida>")
+        sys.exit(1)
+    construir_tabla(sys.argv[1])
+    print(f"Tabla escrita en {sys.argv[1]}")
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buscador_rutas import TARIFAS, compilar_red, red_base
+
+
+# Red chica hecha a mano: pocas rutas simples entre cualquier par, así que
+# los resultados se pueden comparar contra fuerza bruta. Mezcla sistemas
+# (tarifas distintas) y tiempos para que haya rutas rápidas pero caras.
+LINEAS_PEQUENAS = [
+    ('METRO', 'L1', ['A', 'B', 'C', 'D'], 2.0),
+    ('METROBUS', 'MB1', ['A', 'E', 'D'], 3.0),
+    ('TROLEBUS', 'T1', ['B', 'E', 'F'], 1.0),
+    ('METRO', 'L2', ['C', 'F', 'D'], 1.5),
+    ('METROBUS', 'MB2', ['F', 'G', 'A'], 2.5),
+]
+
+
+@pytest.fixture(scope="session")
+def red():
+    return red_base()
+
+
+@pytest.fixture(scope="session")
+def red_pequena():
+    return compilar_red(LINEAS_PEQUENAS, tarifas=TARIFAS)
+
+
+def caminos_simples(red, origen, destino, cierres=None):
+    """
+    Todos los caminos simples (listas de ids de nodo) desde alguna estación
+    del origen hasta la primera estación del destino que alcanzan.
+    """
+    nodos_destino = set(red.indice_por_nombre[destino])
+    caminos = []
+
+    def extender(camino, visitados):
+        u = camino[-1]
+        if u in nodos_destino:
+            caminos.append(list(camino))
+            return
+        for e in range(red.offsets[u], red.offsets[u+1]):
+            v = red.destinos[e]
+            if v in visitados or (cierres and (cierres.aristas[e] or cierres.nodos[v])):
+                continue
+            visitados.add(v); camino.append(v)
+            extender(camino, visitados)
+            camino.pop(); visitados.discard(v)
+
+    for o in red.indice_por_nombre[origen]:
+        if not (cierres and cierres.nodos[o]):
+            extender([o], {o})
+    return caminos
@@ -0,0 +1,30 @@
+from buscador_rutas import construir_cierres, encontrar_ruta_mas_rapida
+from busqueda_alt import IndiceALT, verificar_contra_dijkstra
+
+
+def test_red_base_igual_que_dijkstra(red):
+    assert verificar_contra_dijkstra(IndiceALT(red), consultas=300) == []
+
+
+def test_con_cierres_igual_que_dijkstra(red):
+    cierres = construir_cierres(red, ["Pantitlán"],
+                                [("Pino Suárez", "Zócalo/Tenochtitlan", "METRO")])
+    assert verificar_contra_dijkstra(IndiceALT(red), consultas=300, semilla=1, cierres=cierres) == []
+
+
+def test_pocos_landmarks_igual_que_dijkstra(red):
+    assert verificar_contra_dijkstra(IndiceALT(red, num_landmarks=1), consultas=100, semilla=2) == []
+
+
+def test_red_pequena_todos_los_pares(red_pequena):
+    n = len(red_pequena.indice_por_nombre)
+    indice = IndiceALT(red_pequena, num_landmarks=2)
+    assert verificar_contra_dijkstra(indice, consultas=n * n * 3) == []
+
+
+def test_empate_de_tiempo_elige_la_tarifa_mas_barata(red):
+    indice = IndiceALT(red)
+    esperada = encontrar_ruta_mas_rapida(red, red.indice_por_nombre, "Revolución", "Tepito")
+    for bidireccional in (False, True):
+        ruta = indice.encontrar_ruta("Revolución", "Tepito", bidireccional=bidireccional)
+        assert (ruta["tiempo_min"], ruta["costo_mxn"]) == (esperada["tiempo_min"], esperada["costo_mxn"])
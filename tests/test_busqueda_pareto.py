@@ -0,0 +1,61 @@
+import itertools
+import random
+
+from buscador_rutas import encontrar_ruta_mas_rapida
+from busqueda_pareto import frente_pareto
+from conftest import caminos_simples
+
+
+def _criterios(red, camino):
+    tiempo = 0.0
+    costo = red.tarifas[red.nodo_sistema[camino[0]]]
+    transbordos = 0
+    for u, v in zip(camino, camino[1:]):
+        tiempo += min(red.pesos[e] for e in range(red.offsets[u], red.offsets[u+1])
+                      if red.destinos[e] == v)
+        if red.nodo_sistema[v] != red.nodo_sistema[u]:
+            costo += red.tarifas[red.nodo_sistema[v]]
+        transbordos += red.nodo_linea[v] != red.nodo_linea[u]
+    return round(tiempo, 6), costo, transbordos
+
+
+def _no_dominados(etiquetas):
+    return {a for a in etiquetas
+            if not any(b != a and all(x <= y for x, y in zip(b, a)) for b in etiquetas)}
+
+
+def _triples(rutas):
+    return {(round(r["tiempo_min"], 6), r["costo_mxn"], r["transbordos"]) for r in rutas}
+
+
+def test_red_pequena_igual_que_fuerza_bruta(red_pequena):
+    for origen, destino in itertools.permutations(red_pequena.indice_por_nombre, 2):
+        esperado = _no_dominados({_criterios(red_pequena, c)
+                                  for c in caminos_simples(red_pequena, origen, destino)})
+        assert _triples(frente_pareto(origen, destino, red=red_pequena)) == esperado, (origen, destino)
+
+
+def test_mas_rapida_igual_que_dijkstra(red):
+    nombres = list(red.indice_por_nombre)
+    aleatorio = random.Random(0)
+    for _ in range(30):
+        origen = aleatorio.choice(nombres); destino = aleatorio.choice(nombres)
+        esperada = encontrar_ruta_mas_rapida(red, red.indice_por_nombre, origen, destino)
+        rutas = frente_pareto(origen, destino, red=red)
+        if esperada is None:
+            assert rutas == []
+            continue
+        assert rutas[0]["tiempo_min"] == esperada["tiempo_min"]
+        assert _triples(rutas) == _no_dominados(_triples(rutas))
+        for ruta in rutas:
+            ids = [red.id_por_nodo[n] for n in ruta["camino_completo"]]
+            assert _criterios(red, ids) == (round(ruta["tiempo_min"], 6), ruta["costo_mxn"],
+                                            ruta["transbordos"])
+
+
+def test_limites_descartan_rutas(red):
+    rutas = frente_pareto("Universidad", "Indios Verdes", red=red)
+    limite = min(r["transbordos"] for r in rutas)
+    acotadas = frente_pareto("Universidad", "Indios Verdes", red=red, max_transbordos=limite)
+    assert acotadas and all(r["transbordos"] <= limite for r in acotadas)
+    assert _triples(acotadas) <= _triples(rutas)
@@ -0,0 +1,35 @@
+from benchmark import red_sintetica
+from buscador_rutas import TARIFAS, compilar_red, encontrar_ruta_mas_rapida
+from jerarquia_contraccion import JerarquiaContraccion, verificar_contra_dijkstra
+
+
+def test_red_base_igual_que_dijkstra(red):
+    assert verificar_contra_dijkstra(JerarquiaContraccion(red), consultas=300) == []
+
+
+def test_red_sintetica_igual_que_dijkstra():
+    red = compilar_red(red_sintetica(500, 20, 0.4, semilla=1), tarifas=TARIFAS)
+    assert verificar_contra_dijkstra(JerarquiaContraccion(red), consultas=300, semilla=1) == []
+
+
+def test_red_pequena_todos_los_pares(red_pequena):
+    jerarquia = JerarquiaContraccion(red_pequena)
+    n = len(red_pequena.indice_por_nombre)
+    assert verificar_contra_dijkstra(jerarquia, consultas=n * n * 3) == []
+
+
+def test_camino_es_consistente_con_su_tiempo(red):
+    jerarquia = JerarquiaContraccion(red)
+    ruta = jerarquia.encontrar_ruta("Universidad", "Indios Verdes")
+    ids = [red.id_por_nodo[n] for n in ruta["camino_completo"]]
+    total = 0.0
+    for u, v in zip(ids, ids[1:]):
+        total += min(red.pesos[e] for e in range(red.offsets[u], red.offsets[u+1])
+                     if red.destinos[e] == v)
+    assert abs(total - ruta["tiempo_min"]) < 1e-6
+
+
+def test_empate_de_tiempo_elige_la_tarifa_mas_barata(red):
+    ruta = JerarquiaContraccion(red).encontrar_ruta("Copilco", "Peñón Viejo")
+    esperada = encontrar_ruta_mas_rapida(red, red.indice_por_nombre, "Copilco", "Peñón Viejo")
+    assert (ruta["tiempo_min"], ruta["costo_mxn"]) == (esperada["tiempo_min"], esperada["costo_mxn"])
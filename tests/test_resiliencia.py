@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from buscador_rutas import INF, construir_cierres
+from matriz_od import fila_od
+from resiliencia import AnalisisResiliencia, escenarios_red
+
+
+@pytest.fixture(scope="module")
+def analisis(red):
+    nombres = sorted(red.indice_por_nombre)
+    estaciones = random.Random(0).sample(nombres, 80) + [
+        "Pantitlán", "Pino Suárez", "Zócalo/Tenochtitlan", "Chabacano", "Tacubaya"]
+    return AnalisisResiliencia(red, estaciones)
+
+
+def _recalcular(analisis, estaciones, tramos):
+    # Una búsqueda completa por origen sobre la red con cierres
+    red = analisis.red
+    cierres = construir_cierres(red, estaciones, tramos)
+    abiertos = [g for g, ids in enumerate(analisis.grupos) if not all(cierres.nodos[i] for i in ids)]
+    minutos_extra = 0.0; afectados = 0; sin_ruta = 0; max_extra = 0.0
+    for s in abiertos:
+        destinos = [g for g in abiertos if g != s]
+        tiempos, _, _ = fila_od(red, analisis.grupos[s], [analisis.grupos[g] for g in destinos], cierres)
+        for g, nuevo in zip(destinos, tiempos):
+            base = analisis.filas[s][g]
+            if nuevo <= base:
+                continue
+            if nuevo == INF:
+                sin_ruta += 1
+            else:
+                afectados += 1
+                minutos_extra += nuevo - base
+                max_extra = max(max_extra, nuevo - base)
+    return minutos_extra, afectados, sin_ruta, max_extra
+
+
+def _comparar(analisis, estaciones, tramos):
+    minutos_extra, afectados, sin_ruta, max_extra = _recalcular(analisis, estaciones, tramos)
+    resultado = analisis.evaluar(estaciones, tramos)
+    assert resultado["pares_afectados"] == afectados
+    assert resultado["pares_sin_ruta"] == sin_ruta
+    assert resultado["minutos_extra"] == pytest.approx(minutos_extra)
+    assert resultado["max_extra_min"] == pytest.approx(max_extra)
+    return resultado
+
+
+def test_cierre_de_estacion(analisis):
+    resultado = _comparar(analisis, ["Pantitlán"], None)
+    assert resultado["pares_afectados"] > 0
+
+
+def test_cierre_de_tramo(analisis):
+    resultado = _comparar(analisis, None, [("Pino Suárez", "Zócalo/Tenochtitlan", "METRO")])
+    assert resultado["pares_afectados"] > 0
+
+
+def test_escenarios_aleatorios(analisis):
+    escenarios = escenarios_red(analisis.red)
+    for _, _, estaciones, tramos in random.Random(1).sample(escenarios, 25):
+        _comparar(analisis, estaciones, tramos)
+
+
+def test_sin_cierres_no_hay_impacto(analisis):
+    resultado = analisis.evaluar()
+    assert (resultado["pares_afectados"], resultado["pares_sin_ruta"],
+            resultado["origenes_recalculados"]) == (0, 0, 0)
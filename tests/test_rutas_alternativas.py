@@ -0,0 +1,44 @@
+import itertools
+import random
+
+from buscador_rutas import _tiempo_camino, encontrar_ruta_mas_rapida
+from conftest import caminos_simples
+from rutas_alternativas import rutas_alternativas
+
+
+def _ids(red, ruta):
+    return [red.id_por_nodo[n] for n in ruta["camino_completo"]]
+
+
+def test_red_pequena_igual_que_fuerza_bruta(red_pequena):
+    # Sin filtro de parecido ni de tiempo, las k rutas son las k rutas simples
+    # más cortas
+    k = 4
+    for origen, destino in itertools.permutations(red_pequena.indice_por_nombre, 2):
+        esperados = sorted(round(_tiempo_camino(red_pequena, c), 6)
+                           for c in caminos_simples(red_pequena, origen, destino))[:k]
+        rutas = rutas_alternativas(origen, destino, k=k, red=red_pequena,
+                                   max_compartido=1.0, max_factor=1000.0)
+        assert [round(r["tiempo_min"], 6) for r in rutas] == esperados, (origen, destino)
+        assert len({tuple(_ids(red_pequena, r)) for r in rutas}) == len(rutas)
+
+
+def test_red_base_propiedades(red):
+    nombres = list(red.indice_por_nombre)
+    aleatorio = random.Random(0)
+    for _ in range(20):
+        origen = aleatorio.choice(nombres); destino = aleatorio.choice(nombres)
+        esperada = encontrar_ruta_mas_rapida(red, red.indice_por_nombre, origen, destino)
+        rutas = rutas_alternativas(origen, destino, k=3, red=red)
+        if esperada is None:
+            assert rutas == []
+            continue
+        assert rutas[0]["tiempo_min"] == esperada["tiempo_min"]
+        tiempos = [r["tiempo_min"] for r in rutas]
+        assert tiempos == sorted(tiempos)
+        for ruta in rutas:
+            ids = _ids(red, ruta)
+            assert len(set(ids)) == len(ids)
+            assert abs(_tiempo_camino(red, ids) - ruta["tiempo_min"]) < 1e-6
+            assert ruta["compartido"] <= 0.6
+            assert ruta["tiempo_min"] <= 1.5 * tiempos[0] + 1e-6
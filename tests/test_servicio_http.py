@@ -0,0 +1,121 @@
+import asyncio
+import http.client
+import json
+import threading
+
+import pytest
+
+from servicio_http import MAX_CONSULTAS_LOTE, MAX_CUERPO, ServicioRutas
+
+
+@pytest.fixture(scope="module")
+def servicio():
+    # El servidor corre en su propio bucle de eventos en otro hilo; las
+    # pruebas le hablan con http.client como cualquier cliente local
+    bucle = asyncio.new_event_loop()
+    hilo = threading.Thread(target=bucle.run_forever, daemon=True)
+    hilo.start()
+    servicio = ServicioRutas(puerto=0, procesos=0)
+    asyncio.run_coroutine_threadsafe(servicio.iniciar(), bucle).result(30)
+    yield servicio
+    asyncio.run_coroutine_threadsafe(servicio.cerrar(), bucle).result(30)
+    bucle.call_soon_threadsafe(bucle.stop)
+    hilo.join(5)
+    bucle.close()
+
+
+def _pedir(servicio, metodo, ruta, cuerpo=None, cabeceras=None):
+    conexion = http.client.HTTPConnection("127.0.0.1", servicio.puerto, timeout=30)
+    try:
+        if cuerpo is not None and not isinstance(cuerpo, bytes):
+            cuerpo = json.dumps(cuerpo).encode("utf-8")
+        conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras or {})
+        respuesta = conexion.getresponse()
+        return respuesta.status, json.loads(respuesta.read())
+    finally:
+        conexion.close()
+
+
+def test_ruta(servicio):
+    estado, datos = _pedir(servicio, "POST", "/ruta",
+                           {"origen": "universidad", "destino": "El Rosario", "alternativas": 1})
+    assert estado == 200
+    assert (datos["origen"], datos["destino"]) == ("Universidad", "El Rosario")
+    assert datos["ruta"]["tiempo_min"] > 0
+    assert len(datos["alternativas"]) <= 1
+
+
+def test_ruta_con_cierres(servicio):
+    consulta = {"origen": "Universidad", "destino": "El Rosario"}
+    _, libre = _pedir(servicio, "POST", "/ruta", consulta)
+    estado, cerrada = _pedir(servicio, "POST", "/ruta",
+                             dict(consulta, estaciones_cerradas=["Hidalgo", "Balderas"]))
+    assert estado == 200
+    assert cerrada["ruta"]["tiempo_min"] >= libre["ruta"]["tiempo_min"]
+
+
+def test_rutas_en_lote(servicio):
+    estado, datos = _pedir(servicio, "POST", "/rutas", {"consultas": [
+        {"origen": "Universidad", "destino": "Tasqueña"},
+        {"origen": "Universidad", "destino": "Estación que no existe xyz"}]})
+    assert estado == 200
+    primera, segunda = datos["resultados"]
+    assert primera["ruta"]["tiempo_min"] > 0
+    assert "error" in segunda
+
+
+def test_estaciones(servicio):
+    estado, datos = _pedir(servicio, "GET", "/estaciones?q=pant&limite=3")
+    assert estado == 200
+    assert 0 < len(datos["estaciones"]) <= 3
+    assert "Pantitlán" in datos["estaciones"]
+
+
+@pytest.mark.parametrize("limite", ["0", "-1", "dos"])
+def test_estaciones_limite_invalido(servicio, limite):
+    estado, datos = _pedir(servicio, "GET", f"/estaciones?q=pant&limite={limite}")
+    assert estado == 400
+    assert "limite" in datos["error"]
+
+
+@pytest.mark.parametrize("cuerpo", [
+    b"{no es json",
+    {"origen": "Universidad"},
+    {"origen": 3, "destino": "Tasqueña"},
+    {"origen": "Universidad", "destino": "Tasqueña", "estaciones_cerradas": "Hidalgo"},
+    {"origen": "Universidad", "destino": "Tasqueña", "tramos_cerrados": [["Hidalgo"]]},
+    {"origen": "Universidad", "destino": "Tasqueña", "alternativas": -1},
+    {"origen": "Universidad", "destino": "Tasqueña", "alternativas": True},
+])
+def test_ruta_consulta_invalida(servicio, cuerpo):
+    estado, datos = _pedir(servicio, "POST", "/ruta", cuerpo)
+    assert estado == 400
+    assert datos["error"]
+
+
+def test_rutas_consulta_invalida(servicio):
+    estado, datos = _pedir(servicio, "POST", "/rutas", {"consultas": [
+        {"origen": "Universidad", "destino": "Tasqueña"}, {"origen": "Universidad"}]})
+    assert estado == 400
+    assert datos["error"].startswith("Consulta 1:")
+
+
+def test_content_length_invalido(servicio):
+    estado, _ = _pedir(servicio, "POST", "/ruta", cabeceras={"Content-Length": "abc"})
+    assert estado == 400
+
+
+def test_cuerpo_demasiado_grande(servicio):
+    estado, _ = _pedir(servicio, "POST", "/ruta", cabeceras={"Content-Length": str(MAX_CUERPO + 1)})
+    assert estado == 413
+
+
+def test_lote_demasiado_grande(servicio):
+    consultas = [{"origen": "Universidad", "destino": "Tasqueña"}] * (MAX_CONSULTAS_LOTE + 1)
+    estado, _ = _pedir(servicio, "POST", "/rutas", {"consultas": consultas})
+    assert estado == 413
+
+
+def test_ruta_desconocida_y_metodo(servicio):
+    assert _pedir(servicio, "GET", "/no-existe")[0] == 404
+    assert _pedir(servicio, "GET", "/ruta")[0] == 405
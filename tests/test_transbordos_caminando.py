@@ -0,0 +1,78 @@
+import math
+
+import pytest
+
+from buscador_rutas import (METROS_POR_GRADO, MODO_TRANSFER, TARIFAS, TRANSFER_PENALTY,
+                            WALK_DETOUR, WALK_SPEED, _pares_cercanos, compilar_red, normalizar)
+
+LAT0, LON0 = 19.43, -99.13
+RADIO = 300.0
+
+
+def _punto(norte, este):
+    # Coordenadas a `norte` y `este` metros del punto de referencia
+    return (LAT0 + norte / METROS_POR_GRADO,
+            LON0 + este / (METROS_POR_GRADO * math.cos(math.radians(LAT0))))
+
+
+LINEAS = [
+    ('METRO', 'L1', ['A', 'B'], 2.0),
+    ('METROBUS', 'MB1', ['C', 'D'], 3.0),
+    ('TROLEBUS', 'T1', ['E', 'F'], 3.0),
+]
+COORDENADAS = {
+    'A': _punto(0, 0),
+    'B': _punto(-250, 0),     # misma línea que A, a 250 m
+    'C': _punto(200, 0),      # otra línea, a 200 m de A
+    'D': _punto(5000, 0),
+    'E': _punto(0, 400),      # a 400 m de A: fuera del radio
+    'F': _punto(0, 5000),
+}
+
+
+@pytest.fixture(scope="module")
+def red():
+    return compilar_red(LINEAS, tarifas=TARIFAS, coordenadas=COORDENADAS, radio_transbordo=RADIO)
+
+
+def _aristas(red, origen, destino):
+    a, = red.indice_por_nombre[normalizar(origen)]; b, = red.indice_por_nombre[normalizar(destino)]
+    return [(red.pesos[e], red.modos[e]) for e in range(red.offsets[a], red.offsets[a+1])
+            if red.destinos[e] == b]
+
+
+def test_par_cercano_tiene_transbordo_a_pie(red):
+    esperado = TRANSFER_PENALTY + 200.0 * WALK_DETOUR / WALK_SPEED
+    for origen, destino in (('A', 'C'), ('C', 'A')):
+        (peso, modo), = _aristas(red, origen, destino)
+        assert modo == MODO_TRANSFER
+        assert peso == pytest.approx(esperado, abs=1e-3)
+
+
+def test_misma_linea_no_se_une(red):
+    # A y B están dentro del radio pero en la misma línea: solo el tramo a bordo
+    for origen, destino in (('A', 'B'), ('B', 'A')):
+        (peso, modo), = _aristas(red, origen, destino)
+        assert (peso, modo != MODO_TRANSFER) == (2.0, True)
+
+
+def test_fuera_del_radio_no_hay_arista(red):
+    assert _aristas(red, 'A', 'E') == [] and _aristas(red, 'E', 'A') == []
+    assert _aristas(red, 'C', 'E') == [] and _aristas(red, 'B', 'E') == []
+
+
+def test_pares_cercanos_contra_fuerza_bruta():
+    coordenadas = []
+    for k in range(60):
+        lat, lon = _punto((k * 37) % 900, (k * 53) % 700)
+        coordenadas += [lat, lon]
+    coordenadas += [math.nan, math.nan]   # punto sin coordenada
+    escala_x = METROS_POR_GRADO * math.cos(math.radians(sum(coordenadas[0:120:2]) / 60))
+    esperados = set()
+    for a in range(60):
+        for b in range(a + 1, 60):
+            metros = math.hypot((coordenadas[2*a+1] - coordenadas[2*b+1]) * escala_x,
+                                (coordenadas[2*a] - coordenadas[2*b]) * METROS_POR_GRADO)
+            if metros <= RADIO:
+                esperados.add((a, b))
+    assert {(a, b) for a, b, _ in _pares_cercanos(coordenadas, RADIO)} == esperados